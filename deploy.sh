@@ -3,6 +3,7 @@ set -euo pipefail
 
 SERVER="ws"
 HOST_DEPLOY_SCRIPT="scripts/host-deploy.sh"
+SYSTEMD_UNITS=(scripts/systemd/*.service)
 PUBLIC_ASSET_DEPLOY_SCRIPT="scripts/deploy-public-assets.sh"
 ASSET_RELEASE="${ASSET_RELEASE:-$(git rev-parse --verify HEAD)}"
 
@@ -20,5 +21,10 @@ REMOTE_WHEEL="/tmp/$(basename "$WHEEL")"
 
 echo "Deploying $WHEEL to $SERVER"
 
-rsync "$WHEEL" "$HOST_DEPLOY_SCRIPT" "$SERVER:/tmp/"
-ssh -t "$SERVER" "sudo install -o worldstage -g worldstage -m 0755 /tmp/host-deploy.sh /opt/worldstage/deploy.sh && /opt/worldstage/deploy.sh $REMOTE_WHEEL && rm $REMOTE_WHEEL /tmp/host-deploy.sh"
+REMOTE_UNITS=""
+for unit in "${SYSTEMD_UNITS[@]}"; do
+    REMOTE_UNITS+=" /tmp/$(basename "$unit")"
+done
+
+rsync "$WHEEL" "$HOST_DEPLOY_SCRIPT" "${SYSTEMD_UNITS[@]}" "$SERVER:/tmp/"
+ssh -t "$SERVER" "sudo install -o worldstage -g worldstage -m 0755 /tmp/host-deploy.sh /opt/worldstage/deploy.sh && /opt/worldstage/deploy.sh $REMOTE_WHEEL && rm $REMOTE_WHEEL /tmp/host-deploy.sh$REMOTE_UNITS"
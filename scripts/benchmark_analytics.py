@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""Time the SQL and NumPy analytics cache rebuilds on synthetic shows.
+
+Each synthetic show is created inside a transaction that is rolled back,
+so the script can run against any database the app can reach
+(DATABASE_URI). Both backends rebuild the same show and their cache rows
+are compared before the timings are reported.
+
+Usage: benchmark_analytics.py [VOTERS ...]   (default: 50 200 1000)
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+
+from world_stage import analytics_engine, create_app
+from world_stage.db import get_db
+
+SONGS = 40
+ROUNDS = 3
+CACHE_TABLES = (
+    "taste_similarity_show_cache",
+    "country_bias_show_cache",
+    "submitter_bias_show_cache",
+)
+
+
+def create_show(cursor, voters: int) -> int:
+    cursor.execute(
+        """
+        INSERT INTO account (username, email, password, salt, approved)
+        SELECT 'benchmark-' || n, 'benchmark-' || n || '@example.invalid',
+            '\\x00', '\\x00', true
+        FROM generate_series(1, %s) AS n
+        RETURNING id
+        """,
+        (voters,),
+    )
+    voter_ids = [row["id"] for row in cursor.fetchall()]
+    cursor.execute("INSERT INTO show_status (name) VALUES ('full') ON CONFLICT DO NOTHING")
+    cursor.execute(
+        """
+        SELECT p.point_system_id, array_agg(p.score ORDER BY p.place) AS scores
+        FROM point p
+        GROUP BY p.point_system_id
+        ORDER BY count(*) DESC, p.point_system_id
+        LIMIT 1
+        """
+    )
+    point_system = cursor.fetchone()
+    cursor.execute(
+        """
+        INSERT INTO show (year_id, point_system_id, show_name, short_name, status, dtf)
+        VALUES ((SELECT MAX(id) FROM year), %s, 'Analytics benchmark', 'bench', 'full', 1)
+        RETURNING id
+        """,
+        (point_system["point_system_id"],),
+    )
+    show_id = cursor.fetchone()["id"]
+
+    cursor.execute("SELECT id FROM country ORDER BY id")
+    countries = [row["id"] for row in cursor.fetchall()]
+    cursor.execute(
+        """
+        INSERT INTO song (submitter_id, country_id, year_id, title, artist, is_placeholder)
+        SELECT submitter.id, country.id, (SELECT MAX(id) FROM year),
+            'Benchmark ' || submitter.n, 'Artist', false
+        FROM unnest(%s::bigint[]) WITH ORDINALITY AS submitter(id, n)
+        JOIN unnest(%s::text[]) WITH ORDINALITY AS country(id, n)
+            ON country.n = (submitter.n - 1) %% %s + 1
+        RETURNING id, submitter_id
+        """,
+        (voter_ids[:SONGS], countries, len(countries)),
+    )
+    songs = cursor.fetchall()
+    cursor.execute(
+        """
+        INSERT INTO song_show (song_id, show_id, running_order)
+        SELECT song_id, %s, n FROM unnest(%s::bigint[]) WITH ORDINALITY AS song(song_id, n)
+        """,
+        (show_id, [song["id"] for song in songs]),
+    )
+
+    rng = random.Random(voters)
+    vote_sets = []
+    for voter_id in voter_ids:
+        choices = [song["id"] for song in songs if song["submitter_id"] != voter_id]
+        ranked = rng.sample(choices, len(point_system["scores"]))
+        vote_sets.append((voter_id, dict(zip(point_system["scores"], ranked, strict=True))))
+    cursor.execute(
+        """
+        INSERT INTO vote_set (voter_id, show_id, result_mode)
+        SELECT voter_id, %s, 'official' FROM unnest(%s::bigint[]) AS voter_id
+        RETURNING id, voter_id
+        """,
+        (show_id, voter_ids),
+    )
+    set_ids = {row["voter_id"]: row["id"] for row in cursor.fetchall()}
+    rows = [
+        (set_ids[voter_id], song_id, score)
+        for voter_id, ballot in vote_sets
+        for score, song_id in ballot.items()
+    ]
+    with cursor.copy("COPY vote (vote_set_id, song_id, score) FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+    return show_id
+
+
+def cache_rows(cursor, show_id: int) -> dict[str, list[dict]]:
+    rows = {}
+    for table in CACHE_TABLES:
+        cursor.execute(
+            f"SELECT * FROM {table} WHERE show_id = %s ORDER BY 1, 2, 3, 4, 5", (show_id,)
+        )
+        rows[table] = cursor.fetchall()
+    return rows
+
+
+def best_of(rebuild) -> float:
+    timings = []
+    for _ in range(ROUNDS):
+        started_at = time.perf_counter()
+        rebuild()
+        timings.append(time.perf_counter() - started_at)
+    return min(timings)
+
+
+def benchmark(voters: int) -> None:
+    db = get_db()
+    with db.transaction(force_rollback=True), db.cursor() as cursor:
+        show_id = create_show(cursor, voters)
+
+        def rebuild_sql():
+            cursor.execute("SELECT refresh_analytics_show_cache(%s, 'official')", (show_id,))
+
+        def rebuild_numpy():
+            analytics_engine.refresh_show_cache(cursor, show_id, "official")
+
+        sql_time = best_of(rebuild_sql)
+        expected = cache_rows(cursor, show_id)
+        numpy_time = best_of(rebuild_numpy)
+        if cache_rows(cursor, show_id) != expected:
+            raise SystemExit(f"{voters} voters: the NumPy rebuild differs from SQL")
+
+    pairs = len(expected["taste_similarity_show_cache"])
+    print(
+        f"{voters:>6} voters {pairs:>8} pairs   "
+        f"sql {sql_time * 1000:>9.1f} ms   numpy {numpy_time * 1000:>9.1f} ms   "
+        f"x{sql_time / numpy_time:.1f}"
+    )
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or [50, 200, 1000]
+    app = create_app()
+    with app.app_context():
+        for voters in sizes:
+            benchmark(voters)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Time the suspenseful reveal order on synthetic shows.
+
+The reveal order is computed when the scoreboard is opened, so it has to
+stay fast enough for the largest shows. No database is needed: each show
+is a seeded set of random ballots over 40 entries.
+
+Usage: benchmark_sequencer.py [VOTERS ...]   (default: 50 200 500)
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from world_stage.utils import SuspensefulVoteSequencer
+
+SONGS = 40
+ROUNDS = 5
+POINTS = [12, 10, 8, 7, 6, 5, 4, 3, 2, 1]
+
+
+def synthetic_show(voters: int) -> tuple[dict[str, dict[int, int]], list[SimpleNamespace]]:
+    rng = random.Random(voters)
+    songs = [SimpleNamespace(id=n, submitter=f"voter{n}") for n in range(SONGS)]
+    votes = {}
+    for n in range(voters):
+        user = f"voter{n}"
+        choices = [song.id for song in songs if song.submitter != user]
+        votes[user] = dict(zip(POINTS, rng.sample(choices, len(POINTS)), strict=True))
+    return votes, songs
+
+
+def benchmark(voters: int) -> None:
+    votes, songs = synthetic_show(voters)
+    timings = []
+    for _ in range(ROUNDS):
+        started_at = time.perf_counter()
+        SuspensefulVoteSequencer(votes, songs, POINTS, seed=voters).get_order()
+        timings.append(time.perf_counter() - started_at)
+    print(f"{voters:>6} voters   {min(timings) * 1000:>9.1f} ms")
+
+
+def main() -> None:
+    for voters in [int(arg) for arg in sys.argv[1:]] or [50, 200, 500]:
+        benchmark(voters)
+
+
+if __name__ == "__main__":
+    main()
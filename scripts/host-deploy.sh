@@ -4,6 +4,11 @@ set -euo pipefail
 WHEEL="${1:?Usage: deploy.sh path/to/wheel.whl}"
 VENV="/opt/worldstage/venv"
 
+# Background workers supervised by systemd. Their units ship in
+# scripts/systemd and are staged next to the wheel.
+STAGE_DIR="$(dirname "$WHEEL")"
+WORKERS=(worldstage-scrobble-worker.service worldstage-probe-worker.service)
+
 # Make sure the service user can read the wheel.
 chmod 644 "$WHEEL"
 
@@ -16,5 +21,14 @@ sudo systemctl start worldstage-migrate.service
 # Graceful reload: new workers start, old ones finish in-flight requests.
 sudo systemctl reload worldstage.service
 
+# Queue workers pick up where the old release left off: rows are leased,
+# so a restart mid-batch only delays them.
+for unit in "${WORKERS[@]}"; do
+    sudo install -m 0644 "$STAGE_DIR/$unit" "/etc/systemd/system/$unit"
+done
+sudo systemctl daemon-reload
+sudo systemctl enable "${WORKERS[@]}"
+sudo systemctl restart "${WORKERS[@]}"
+
 echo "Deployed $WHEEL"
-sudo systemctl status worldstage.service --no-pager
+sudo systemctl status worldstage.service "${WORKERS[@]}" --no-pager
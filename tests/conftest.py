@@ -228,6 +228,8 @@ def _clean_songs(_seeded_db):
         cur.execute("DELETE FROM vote_set")
         cur.execute("DELETE FROM country_show_results")
         cur.execute("DELETE FROM country_year_results")
+        cur.execute("DELETE FROM show_result_refresh_request")
+        cur.execute("DELETE FROM show_result_refresh_state")
         cur.execute("DELETE FROM song_show")
         cur.execute("DELETE FROM song_language")
         cur.execute("DELETE FROM song_key_signature")
@@ -235,5 +237,6 @@ def _clean_songs(_seeded_db):
         cur.execute("DELETE FROM song_subgenre")
         cur.execute("DELETE FROM song_audit_log")
         cur.execute("DELETE FROM song")
+        cur.execute("DELETE FROM media_probe_cache")
     conn.commit()
     conn.close()
@@ -2,6 +2,10 @@
 
 from decimal import Decimal
 
+import pytest
+
+from world_stage.utils import write_ballot
+
 
 def _insert_ballot(cursor, voter_id, show_id, mode, scores):
     cursor.execute(
@@ -246,3 +250,409 @@ def test_bias_caches_refresh_on_publication_revotes_and_metadata_changes(db):
         ):
             cursor.execute(f"SELECT COUNT(*) AS count FROM {table} WHERE show_id = %s", (show_id,))
             assert cursor.fetchone()["count"] == 0
+
+
+def test_vote_writes_queue_each_show_once_per_statement(db):
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT tgname
+            FROM pg_trigger
+            WHERE tgrelid = 'vote'::regclass
+              AND tgname LIKE 'trg_queue_%%'
+              AND tgtype & 1 = 1
+            """
+        )
+        assert cursor.fetchall() == [], "vote refresh triggers must be per statement"
+
+        cursor.execute("INSERT INTO show_status (name) VALUES ('full') ON CONFLICT DO NOTHING")
+        cursor.execute(
+            """
+            INSERT INTO show (year_id, point_system_id, show_name, short_name, status, dtf)
+            VALUES (2024, (SELECT MIN(id) FROM point_system), 'Queue test', 'queue', 'full', 1)
+            RETURNING id
+            """
+        )
+        show_id = cursor.fetchone()["id"]
+        cursor.execute(
+            """
+            INSERT INTO song (
+                submitter_id, country_id, year_id, entry_number, title, artist, is_placeholder
+            )
+            SELECT 1, 'US', 2024, n, 'Queue entry ' || n, 'Artist', false
+            FROM generate_series(1, 3) AS n
+            RETURNING id
+            """
+        )
+        song_ids = [row["id"] for row in cursor.fetchall()]
+        cursor.execute(
+            """
+            INSERT INTO vote_set (voter_id, show_id, result_mode)
+            VALUES (2, %(show)s, 'official'), (3, %(show)s, 'revote')
+            RETURNING id
+            """,
+            {"show": show_id},
+        )
+        vote_set_ids = [row["id"] for row in cursor.fetchall()]
+        cursor.execute("DELETE FROM show_result_refresh_queue WHERE show_id = %s", (show_id,))
+        cursor.execute("DELETE FROM analytics_show_refresh_queue WHERE show_id = %s", (show_id,))
+
+        # Both ballots in one statement: an official change also queues the
+        # revote view, since Revoting has begun for this show.
+        cursor.execute(
+            """
+            INSERT INTO vote (vote_set_id, song_id, score)
+            SELECT vote_set_id, song_id, 12
+            FROM unnest(%s::bigint[]) AS vote_set_id
+            CROSS JOIN unnest(%s::bigint[]) AS song_id
+            """,
+            (vote_set_ids, song_ids),
+        )
+        assert _rows(
+            cursor,
+            "SELECT result_mode FROM show_result_refresh_queue WHERE show_id = %s ORDER BY 1",
+            (show_id,),
+        ) == [{"result_mode": "official"}, {"result_mode": "revote"}]
+        assert _rows(
+            cursor,
+            "SELECT ballot_mode FROM analytics_show_refresh_queue WHERE show_id = %s ORDER BY 1",
+            (show_id,),
+        ) == [{"ballot_mode": "effective"}, {"ballot_mode": "official"}]
+    db.rollback()
+
+
+def _cache_rows(cursor, show_id):
+    return {
+        table: _rows(
+            cursor,
+            f"SELECT * FROM {table} WHERE show_id = %s ORDER BY 1, 2, 3, 4, 5",
+            (show_id,),
+        )
+        for table in (
+            "taste_similarity_show_cache",
+            "country_bias_show_cache",
+            "submitter_bias_show_cache",
+        )
+    }
+
+
+def test_ballot_edits_refresh_only_the_changed_voter_and_match_a_full_rebuild(db):
+    with db.cursor() as cursor:
+        cursor.execute("INSERT INTO show_status (name) VALUES ('full') ON CONFLICT DO NOTHING")
+        cursor.execute(
+            """
+            INSERT INTO show (year_id, point_system_id, show_name, short_name, status, dtf)
+            VALUES (2024, (SELECT MIN(id) FROM point_system), 'Delta test', 'delta', 'full', 1)
+            RETURNING id
+            """
+        )
+        show_id = cursor.fetchone()["id"]
+        songs = {}
+        for submitter_id, country_id in ((1, "US"), (2, "ES"), (3, "FR")):
+            cursor.execute(
+                """
+                INSERT INTO song (submitter_id, country_id, year_id, title, artist, is_placeholder)
+                VALUES (%s, %s, 2024, %s, 'Artist', false)
+                RETURNING id
+                """,
+                (submitter_id, country_id, f"Delta {country_id}"),
+            )
+            songs[country_id] = cursor.fetchone()["id"]
+            cursor.execute(
+                "INSERT INTO song_show (song_id, show_id, running_order) VALUES (%s, %s, %s)",
+                (songs[country_id], show_id, len(songs)),
+            )
+
+        write_ballot(cursor, voter_id=1, show_id=show_id, votes={12: songs["ES"], 10: songs["FR"]})
+        write_ballot(cursor, voter_id=2, show_id=show_id, votes={12: songs["FR"], 10: songs["US"]})
+        write_ballot(cursor, voter_id=3, show_id=show_id, votes={12: songs["US"], 10: songs["ES"]})
+        write_ballot(
+            cursor,
+            voter_id=3,
+            show_id=show_id,
+            votes={12: songs["ES"], 10: songs["US"]},
+            result_mode="revote",
+        )
+    db.commit()
+
+    with db.cursor() as cursor:
+        write_ballot(cursor, voter_id=2, show_id=show_id, votes={12: songs["US"], 10: songs["FR"]})
+        assert _rows(
+            cursor,
+            """
+            SELECT ballot_mode, full_rebuild FROM analytics_show_refresh_queue
+            WHERE show_id = %s ORDER BY 1
+            """,
+            (show_id,),
+        ) == [
+            {"ballot_mode": "effective", "full_rebuild": False},
+            {"ballot_mode": "official", "full_rebuild": False},
+        ]
+        assert _rows(
+            cursor,
+            """
+            SELECT ballot_mode, voter_id FROM analytics_voter_refresh_queue
+            WHERE show_id = %s ORDER BY 1
+            """,
+            (show_id,),
+        ) == [
+            {"ballot_mode": "effective", "voter_id": 2},
+            {"ballot_mode": "official", "voter_id": 2},
+        ]
+    db.commit()
+
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS count FROM analytics_voter_refresh_queue")
+        assert cursor.fetchone()["count"] == 0
+        incremental = _cache_rows(cursor, show_id)
+        assert incremental["taste_similarity_show_cache"]
+
+        cursor.execute("SELECT refresh_analytics_show_cache(%s, 'official')", (show_id,))
+        cursor.execute("SELECT refresh_analytics_show_cache(%s, 'effective')", (show_id,))
+        assert _cache_rows(cursor, show_id) == incremental
+    db.rollback()
+
+
+def test_rebuild_analytics_restores_every_show_and_resumes(app, db):
+    with db.cursor() as cursor:
+        cursor.execute("INSERT INTO show_status (name) VALUES ('full') ON CONFLICT DO NOTHING")
+        cursor.execute(
+            """
+            INSERT INTO show (year_id, point_system_id, show_name, short_name, status, dtf)
+            VALUES (2024, (SELECT MIN(id) FROM point_system), 'Rebuild test', 'rebuild', 'full', 1)
+            RETURNING id
+            """
+        )
+        show_id = cursor.fetchone()["id"]
+        songs = {}
+        for submitter_id, country_id in ((1, "US"), (2, "ES"), (3, "FR")):
+            cursor.execute(
+                """
+                INSERT INTO song (submitter_id, country_id, year_id, title, artist, is_placeholder)
+                VALUES (%s, %s, 2024, %s, 'Artist', false)
+                RETURNING id
+                """,
+                (submitter_id, country_id, f"Rebuild {country_id}"),
+            )
+            songs[country_id] = cursor.fetchone()["id"]
+            cursor.execute(
+                "INSERT INTO song_show (song_id, show_id, running_order) VALUES (%s, %s, %s)",
+                (songs[country_id], show_id, len(songs)),
+            )
+        write_ballot(cursor, voter_id=1, show_id=show_id, votes={12: songs["ES"], 10: songs["FR"]})
+        write_ballot(cursor, voter_id=2, show_id=show_id, votes={12: songs["FR"], 10: songs["US"]})
+        write_ballot(cursor, voter_id=3, show_id=show_id, votes={12: songs["US"], 10: songs["ES"]})
+    db.commit()
+
+    with db.cursor() as cursor:
+        expected = _cache_rows(cursor, show_id)
+        assert expected["country_bias_show_cache"]
+        for table in expected:
+            cursor.execute(f"DELETE FROM {table} WHERE show_id = %s", (show_id,))
+    db.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["rebuild-analytics", "--workers", "2"])
+    assert result.exit_code == 0, result.output
+    assert f"show {show_id} (2024 rebuild) official:" in result.output
+    assert f"show {show_id} (2024 rebuild) effective:" in result.output
+    assert ", 0 failed." in result.output
+
+    with db.cursor() as cursor:
+        assert _cache_rows(cursor, show_id) == expected
+        assert _rows(
+            cursor,
+            """
+            SELECT ballot_mode FROM analytics_rebuild_checkpoint
+            WHERE show_id = %s ORDER BY 1
+            """,
+            (show_id,),
+        ) == [{"ballot_mode": "effective"}, {"ballot_mode": "official"}]
+    db.commit()
+
+    result = runner.invoke(args=["rebuild-analytics", "--resume"])
+    assert result.exit_code == 0, result.output
+    assert "Nothing to rebuild." in result.output
+
+
+def test_numpy_engine_writes_the_same_rows_as_sql(db):
+    pytest.importorskip("numpy")
+    from world_stage import analytics_engine
+
+    with db.cursor() as cursor:
+        cursor.execute("INSERT INTO show_status (name) VALUES ('full') ON CONFLICT DO NOTHING")
+        cursor.execute(
+            """
+            INSERT INTO show (year_id, point_system_id, show_name, short_name, status, dtf)
+            VALUES (2024, (SELECT MIN(id) FROM point_system), 'Engine test', 'engine', 'full', 1)
+            RETURNING id
+            """
+        )
+        show_id = cursor.fetchone()["id"]
+        songs = {}
+        for submitter_id, country_id, entry_number in (
+            (1, "US", 1),
+            (2, "ES", 1),
+            (3, "FR", 1),
+            (None, "US", 2),
+        ):
+            cursor.execute(
+                """
+                INSERT INTO song (
+                    submitter_id, country_id, year_id, entry_number, title, artist,
+                    is_placeholder
+                )
+                VALUES (%s, %s, 2024, %s, 'Engine entry', 'Artist', false)
+                RETURNING id
+                """,
+                (submitter_id, country_id, entry_number),
+            )
+            songs[submitter_id] = cursor.fetchone()["id"]
+            cursor.execute(
+                "INSERT INTO song_show (song_id, show_id, running_order) VALUES (%s, %s, %s)",
+                (songs[submitter_id], show_id, len(songs)),
+            )
+        write_ballot(cursor, voter_id=1, show_id=show_id, votes={12: songs[2], 10: songs[None]})
+        write_ballot(cursor, voter_id=2, show_id=show_id, votes={12: songs[None], 10: songs[1]})
+        write_ballot(cursor, voter_id=3, show_id=show_id, votes={12: songs[1], 10: songs[2]})
+        write_ballot(
+            cursor,
+            voter_id=3,
+            show_id=show_id,
+            votes={12: songs[None], 10: songs[1]},
+            result_mode="revote",
+        )
+        cursor.execute("SELECT refresh_analytics_show_cache(%s, 'official')", (show_id,))
+        cursor.execute("SELECT refresh_analytics_show_cache(%s, 'effective')", (show_id,))
+        expected = _cache_rows(cursor, show_id)
+        assert expected["taste_similarity_show_cache"]
+
+        analytics_engine.refresh_show_cache(cursor, show_id, "official")
+        analytics_engine.refresh_show_cache(cursor, show_id, "effective")
+        assert _cache_rows(cursor, show_id) == expected
+    db.rollback()
+
+
+@pytest.fixture()
+def summary_show(db):
+    """A committed 2024 final with its own two-place point system, removed
+    again afterwards so later tests still see the seeded ids."""
+    with db.cursor() as cursor:
+        cursor.execute("INSERT INTO show_status (name) VALUES ('full') ON CONFLICT DO NOTHING")
+        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 AS id FROM point_system")
+        point_system_id = cursor.fetchone()["id"]
+        cursor.execute("INSERT INTO point_system (id, number) VALUES (%s, 2)", (point_system_id,))
+        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 AS id FROM point")
+        first_point_id = cursor.fetchone()["id"]
+        cursor.executemany(
+            "INSERT INTO point (id, point_system_id, place, score) VALUES (%s, %s, %s, %s)",
+            [
+                (first_point_id, point_system_id, 1, 12),
+                (first_point_id + 1, point_system_id, 2, 10),
+            ],
+        )
+        cursor.execute(
+            """
+            INSERT INTO show (year_id, point_system_id, show_name, short_name, status, dtf)
+            VALUES (2024, %s, 'Summary test', 'f', 'full', 1)
+            RETURNING id
+            """,
+            (point_system_id,),
+        )
+        show_id = cursor.fetchone()["id"]
+    db.commit()
+
+    yield show_id
+
+    db.rollback()
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            DELETE FROM vote USING vote_set
+            WHERE vote.vote_set_id = vote_set.id AND vote_set.show_id = %s
+            """,
+            (show_id,),
+        )
+        cursor.execute("DELETE FROM vote_set WHERE show_id = %s", (show_id,))
+        cursor.execute("DELETE FROM song_show WHERE show_id = %s", (show_id,))
+        cursor.execute("DELETE FROM country_show_results WHERE show_id = %s", (show_id,))
+        cursor.execute("DELETE FROM show WHERE id = %s", (show_id,))
+        cursor.execute("DELETE FROM point WHERE point_system_id = %s", (point_system_id,))
+        cursor.execute("DELETE FROM point_system WHERE id = %s", (point_system_id,))
+    db.commit()
+
+
+def test_voter_vote_summary_follows_ballots_and_feeds_the_votes_page(client, db, summary_show):
+    show_id = summary_show
+    with db.cursor() as cursor:
+        songs = {}
+        for submitter_id, country_id in ((1, "US"), (3, "ES"), (3, "FR")):
+            cursor.execute(
+                """
+                INSERT INTO song (submitter_id, country_id, year_id, title, artist, is_placeholder)
+                VALUES (%s, %s, 2024, %s, 'Artist', false)
+                RETURNING id
+                """,
+                (submitter_id, country_id, f"Summary {country_id}"),
+            )
+            songs[country_id] = cursor.fetchone()["id"]
+            cursor.execute(
+                "INSERT INTO song_show (song_id, show_id, running_order) VALUES (%s, %s, %s)",
+                (songs[country_id], show_id, len(songs)),
+            )
+        write_ballot(cursor, voter_id=2, show_id=show_id, votes={12: songs["ES"], 10: songs["US"]})
+    db.commit()
+
+    summary_query = """
+        SELECT country_id, score, place, show_max FROM voter_vote_summary
+        WHERE voter_id = 2 AND show_id = %s AND result_mode = %s
+        ORDER BY country_id
+    """
+    with db.cursor() as cursor:
+        assert _rows(cursor, summary_query, (show_id, "official")) == [
+            {"country_id": "ES", "score": 12, "place": 1, "show_max": 12},
+            {"country_id": "FR", "score": None, "place": None, "show_max": 12},
+            {"country_id": "US", "score": 10, "place": 2, "show_max": 12},
+        ]
+        # Without a Revote ballot the revote view falls back to the official one.
+        assert _rows(cursor, summary_query, (show_id, "revote")) == _rows(
+            cursor, summary_query, (show_id, "official")
+        )
+
+        write_ballot(
+            cursor,
+            voter_id=2,
+            show_id=show_id,
+            votes={12: songs["FR"], 10: songs["ES"]},
+            result_mode="revote",
+        )
+    db.commit()
+
+    with db.cursor() as cursor:
+        assert [row["score"] for row in _rows(cursor, summary_query, (show_id, "revote"))] == [
+            10, 12, None,
+        ]
+        assert [row["score"] for row in _rows(cursor, summary_query, (show_id, "official"))] == [
+            12, None, 10,
+        ]
+
+    response = client.get("/user/bob/votes?view=medals", headers={"Accept": "text/html"})
+    assert response.status_code == 200
+    assert b"Spain" in response.data
+    assert b"United States" in response.data
+
+    response = client.get("/user/bob/votes?view=user&user=3", headers={"Accept": "text/html"})
+    assert response.status_code == 200
+    assert b"Summary ES" in response.data
+    assert b"Summary FR" in response.data
+
+    with db.cursor() as cursor:
+        cursor.execute("INSERT INTO show_status (name) VALUES ('draw') ON CONFLICT DO NOTHING")
+        cursor.execute("UPDATE show SET status = 'draw' WHERE id = %s", (show_id,))
+    db.commit()
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) AS count FROM voter_vote_summary WHERE show_id = %s", (show_id,)
+        )
+        assert cursor.fetchone()["count"] == 0
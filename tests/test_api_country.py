@@ -1,5 +1,6 @@
 """Tests for the /api/country endpoints."""
 
+from world_stage import media
 
 
 def _result(resp):
@@ -170,10 +171,11 @@ class TestCountrySongs:
         assert "subgenres" in song
 
     def test_song_list_includes_newer_song_fields(
-        self, client, db, alice_headers, monkeypatch
+        self, app, client, db, alice_headers, monkeypatch
     ):
         _seed_genres(db)
         monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 123.5)
+        monkeypatch.setattr("world_stage.media.head_validators", lambda url: None)
         client.post(
             "/api/song",
             json={
@@ -196,6 +198,9 @@ class TestCountrySongs:
             headers=alice_headers,
         )
 
+        with app.app_context():
+            media.drain_probes()
+
         resp = client.get("/api/country/US/songs")
         assert resp.status_code == 200
         song = next(row for row in _result(resp) if row["title"] == "Expanded")
@@ -1,5 +1,9 @@
 """Tests for published show results API endpoints."""
 
+from world_stage import create_app, results
+from world_stage.db import get_db, migrate_db
+from world_stage.utils import write_ballot
+
 
 def _result(response):
     return response.get_json()["result"]
@@ -140,3 +144,189 @@ class TestResultsApi:
         with db.cursor() as cursor:
             cursor.execute("UPDATE year SET status = 'closed' WHERE id = 2024")
         db.commit()
+
+
+def test_async_refresh_leaves_results_to_the_worker(app, client, db):
+    with db.cursor() as cursor:
+        cursor.execute("SELECT set_config('world_stage.result_refresh', 'async', false)")
+    _seed_results_show(db)
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT COUNT(*) AS count
+            FROM country_show_results JOIN show ON show.id = country_show_results.show_id
+            WHERE show.short_name = 'r'
+            """
+        )
+        assert cursor.fetchone()['count'] == 0
+        cursor.execute("SELECT COUNT(*) AS count FROM show_result_refresh_request")
+        assert cursor.fetchone()['count'] > 0
+    db.commit()
+
+    with app.app_context():
+        assert results.drain_refreshes(debounce=0) == (1, None)
+        # Within the debounce window a new request waits for the next round.
+        with db.cursor() as cursor:
+            cursor.execute("UPDATE vote SET score = score WHERE score = 12")
+        db.commit()
+        refreshed, wait = results.drain_refreshes(debounce=60)
+        assert refreshed == 0
+        assert 0 < wait <= 60
+
+    response = client.get('/api/results/2024-r')
+    assert [(entry['country_id'], entry['place']) for entry in _result(response)['entries']] == [
+        ('US', 1),
+        ('ES', 2),
+    ]
+
+
+def test_async_refresh_is_scoped_to_requests(_seeded_db):
+    app = create_app(
+        {"TESTING": True, "LOCAL_ASSETS": True, "DATABASE_URI": _seeded_db,
+         "ASYNC_RESULT_REFRESH": True}
+    )
+    setting = "SELECT current_setting('world_stage.result_refresh', true) AS mode"
+    with app.test_request_context():
+        assert get_db().execute(setting).fetchone()['mode'] == 'async'
+    # The pool hands the same connection back, reset for CLI use.
+    with app.app_context():
+        assert get_db().execute(setting).fetchone()['mode'] in (None, '', 'sync')
+    app.config["DB_POOL"].close()
+
+
+def test_migrations_refresh_results_synchronously_under_async_refresh(_seeded_db, db, tmp_path):
+    _seed_results_show(db)
+    app = create_app(
+        {"TESTING": True, "LOCAL_ASSETS": True, "DATABASE_URI": _seeded_db,
+         "ASYNC_RESULT_REFRESH": True}
+    )
+    app.instance_path = str(tmp_path)
+    (tmp_path / "migrations").mkdir()
+    (tmp_path / "migrations" / "99991231000000_swap_results_scores.sql").write_text(
+        """
+        UPDATE vote SET score = 22 - score
+        FROM vote_set JOIN show ON show.id = vote_set.show_id
+        WHERE vote.vote_set_id = vote_set.id
+          AND show.year_id = 2024 AND show.short_name = 'r';
+        """
+    )
+    with app.app_context():
+        assert migrate_db() == ["99991231000000_swap_results_scores"]
+
+    with db.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) AS count FROM show_result_refresh_request")
+        assert cursor.fetchone()['count'] == 0
+        cursor.execute(
+            """
+            SELECT song.country_id
+            FROM country_show_results
+            JOIN show ON show.id = country_show_results.show_id
+            JOIN song ON song.id = country_show_results.song_id
+            WHERE show.short_name = 'r' AND country_show_results.result_mode = 'official'
+            ORDER BY country_show_results.place
+            """
+        )
+        assert [row['country_id'] for row in cursor.fetchall()] == ['ES', 'US']
+    db.commit()
+
+
+def test_ballot_edits_apply_incrementally_and_match_a_full_rebuild(db):
+    _seed_results_show(db)
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT show.id AS show_id, song.country_id, song.id AS song_id
+            FROM show
+            JOIN song_show ON song_show.show_id = show.id
+            JOIN song ON song.id = song_show.song_id
+            WHERE show.year_id = 2024 AND show.short_name = 'r'
+            """
+        )
+        rows = cursor.fetchall()
+        show_id = rows[0]['show_id']
+        songs = {row['country_id']: row['song_id'] for row in rows}
+
+        # Bob changes his mind, and Carol's Revote ballot agrees with him.
+        write_ballot(cursor, voter_id=2, show_id=show_id, votes={12: songs['ES'], 10: songs['US']})
+        write_ballot(
+            cursor,
+            voter_id=3,
+            show_id=show_id,
+            votes={12: songs['ES'], 10: songs['US']},
+            result_mode='revote',
+        )
+    db.commit()
+
+    with db.cursor() as cursor:
+        assert _rows_by_country(cursor, show_id, 'official') == {'ES': (1, 12), 'US': (2, 10)}
+        assert _rows_by_country(cursor, show_id, 'revote') == {'ES': (1, 24), 'US': (2, 20)}
+        cursor.execute("SELECT COUNT(*) AS count FROM show_result_delta")
+        assert cursor.fetchone()['count'] == 0
+
+        # An edit on top of materialized rows takes the delta path.
+        write_ballot(cursor, voter_id=2, show_id=show_id, votes={12: songs['US'], 10: songs['ES']})
+        cursor.execute("SELECT rerank_show_results(%s, 'official') AS reranked", (show_id,))
+        assert cursor.fetchone()['reranked']
+        assert _rows_by_country(cursor, show_id, 'official') == {'US': (1, 12), 'ES': (2, 10)}
+        assert results.check_show_results(cursor, show_id, 'official') == []
+        assert results.check_show_results(cursor, show_id, 'revote') == []
+
+
+def test_first_revote_ballot_after_the_last_was_deleted_rebuilds_revote_results(db):
+    _seed_results_show(db)
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT show.id AS show_id, song.country_id, song.id AS song_id
+            FROM show
+            JOIN song_show ON song_show.show_id = show.id
+            JOIN song ON song.id = song_show.song_id
+            WHERE show.year_id = 2024 AND show.short_name = 'r'
+            """
+        )
+        rows = cursor.fetchall()
+        show_id = rows[0]['show_id']
+        songs = {row['country_id']: row['song_id'] for row in rows}
+        carol, _ = write_ballot(
+            cursor,
+            voter_id=3,
+            show_id=show_id,
+            votes={12: songs['ES'], 10: songs['US']},
+            result_mode='revote',
+        )
+    db.commit()
+
+    with db.cursor() as cursor:
+        cursor.execute("DELETE FROM vote WHERE vote_set_id = %s", (carol,))
+        cursor.execute("DELETE FROM vote_set WHERE id = %s", (carol,))
+    db.commit()
+
+    # With no Revote ballot left, Bob's change doesn't reach the revote rows.
+    with db.cursor() as cursor:
+        write_ballot(cursor, voter_id=2, show_id=show_id, votes={12: songs['ES'], 10: songs['US']})
+    db.commit()
+
+    with db.cursor() as cursor:
+        write_ballot(
+            cursor,
+            voter_id=3,
+            show_id=show_id,
+            votes={12: songs['US'], 10: songs['ES']},
+            result_mode='revote',
+        )
+    db.commit()
+
+    with db.cursor() as cursor:
+        assert results.check_show_results(cursor, show_id, 'revote') == []
+
+
+def _rows_by_country(cursor, show_id, result_mode):
+    cursor.execute(
+        """
+        SELECT country_id, place, total_points FROM country_show_results
+        WHERE show_id = %s AND result_mode = %s
+        """,
+        (show_id, result_mode),
+    )
+    return {row['country_id']: (row['place'], row['total_points']) for row in cursor.fetchall()}
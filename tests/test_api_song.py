@@ -1,7 +1,13 @@
 """Tests for the /api/song endpoints."""
 
+import http.server
+import threading
 
+import pytest
+from psycopg.pq import TransactionStatus
 
+from world_stage import media
+from world_stage.db import get_db
 
 # ── helpers ─────────────────────────────────────────────────────────
 
@@ -323,29 +329,77 @@ class TestSongDuration:
 
     MEDIA_LINK = "https://media.world-stage.org/ws2025us.mp4"
 
+    @pytest.fixture(autouse=True)
+    def validators(self, monkeypatch):
+        """What HEAD reports for MEDIA_LINK; None keeps the probe cache out
+        of play (and the tests off the network)."""
+        state = {"current": None}
+        monkeypatch.setattr("world_stage.media.head_validators", lambda url: state["current"])
+        return state
+
     def _stored_duration(self, db, song_id):
         with db.cursor() as cur:
             cur.execute("SELECT duration FROM song WHERE id = %s", (song_id,))
             return cur.fetchone()["duration"]
 
-    def test_create_with_media_link_probes_duration(
-        self, client, db, bob_headers, monkeypatch
+    def _pending(self, db, song_id):
+        with db.cursor() as cur:
+            cur.execute(
+                "SELECT video_link FROM duration_probe_queue WHERE song_id = %s", (song_id,)
+            )
+            row = cur.fetchone()
+            return row and row["video_link"]
+
+    def _drain(self, app):
+        with app.app_context():
+            return media.drain_probes()
+
+    def test_create_with_media_link_queues_probe(
+        self, app, client, db, bob_headers, monkeypatch
     ):
+        def boom(url):
+            raise AssertionError("song writes must not probe inline")
+
+        monkeypatch.setattr("world_stage.media.probe_duration", boom)
+        song_id = _result(_create_song(client, bob_headers, video_link=self.MEDIA_LINK))["id"]
+        assert self._stored_duration(db, song_id) is None
+        assert self._pending(db, song_id) == self.MEDIA_LINK
+
         monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 187.5)
+        assert self._drain(app) == 1
+        assert self._stored_duration(db, song_id) == 187.5
+        assert self._pending(db, song_id) is None
+
+    def test_probes_run_outside_a_transaction(
+        self, app, client, db, bob_headers, monkeypatch
+    ):
         song_id = _result(_create_song(client, bob_headers, video_link=self.MEDIA_LINK))["id"]
+        status = []
+
+        def probe(url):
+            status.append(get_db().info.transaction_status)
+            return 187.5
+
+        monkeypatch.setattr("world_stage.media.probe_duration", probe)
+        assert self._drain(app) == 1
+        assert status == [TransactionStatus.IDLE]
         assert self._stored_duration(db, song_id) == 187.5
 
     def test_create_with_external_link_does_not_probe(
-        self, client, db, bob_headers, monkeypatch
+        self, app, client, db, bob_headers, monkeypatch
     ):
         def boom(url):
             raise AssertionError("probe_duration must not be called")
 
         monkeypatch.setattr("world_stage.media.probe_duration", boom)
         song_id = _result(_create_song(client, bob_headers, video_link="http://example.com/x"))["id"]
+        assert self._pending(db, song_id) is None
+        assert self._drain(app) == 0
         assert self._stored_duration(db, song_id) is None
 
-    def test_patch_to_media_link_sets_duration(self, client, db, bob_headers, monkeypatch):
+    def test_patch_to_media_link_sets_duration(
+        self, app, client, db, bob_headers, monkeypatch
+    ):
         song_id = _result(_create_song(client, bob_headers, video_link="http://example.com/x"))["id"]
 
         monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 203.0)
@@ -353,13 +407,15 @@ class TestSongDuration:
             f"/api/song/{song_id}", json={"video_link": self.MEDIA_LINK}, headers=bob_headers
         )
         assert resp.status_code == 200
+        self._drain(app)
         assert self._stored_duration(db, song_id) == 203.0
 
     def test_patch_to_external_link_clears_duration(
-        self, client, db, bob_headers, monkeypatch
+        self, app, client, db, bob_headers, monkeypatch
     ):
         monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 203.0)
         song_id = _result(_create_song(client, bob_headers, video_link=self.MEDIA_LINK))["id"]
+        self._drain(app)
 
         resp = client.patch(
             f"/api/song/{song_id}", json={"video_link": "http://example.com/x"}, headers=bob_headers
@@ -368,23 +424,56 @@ class TestSongDuration:
         assert self._stored_duration(db, song_id) is None
 
     def test_patch_with_unchanged_link_keeps_duration_without_reprobe(
-        self, client, db, bob_headers, monkeypatch
+        self, app, client, db, bob_headers, monkeypatch
     ):
         monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 203.0)
         song_id = _result(_create_song(client, bob_headers, video_link=self.MEDIA_LINK))["id"]
+        self._drain(app)
 
-        def boom(url):
-            raise AssertionError("unchanged link must not re-probe")
-
-        monkeypatch.setattr("world_stage.media.probe_duration", boom)
         resp = client.patch(
             f"/api/song/{song_id}",
             json={"video_link": self.MEDIA_LINK, "notes": "edited"},
             headers=bob_headers,
         )
         assert resp.status_code == 200
+        assert self._pending(db, song_id) is None
         assert self._stored_duration(db, song_id) == 203.0
 
+    def test_probe_of_replaced_link_is_not_stored(
+        self, app, client, db, bob_headers, monkeypatch
+    ):
+        song_id = _result(_create_song(client, bob_headers, video_link=self.MEDIA_LINK))["id"]
+        # The link moves off the media host while the probe is pending.
+        with db.cursor() as cur:
+            cur.execute(
+                "UPDATE song SET video_link = 'http://example.com/x' WHERE id = %s", (song_id,)
+            )
+        db.commit()
+
+        monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 203.0)
+        assert self._drain(app) == 1
+        assert self._stored_duration(db, song_id) is None
+        assert self._pending(db, song_id) is None
+
+    def test_failed_probe_backs_off(self, app, client, db, bob_headers, monkeypatch):
+        monkeypatch.setattr("world_stage.media.probe_duration", lambda url: None)
+        song_id = _result(_create_song(client, bob_headers, video_link=self.MEDIA_LINK))["id"]
+
+        assert self._drain(app) == 1
+        # Rescheduled, so an immediate second pass finds nothing due.
+        assert self._drain(app) == 0
+        assert self._pending(db, song_id) == self.MEDIA_LINK
+
+        with db.cursor() as cur:
+            cur.execute(
+                "UPDATE duration_probe_queue SET attempts = %s, "
+                "next_attempt_at = CURRENT_TIMESTAMP WHERE song_id = %s",
+                (media.PROBE_MAX_ATTEMPTS - 1, song_id),
+            )
+        db.commit()
+        assert self._drain(app) == 1
+        assert self._pending(db, song_id) is None
+
     def test_backfill_command(self, app, db, monkeypatch):
         with db.cursor() as cur:
             cur.execute(
@@ -405,6 +494,34 @@ class TestSongDuration:
         assert "1 updated, 0 failed" in result.output
         assert self._stored_duration(db, song_id) == 154.2
 
+    def test_backfill_all_reuses_probe_while_file_is_unchanged(
+        self, app, client, db, bob_headers, monkeypatch, validators
+    ):
+        validators["current"] = {
+            "etag": '"abc"', "last_modified": None, "content_length": 1000,
+        }
+        monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 154.2)
+        song_id = _result(_create_song(client, bob_headers, video_link=self.MEDIA_LINK))["id"]
+        self._drain(app)
+
+        def boom(url):
+            raise AssertionError("unchanged file must not be re-probed")
+
+        monkeypatch.setattr("world_stage.media.probe_duration", boom)
+        runner = app.test_cli_runner()
+        result = runner.invoke(args=["backfill-durations", "--all"])
+        assert "1 updated, 0 failed" in result.output
+        assert self._stored_duration(db, song_id) == 154.2
+
+        # A replaced file (new ETag) is probed again.
+        validators["current"] = {
+            "etag": '"def"', "last_modified": None, "content_length": 1000,
+        }
+        monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 160.0)
+        result = runner.invoke(args=["backfill-durations", "--all"])
+        assert "1 updated, 0 failed" in result.output
+        assert self._stored_duration(db, song_id) == 160.0
+
     def test_admin_update_duration_endpoint_requires_auth(self, client, db, bob_headers):
         song_id = _result(_create_song(client, bob_headers, video_link=self.MEDIA_LINK))["id"]
         resp = client.post(f"/country/duration/{song_id}")
@@ -417,6 +534,33 @@ class TestSongDuration:
         assert resp.status_code == 400
 
 
+def test_head_validators_reads_headers_from_local_server():
+    class Handler(http.server.BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self.send_response(200)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Last-Modified", "Wed, 01 Jan 2025 00:00:00 GMT")
+            self.send_header("Content-Length", "4096")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.HTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.handle_request, daemon=True)
+    thread.start()
+    try:
+        got = media.head_validators(f"http://127.0.0.1:{server.server_port}/x.mp4")
+    finally:
+        thread.join(5)
+        server.server_close()
+    assert got == {
+        "etag": '"v1"',
+        "last_modified": "Wed, 01 Jan 2025 00:00:00 GMT",
+        "content_length": 4096,
+    }
+
+
 # ── PUT /api/song/<id> ──────────────────────────────────────────────
 
 
@@ -373,6 +373,46 @@ class TestVotingApi:
         response = client.get('/api/voting/2025-f', headers=bob_headers)
         assert _result(response)['ballot']['votes'] == ballot['votes']
 
+    def test_resaving_ballot_only_touches_changed_votes(self, client, db, bob_headers):
+        song_ids = _seed_show_and_songs(db)
+
+        def save(votes):
+            response = client.put(
+                '/api/voting/2025-f',
+                headers=bob_headers,
+                json={'votes': [{'score': s, 'song_id': i} for s, i in votes]},
+            )
+            assert response.status_code == 200
+
+        def stored():
+            with db.cursor() as cursor:
+                cursor.execute(
+                    """
+                    SELECT vote.id, vote.song_id, vote.score
+                    FROM vote
+                    JOIN vote_set ON vote_set.id = vote.vote_set_id
+                    JOIN show ON show.id = vote_set.show_id
+                    WHERE vote_set.voter_id = 2 AND show.short_name = 'f'
+                      AND show.year_id = 2025
+                    """
+                )
+                return {row['song_id']: row for row in cursor.fetchall()}
+
+        save([(12, song_ids[1]), (10, song_ids[2]), (8, song_ids[3])])
+        before = stored()
+        save([(12, song_ids[2]), (10, song_ids[1]), (8, song_ids[3])])
+        after = stored()
+
+        assert {song_id: row['score'] for song_id, row in after.items()} == {
+            song_ids[1]: 10,
+            song_ids[2]: 12,
+            song_ids[3]: 8,
+        }
+        # Rows are updated in place rather than deleted and re-inserted.
+        assert {song_id: row['id'] for song_id, row in after.items()} == {
+            song_id: row['id'] for song_id, row in before.items()
+        }
+
     def test_ballot_rejects_own_song_and_incomplete_scores(self, client, db, bob_headers):
         song_ids = _seed_show_and_songs(db)
         response = client.put(
@@ -1,5 +1,6 @@
 """Tests for the /api/year endpoints."""
 
+from world_stage import media
 
 
 def _result(resp):
@@ -189,10 +190,11 @@ class TestYearSongs:
         assert "subgenres" in song
 
     def test_song_list_includes_newer_song_fields(
-        self, client, db, alice_headers, monkeypatch
+        self, app, client, db, alice_headers, monkeypatch
     ):
         _seed_genres(db)
         monkeypatch.setattr("world_stage.media.probe_duration", lambda url: 123.5)
+        monkeypatch.setattr("world_stage.media.head_validators", lambda url: None)
         client.post(
             "/api/song",
             json={
@@ -215,6 +217,9 @@ class TestYearSongs:
             headers=alice_headers,
         )
 
+        with app.app_context():
+            media.drain_probes()
+
         resp = client.get("/api/year/2025/songs")
         assert resp.status_code == 200
         song = next(row for row in _result(resp) if row["title"] == "Expanded")
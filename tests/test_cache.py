@@ -0,0 +1,667 @@
+"""Per-worker caches and their LISTEN/NOTIFY invalidation."""
+
+import json
+import time
+import uuid
+
+import psycopg
+import pytest
+
+from world_stage import cache
+from world_stage.utils import (
+    auth,
+    get_api_auth,
+    get_country_name,
+    get_session_auth,
+    get_show_id,
+    get_user_id_from_session,
+    get_user_role_from_session,
+    lookups,
+)
+
+
+@pytest.fixture
+def show(db):
+    with db.cursor() as cursor:
+        cursor.execute("INSERT INTO show_status (name) VALUES ('draw') ON CONFLICT DO NOTHING")
+        cursor.execute("INSERT INTO show_status (name) VALUES ('full') ON CONFLICT DO NOTHING")
+        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 AS id FROM point_system")
+        point_system_id = cursor.fetchone()["id"]
+        cursor.execute("INSERT INTO point_system (id, number) VALUES (%s, 2)", (point_system_id,))
+        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 AS id FROM point")
+        point_id = cursor.fetchone()["id"]
+        cursor.executemany(
+            "INSERT INTO point (id, point_system_id, place, score) VALUES (%s, %s, %s, %s)",
+            [(point_id, point_system_id, 1, 12), (point_id + 1, point_system_id, 2, 10)],
+        )
+        short_name = "ct" + uuid.uuid4().hex[:6]
+        cursor.execute(
+            """
+            INSERT INTO show (year_id, point_system_id, show_name, short_name, status, dtf)
+            VALUES (2025, %s, %s, %s, 'draw', 1)
+            RETURNING id
+            """,
+            (point_system_id, f"Cache test {short_name}", short_name),
+        )
+        show_id = cursor.fetchone()["id"]
+    db.commit()
+    return {
+        "id": show_id,
+        "key": f"2025-{short_name}",
+        "point_system_id": point_system_id,
+    }
+
+
+def test_region_evicts_least_recently_used():
+    region = cache.Region(ttl=60, maxsize=2)
+    region.get("a", lambda: 1)
+    region.get("b", lambda: 2)
+    region.get("a", lambda: None)  # touch
+    region.get("c", lambda: 3)
+    assert len(region) == 2
+    # Reloading "b" evicts again, so check the touched key first.
+    assert region.get("a", lambda: "reloaded") == 1
+    assert region.get("b", lambda: "reloaded") == "reloaded"
+
+
+def test_region_expires_entries():
+    region = cache.Region(ttl=0, maxsize=8)
+    region.get("a", lambda: 1)
+    assert region.get("a", lambda: 2) == 2
+
+
+def test_region_drops_values_loaded_across_a_clear():
+    region = cache.Region(ttl=60, maxsize=8)
+
+    def load():
+        region.clear()  # an invalidation lands while the query runs
+        return "stale"
+
+    assert region.get("a", load) == "stale"
+    assert region.get("a", lambda: "fresh") == "fresh"
+
+
+def test_get_show_id_is_memoised_per_request(app, show, monkeypatch):
+    calls = []
+    load = lookups._load_show
+
+    def counting(*args):
+        calls.append(args)
+        return load(*args)
+
+    monkeypatch.setattr(lookups, "_load_show", counting)
+    with app.test_request_context():
+        first = get_show_id(show["key"])
+        assert get_show_id(show["key"]) is first
+        assert first.points == [12, 10]
+    with app.test_request_context():
+        get_show_id(show["key"])
+    # Caching across requests is off under TESTING.
+    assert len(calls) == 2
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def test_show_cache_is_invalidated_by_notify(app, db, show):
+    app.config["PROCESS_CACHE"] = True
+
+    def status():
+        with app.test_request_context():
+            return get_show_id(show["key"]).status
+
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+    assert status() == "draw"
+
+    with app.test_request_context():
+        assert len(cache._bus().region("show")) == 1
+
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE show SET status = 'full' WHERE id = %s", (show["id"],))
+    db.commit()
+    assert _wait_for(lambda: status() == "full")
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "UPDATE point SET score = 8 WHERE point_system_id = %s AND place = 2",
+            (show["point_system_id"],),
+        )
+    db.commit()
+
+    def points():
+        with app.test_request_context():
+            return get_show_id(show["key"]).points
+
+    assert _wait_for(lambda: points() == [12, 8])
+
+
+def test_reference_caches_are_invalidated_by_notify(app, db):
+    app.config["PROCESS_CACHE"] = True
+
+    def name():
+        with app.test_request_context():
+            return get_country_name("FR")
+
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+    assert name() == "France"
+
+    try:
+        with db.cursor() as cursor:
+            cursor.execute("UPDATE country SET name = 'République' WHERE id = 'FR'")
+        db.commit()
+        assert _wait_for(lambda: name() == "République")
+    finally:
+        with db.cursor() as cursor:
+            cursor.execute("UPDATE country SET name = 'France' WHERE id = 'FR'")
+        db.commit()
+    assert _wait_for(lambda: name() == "France")
+
+
+@pytest.fixture
+def session_id(db):
+    sid = str(uuid.uuid4())
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO session (user_id, session_id, expires_at)
+            VALUES (2, %s, CURRENT_TIMESTAMP + INTERVAL '1 day')
+            """,
+            (sid,),
+        )
+    db.commit()
+    yield sid
+    with db.cursor() as cursor:
+        cursor.execute("DELETE FROM session WHERE session_id = %s", (sid,))
+    db.commit()
+
+
+def test_session_auth_is_resolved_once_per_request(app, session_id, monkeypatch):
+    calls = []
+    load = auth._load_session
+
+    def counting(sid):
+        calls.append(sid)
+        return load(sid)
+
+    monkeypatch.setattr(auth, "_load_session", counting)
+    with app.test_request_context(headers={"Cookie": f"session={session_id}"}):
+        assert get_user_id_from_session(session_id) == (2, "bob")
+        assert get_user_role_from_session(session_id).role == "user"
+        assert get_session_auth(session_id)[0] == (2, "bob")
+    assert calls == [session_id]
+
+
+def test_logout_evicts_cached_session(app, client, session_id):
+    app.config["PROCESS_CACHE"] = True
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+
+    def user():
+        with app.test_request_context():
+            return get_user_id_from_session(session_id)
+
+    assert user() == (2, "bob")
+    client.set_cookie("session", session_id)
+    assert client.post("/logout").status_code == 200
+    # Evicted locally straight away, without waiting for the NOTIFY.
+    assert user() is None
+
+
+def test_cached_session_expires(app, db, session_id):
+    app.config["PROCESS_CACHE"] = True
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+    with db.cursor() as cursor:
+        cursor.execute(
+            "UPDATE session SET expires_at = CURRENT_TIMESTAMP + INTERVAL '1 second' "
+            "WHERE session_id = %s",
+            (session_id,),
+        )
+    db.commit()
+
+    def user():
+        with app.test_request_context():
+            return get_user_id_from_session(session_id)
+
+    assert _wait_for(lambda: user() == (2, "bob"))
+    time.sleep(1.1)
+    assert user() is None
+
+
+def test_api_token_resolves_in_one_query_and_coalesces_last_used(app, db, monkeypatch):
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE api_token SET last_used_at = NULL WHERE user_id = 2")
+    db.commit()
+
+    calls = []
+    load = auth._load_api_token
+
+    def counting(token_hash):
+        calls.append(token_hash)
+        return load(token_hash)
+
+    monkeypatch.setattr(auth, "_load_api_token", counting)
+
+    def authenticate():
+        with app.test_request_context(headers={"Authorization": "Bearer token-bob"}):
+            return get_api_auth()
+
+    user_id, username, permissions = authenticate()
+    assert (user_id, username, permissions.role) == (2, "bob", "user")
+    assert len(calls) == 1
+
+    def last_used():
+        with db.cursor() as cursor:
+            cursor.execute("SELECT last_used_at FROM api_token WHERE user_id = 2")
+            return cursor.fetchone()["last_used_at"]
+
+    assert last_used() is not None
+
+    # A second use within the interval doesn't write again.
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE api_token SET last_used_at = NULL WHERE user_id = 2")
+    db.commit()
+    assert authenticate()[0] == 2
+    assert last_used() is None
+
+    # Once the interval has passed, the next write drops the old entries.
+    monkeypatch.setattr(auth, "API_TOKEN_TOUCH_INTERVAL", 0)
+    with app.test_request_context(headers={"Authorization": "Bearer token-alice"}):
+        assert get_api_auth()[0] == 1
+    touched = app.extensions["api_token_touched"]["at"]
+    assert list(touched) == [auth.hash_api_token("token-alice")]
+
+
+def test_api_token_cache_is_invalidated_by_revocation(app, db):
+    app.config["PROCESS_CACHE"] = True
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+
+    def authenticate():
+        with app.test_request_context(headers={"Authorization": "Bearer token-carol"}):
+            return get_api_auth()
+
+    assert authenticate()[0] == 3
+    token_hash = auth.hash_api_token("token-carol")
+    try:
+        with db.cursor() as cursor:
+            cursor.execute("DELETE FROM api_token WHERE token_hash = %s", (token_hash,))
+        db.commit()
+        assert _wait_for(lambda: authenticate() is None)
+    finally:
+        with db.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO api_token (user_id, token_hash, label) VALUES (3, %s, 'test')",
+                (token_hash,),
+            )
+        db.commit()
+
+
+def test_country_page_is_cached_until_its_songs_change(app, client, db, monkeypatch):
+    from world_stage.routes import country
+
+    app.config["PROCESS_CACHE"] = True
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO song (country_id, year_id, submitter_id, artist, title)
+            VALUES ('FR', 2024, 1, 'Cache Artist', 'Cache Song')
+            RETURNING id
+            """
+        )
+        song_id = cursor.fetchone()["id"]
+    db.commit()
+
+    calls = []
+    load = country._load_country_page
+
+    def counting(code):
+        calls.append(code)
+        return load(code)
+
+    monkeypatch.setattr(country, "_load_country_page", counting)
+
+    def page():
+        response = client.get("/country/fr", headers={"Accept": "text/html"})
+        assert response.mimetype == "text/html"
+        return response.get_data(as_text=True)
+
+    def served_from_cache():
+        loads = len(calls)
+        return "Cache Song" in page() and len(calls) == loads
+
+    # The insert's own invalidation can reach the listener after the first
+    # render and drop it, so wait for a read the cache serves.
+    assert _wait_for(lambda: "Cache Song" in page())
+    assert _wait_for(served_from_cache)
+
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE song SET title = 'Renamed Song' WHERE id = %s", (song_id,))
+    db.commit()
+    assert _wait_for(lambda: "Renamed Song" in page())
+
+
+def test_archive_pages_are_served_from_the_render_cache(app, client, db, monkeypatch):
+    from world_stage.routes import country
+
+    app.config["PROCESS_CACHE"] = True
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO song (country_id, year_id, submitter_id, artist, title)
+            VALUES ('ES', 2024, 1, 'Archive Artist', 'Archive Song')
+            RETURNING id
+            """
+        )
+        song_id = cursor.fetchone()["id"]
+    db.commit()
+
+    calls = []
+    load = country.get_song
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return load(*args, **kwargs)
+
+    monkeypatch.setattr(country, "get_song", counting)
+
+    html = {"Accept": "text/html"}
+    first = client.get("/country/es/2024", headers=html)
+    assert first.status_code == 200
+    assert "Archive Song" in first.get_data(as_text=True)
+    etag = first.headers["ETag"]
+    assert not etag.startswith("W/")
+
+    again = client.get("/country/es/2024", headers=html)
+    assert again.get_data() == first.get_data()
+    revalidated = client.get("/country/es/2024", headers={**html, "If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert len(calls) == 1
+
+    # Edits land in song_audit_log, which moves the page to a new key.
+    with db.cursor() as cursor:
+        cursor.execute("UPDATE song SET title = 'Archive Edit' WHERE id = %s", (song_id,))
+    db.commit()
+    edited = client.get("/country/es/2024", headers={**html, "If-None-Match": etag})
+    assert edited.status_code == 200
+    assert "Archive Edit" in edited.get_data(as_text=True)
+    assert len(calls) == 2
+
+
+def test_render_cache_version_is_bumped_per_closed_year(db):
+    def versions():
+        with db.cursor() as cursor:
+            cursor.execute("SELECT year_id, version FROM render_cache_version")
+            return {row["year_id"]: row["version"] for row in cursor.fetchall()}
+
+    with db.cursor() as cursor:
+        song_ids = {}
+        for year in (2024, 2025):
+            cursor.execute(
+                """
+                INSERT INTO song (country_id, year_id, submitter_id, artist, title)
+                VALUES ('FR', %s, 1, 'Version Artist', 'Version Song')
+                RETURNING id
+                """,
+                (year,),
+            )
+            song_ids[year] = cursor.fetchone()["id"]
+    db.commit()
+    before = versions()
+
+    with db.cursor() as cursor:
+        # Probed durations aren't rendered from the cache's point of view.
+        cursor.execute("UPDATE song SET duration = 180 WHERE id = %s", (song_ids[2024],))
+        # The open year isn't cached, so its edits take no version lock.
+        cursor.execute(
+            "INSERT INTO song_language (song_id, language_id, priority) VALUES (%s, 40, 1)",
+            (song_ids[2025],),
+        )
+    db.commit()
+    assert versions() == before
+
+    with db.cursor() as cursor:
+        cursor.execute(
+            "INSERT INTO song_language (song_id, language_id, priority) VALUES (%s, 40, 1)",
+            (song_ids[2024],),
+        )
+    db.commit()
+    after = versions()
+    assert after[2024] == before.get(2024, 0) + 1
+    assert after.get(2025) == before.get(2025)
+
+
+def test_scoreboard_payload_is_built_once_per_full_show(app, client, db, show, monkeypatch):
+    from world_stage.routes.year import scoreboard
+
+    app.config["PROCESS_CACHE"] = True
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+    with db.cursor() as cursor:
+        song_ids = {}
+        for submitter_id, country_id in ((1, "US"), (2, "ES"), (3, "FR")):
+            cursor.execute(
+                """
+                INSERT INTO song (country_id, year_id, submitter_id, artist, title)
+                VALUES (%s, 2025, %s, 'Artist', 'Scoreboard Song')
+                RETURNING id
+                """,
+                (country_id, submitter_id),
+            )
+            song_ids[submitter_id] = cursor.fetchone()["id"]
+        cursor.executemany(
+            "INSERT INTO song_show (song_id, show_id, running_order) VALUES (%s, %s, %s)",
+            [(song_id, show["id"], n) for n, song_id in enumerate(song_ids.values(), start=1)],
+        )
+        for voter_id, country_id, ballot in (
+            (1, "US", {song_ids[2]: 12, song_ids[3]: 10}),
+            (2, "ES", {song_ids[1]: 12, song_ids[3]: 10}),
+        ):
+            cursor.execute(
+                """
+                INSERT INTO vote_set (voter_id, show_id, result_mode, country_id)
+                VALUES (%s, %s, 'official', %s)
+                RETURNING id
+                """,
+                (voter_id, show["id"], country_id),
+            )
+            vote_set_id = cursor.fetchone()["id"]
+            cursor.executemany(
+                "INSERT INTO vote (vote_set_id, song_id, score) VALUES (%s, %s, %s)",
+                [(vote_set_id, song_id, score) for song_id, score in ballot.items()],
+            )
+        cursor.execute("UPDATE show SET status = 'full' WHERE id = %s", (show["id"],))
+    db.commit()
+
+    calls = []
+    load = scoreboard._scoreboard_payload
+
+    def counting(*args):
+        calls.append(args)
+        return load(*args)
+
+    monkeypatch.setattr(scoreboard, "_scoreboard_payload", counting)
+    url = f"/year/2025/{show['key'].split('-', 1)[1]}/scoreboard/votes"
+    assert _wait_for(lambda: client.get(url).status_code == 200)
+
+    payload = client.get(url).get_json()
+    assert sorted(payload["vote_order"]) == ["alice", "bob"]
+    assert payload["user_songs"] == {"alice": [song_ids[1]], "bob": [song_ids[2]]}
+    assert payload["associations"]["bob"]["code"] == "ES"
+    loads = len(calls)
+    client.get(url)
+    assert len(calls) == loads
+
+    # The reveal order is stored for the full show, and the official
+    # results refresh after a ballot change drops it.
+    with db.cursor() as cursor:
+        cursor.execute("SELECT vote_order FROM show_vote_order WHERE show_id = %s", (show["id"],))
+        assert cursor.fetchone()["vote_order"] == payload["vote_order"]
+        cursor.execute(
+            """
+            DELETE FROM vote
+            USING vote_set
+            WHERE vote.vote_set_id = vote_set.id AND vote_set.show_id = %s
+              AND vote_set.voter_id = 2 AND vote.score = 10
+            """,
+            (show["id"],),
+        )
+    db.commit()
+    with db.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM show_vote_order WHERE show_id = %s", (show["id"],))
+        assert cursor.fetchone() is None
+
+    # Without a live reveal the stream sends the whole timeline at once.
+    stream_url = url.removesuffix("/votes") + "/stream"
+    expected_totals = {str(song_ids[1]): 12, str(song_ids[2]): 12, str(song_ids[3]): 10}
+
+    def stream_events(**headers):
+        response = client.get(stream_url, headers=headers)
+        assert response.mimetype == "text/event-stream"
+        return [
+            dict(line.split(": ", 1) for line in event.splitlines())
+            for event in response.get_data(as_text=True).split("\n\n")
+            if event
+        ]
+
+    assert _wait_for(
+        lambda: json.loads(stream_events()[-2]["data"])["totals"] == expected_totals
+    )
+    events = stream_events()
+    assert [e["event"] for e in events] == ["show", "vote", "vote", "end"]
+    voters = [json.loads(e["data"])["voter"] for e in events[1:3]]
+    assert voters == client.get(url).get_json()["vote_order"]
+    assert [e["event"] for e in stream_events(**{"Last-Event-ID": "2"})] == ["end"]
+
+    # A live reveal sends the voters already due, then has the browser
+    # reconnect when the next one is.
+    app.config["REVEAL_STEP_SECONDS"] = 60
+    with db.cursor() as cursor:
+        cursor.execute(
+            """
+            UPDATE show SET reveal_started_at = CURRENT_TIMESTAMP - INTERVAL '90 seconds'
+            WHERE id = %s
+            """,
+            (show["id"],),
+        )
+    db.commit()
+    events = stream_events()
+    assert [e.get("event") for e in events] == ["live", "show", "vote", None]
+    assert 0 < int(events[-1]["retry"]) <= 30_000
+    events = stream_events(**{"Last-Event-ID": "1"})
+    assert [e.get("event") for e in events] == ["live", None]
+
+    try:
+        with db.cursor() as cursor:
+            cursor.execute(
+                "UPDATE vote_set SET nickname = 'Ally' WHERE show_id = %s AND voter_id = 1",
+                (show["id"],),
+            )
+        db.commit()
+        assert _wait_for(
+            lambda: client.get(url).get_json()["associations"]["alice"]["nickname"] == "Ally"
+        )
+    finally:
+        with db.cursor() as cursor:
+            cursor.execute(
+                "UPDATE vote_set SET nickname = NULL WHERE show_id = %s AND voter_id = 1",
+                (show["id"],),
+            )
+        db.commit()
+
+
+def test_prediction_odds_are_cached_until_a_prediction_changes(
+    app, client, db, show, monkeypatch
+):
+    from world_stage.routes.year import predictions
+
+    app.config["PROCESS_CACHE"] = True
+    with app.app_context():
+        assert _wait_for(lambda: cache._bus().ready.is_set())
+    with db.cursor() as cursor:
+        song_ids = []
+        for submitter_id, country_id in ((1, "US"), (2, "ES"), (3, "FR")):
+            cursor.execute(
+                """
+                INSERT INTO song (country_id, year_id, submitter_id, artist, title)
+                VALUES (%s, 2025, %s, 'Artist', 'Prediction Song')
+                RETURNING id
+                """,
+                (country_id, submitter_id),
+            )
+            song_ids.append(cursor.fetchone()["id"])
+        cursor.executemany(
+            "INSERT INTO song_show (song_id, show_id, running_order) VALUES (%s, %s, %s)",
+            [(song_id, show["id"], n) for n, song_id in enumerate(song_ids, start=1)],
+        )
+        set_ids = []
+        for user_id in (1, 2):
+            cursor.execute(
+                "INSERT INTO prediction_set (user_id, show_id) VALUES (%s, %s) RETURNING id",
+                (user_id, show["id"]),
+            )
+            set_ids.append(cursor.fetchone()["id"])
+        cursor.executemany(
+            "INSERT INTO prediction (set_id, song_id, position) VALUES (%s, %s, %s)",
+            [
+                (set_id, song_id, position)
+                for set_id in set_ids
+                for position, song_id in enumerate(song_ids, start=1)
+            ],
+        )
+        cursor.execute("UPDATE show SET status = 'full' WHERE id = %s", (show["id"],))
+    db.commit()
+
+    calls = []
+    build = predictions._prediction_matrix
+
+    def counting(*args):
+        calls.append(args)
+        return build(*args)
+
+    monkeypatch.setattr(predictions, "_prediction_matrix", counting)
+    url = f"/year/2025/{show['key'].split('-', 1)[1]}/predictions"
+    html = {"Accept": "text/html"}
+    assert _wait_for(lambda: client.get(url, headers=html).status_code == 200)
+    loads = len(calls)
+    assert client.get(url, headers=html).status_code == 200
+    assert len(calls) == loads
+
+    def resubmit(conn, set_id, order):
+        with conn.cursor() as cursor:
+            cursor.execute(
+                "UPDATE prediction_set SET updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                (set_id,),
+            )
+            cursor.execute("DELETE FROM prediction WHERE set_id = %s", (set_id,))
+            cursor.executemany(
+                "INSERT INTO prediction (set_id, song_id, position) VALUES (%s, %s, %s)",
+                [(set_id, song_id, position) for position, song_id in enumerate(order, start=1)],
+            )
+        conn.commit()
+
+    # A resubmission whose transaction started before another one that
+    # committed first (so its updated_at is older) still moves the show
+    # to a new key.
+    with psycopg.connect(app.config["DATABASE_URI"]) as slow:
+        slow.execute("SELECT 1")
+        resubmit(db, set_ids[0], song_ids[::-1])
+        assert client.get(url, headers=html).status_code == 200
+        assert len(calls) == loads + 1
+        resubmit(slow, set_ids[1], song_ids[::-1])
+    assert client.get(url, headers=html).status_code == 200
+    assert len(calls) == loads + 2
+    assert client.get(url, headers=html).status_code == 200
+    assert len(calls) == loads + 2
@@ -1,6 +1,8 @@
 """Tests for the /radio endpoints and the gapless duration schedule."""
 
 from world_stage import create_app
+from world_stage.routes import radio
+from world_stage.utils import LCG
 
 
 def _add_song(db, cc, year, title, link, *, duration=None, placeholder=False,
@@ -137,6 +139,102 @@ class TestRadioNow:
         assert first["offset"] == second["offset"]
 
 
+class TestRadioSchedule:
+    def test_pool_is_reused_until_songs_change(self, app, client, db):
+        app.config["PERFORMANCE_HEADERS"] = True
+        _add_song(db, "US", 2024, "First", _media("ws2024us.mp4"), duration=100.0)
+
+        first = client.get("/radio/now")
+        assert first.get_json()["pool_size"] == 1
+        # Only the version stamp is checked once the pool is loaded.
+        second = client.get("/radio/now")
+        assert second.headers["X-SQL-Query-Count"] == "1"
+
+        _add_song(db, "ES", 2024, "Second", _media("ws2024es.mp4"), duration=200.0)
+        third = client.get("/radio/now")
+        assert third.get_json()["pool_size"] == 2
+
+    def test_cached_slots_match_a_replay_from_midnight(self, app, db):
+        _add_three_songs(db)
+
+        def replay(now, pool):
+            # The schedule's definition: walk the day's draws from midnight.
+            day_start = int(now // 86400) * 86400
+            rng = LCG(int(now // 86400))
+            start = 0.0
+            while True:
+                song = pool[rng.next(len(pool))]
+                if now - day_start < start + song["duration"]:
+                    return song["id"], day_start + start
+                start += song["duration"]
+
+        day_start = 20000 * 86400
+        with app.app_context():
+            pool = radio._get_pool()
+            for t in range(day_start, day_start + 86400, 997):
+                slot = radio._song_at(float(t))
+                assert (slot["song"]["id"], slot["slot_start"]) == replay(float(t), pool)
+
+
+class TestScheduleEndpoint:
+    def test_slots_match_now_playing(self, client, db, monkeypatch):
+        _add_three_songs(db)
+
+        day_start = 20000 * 86400
+        data = client.get(
+            f"/radio/schedule?from={day_start}&to={day_start + 3600}"
+        ).get_json()
+        slots = data["slots"]
+        assert slots[0][0] == day_start
+        assert slots[-1][0] < day_start + 3600 <= data["until"]
+
+        ends = [start for start, _ in slots[1:]] + [data["until"]]
+        for (start, song_id), end in zip(slots, ends, strict=True):
+            _freeze_time(monkeypatch, start + 1)
+            now = client.get("/radio/now").get_json()
+            assert now["song"]["id"] == song_id
+            assert now["slot_start"] == start
+            assert now["slot_end"] == end
+            assert data["songs"][str(song_id)] == now["song"]
+
+    def test_window_crossing_midnight(self, client, db):
+        _add_three_songs(db)
+
+        day_end = 20001 * 86400
+        data = client.get(
+            f"/radio/schedule?from={day_end - 600}&to={day_end + 600}"
+        ).get_json()
+        starts = [start for start, _ in data["slots"]]
+        assert day_end in starts
+        assert starts == sorted(starts)
+
+    def test_etag_revalidates_to_304(self, client, db):
+        _add_three_songs(db)
+
+        url = f"/radio/schedule?from={20000 * 86400}&to={20000 * 86400 + 3600}"
+        first = client.get(url)
+        assert first.status_code == 200
+        etag = first.headers["ETag"]
+        assert not etag.startswith("W/")
+
+        second = client.get(url, headers={"If-None-Match": etag})
+        assert second.status_code == 304
+
+        _add_song(db, "US", 2024, "New", _media("ws2024us2.mp4"), duration=50.0, entry=2)
+        third = client.get(url, headers={"If-None-Match": etag})
+        assert third.status_code == 200
+
+    def test_rejects_bad_windows(self, client, db):
+        _add_three_songs(db)
+
+        assert client.get("/radio/schedule?from=abc").status_code == 400
+        assert client.get("/radio/schedule?from=100&to=50").status_code == 400
+        assert client.get("/radio/schedule?from=0&to=200000").status_code == 400
+
+    def test_404_when_no_songs(self, client):
+        assert client.get("/radio/schedule").status_code == 404
+
+
 def test_radio_page(client):
     resp = client.get("/radio", headers={"Accept": "text/html"})
     assert resp.status_code == 200
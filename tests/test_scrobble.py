@@ -1,8 +1,12 @@
 """Tests for radio scrobbling (Last.fm / Libre.fm)."""
 
 import hashlib
+import http.server
+import threading
 import time
+import urllib.parse
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 
 import pytest
 
@@ -106,6 +110,53 @@ class TestValidateSubmission:
             assert radio._validate_submission(off, slot["song"]["id"]) is None
 
 
+@pytest.fixture
+def stub_service(app, monkeypatch):
+    """A local AudioScrobbler stand-in that Last.fm calls are pointed at.
+
+    Records each request's form parameters and the client port it arrived
+    from, so tests can check connection reuse."""
+    state = {"requests": []}
+
+    class Handler(http.server.BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+            state["requests"].append(
+                {
+                    "params": dict(urllib.parse.parse_qsl(body)),
+                    "port": self.client_address[1],
+                }
+            )
+            time.sleep(state.get("delay", 0))
+            out = b'{"scrobbles": {"@attr": {"accepted": 1}}}'
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(out)))
+            self.end_headers()
+            self.wfile.write(out)
+            # Drop the keep-alive connection without telling the client.
+            self.close_connection = state.get("drop", False)
+
+        def log_message(self, *args):
+            pass
+
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setitem(
+        scrobble.SERVICES["lastfm"],
+        "ws_root",
+        f"http://127.0.0.1:{server.server_port}/2.0/",
+    )
+    monkeypatch.setenv("LASTFM_API_KEY", "k")
+    monkeypatch.setenv("LASTFM_API_SECRET", "s")
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
 # ── POST endpoints ───────────────────────────────────────────────────
 
 
@@ -160,13 +211,17 @@ class TestScrobbleEndpoints:
             },
         )
         assert resp.status_code == 204
+        # The request only queues; nothing is sent until the worker drains.
+        assert fake_call == []
+        with app.app_context():
+            assert scrobble.drain() == 1
 
         submitted = [c for c in fake_call if c["method"] == "track.scrobble"]
         assert len(submitted) == 1
         params = submitted[0]["params"]
-        assert params["artist"] == "Server Artist"
-        assert params["track"] == "Server Title"
-        assert params["timestamp"] == int(slot["slot_start"])
+        assert params["artist[0]"] == "Server Artist"
+        assert params["track[0]"] == "Server Title"
+        assert params["timestamp[0]"] == int(slot["slot_start"])
 
         with db.cursor() as cur:
             cur.execute("SELECT last_scrobbled_at FROM scrobble_account WHERE user_id = 2")
@@ -186,36 +241,17 @@ class TestScrobbleEndpoints:
             json={"song_id": slot["song"]["id"], "started_at": slot["slot_start"]},
         )
         assert resp.status_code == 204
+        with app.app_context():
+            scrobble.drain()
         np = [c for c in fake_call if c["method"] == "track.updateNowPlaying"]
         assert len(np) == 1
         assert "timestamp" not in np[0]["params"]
 
-    def test_scrobble_through_real_creds_and_threads(self, app, client, db, monkeypatch):
-        # Exercise the genuine path — real _creds()/_sign() running inside
-        # the dispatch worker threads — rather than stubbing _call(). This
-        # is the configuration that surfaced the worker-thread app-context
-        # bug; only the network leaf (urlopen) is faked.
-        monkeypatch.setenv("LASTFM_API_KEY", "k")
-        monkeypatch.setenv("LASTFM_API_SECRET", "s")
-
-        seen = []
-
-        class FakeResp:
-            def __enter__(self):
-                return self
-
-            def __exit__(self, *a):
-                return False
-
-            def read(self):
-                return b'{"scrobbles": {"@attr": {"accepted": 1}}}'
-
-        def fake_urlopen(req, timeout):
-            seen.append(getattr(req, "full_url", None) or req.get_full_url())
-            return FakeResp()
-
-        monkeypatch.setattr(scrobble.urllib.request, "urlopen", fake_urlopen)
-
+    def test_scrobble_through_real_creds_and_threads(self, app, client, db, stub_service):
+        # Exercise the genuine path — real _creds()/_sign()/_call() running
+        # inside the queue worker's threads — rather than stubbing _call().
+        # This is the configuration that surfaced the worker-thread
+        # app-context bug; only the remote end is a local stub.
         _add_song(db, "US", 2024, "T", "A", "https://m/x.mp4", 200.0)
         self._link(db, 2)
         sid = _make_session(db, 2)
@@ -227,8 +263,10 @@ class TestScrobbleEndpoints:
             "/radio/scrobble",
             json={"song_id": slot["song"]["id"], "started_at": slot["slot_start"]},
         )
-        assert resp.status_code == 204  # not 500 — worker thread had app context
-        assert any("audioscrobbler" in u for u in seen)
+        assert resp.status_code == 204
+        with app.app_context(), ThreadPoolExecutor(max_workers=2) as executor:
+            scrobble.drain(executor)  # no error — worker thread had app context
+        assert [r["params"]["method"] for r in stub_service["requests"]] == ["track.scrobble"]
 
     def test_disabled_account_does_not_scrobble(self, app, client, db, fake_call):
         _add_song(db, "US", 2024, "T", "A", "https://m/x.mp4", 200.0)
@@ -248,9 +286,180 @@ class TestScrobbleEndpoints:
             "/radio/scrobble",
             json={"song_id": slot["song"]["id"], "started_at": slot["slot_start"]},
         )
+        with app.app_context():
+            assert scrobble.drain() == 0
         assert [c for c in fake_call if c["method"] == "track.scrobble"] == []
 
 
+# ── Outbound queue ───────────────────────────────────────────────────
+
+
+class TestScrobbleQueue:
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Records calls; set ``service["ok"] = False`` to make them fail."""
+        state = {"calls": [], "ok": True}
+
+        def _fake(service, method, params, *, post):
+            state["calls"].append({"method": method, "params": params})
+            return {"ok": 1} if state["ok"] else None
+
+        monkeypatch.setattr(scrobble, "_call", _fake)
+        monkeypatch.setattr(scrobble, "is_configured", lambda s: True)
+        return state
+
+    def _link(self, db, user_id):
+        with db.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO scrobble_account (user_id, service, session_key, enabled)
+                VALUES (%s, 'lastfm', 'SK', true)
+                """,
+                (user_id,),
+            )
+        db.commit()
+
+    def _queued(self, db):
+        with db.cursor() as cur:
+            cur.execute(
+                "SELECT kind, track, attempts, next_attempt_at > CURRENT_TIMESTAMP AS waiting "
+                "FROM scrobble_queue ORDER BY id"
+            )
+            return cur.fetchall()
+
+    def test_now_playing_updates_are_coalesced(self, app, db, service):
+        self._link(db, 2)
+        with app.app_context():
+            scrobble.enqueue(2, artist="A", track="First")
+            scrobble.enqueue(2, artist="A", track="Second")
+
+        queued = self._queued(db)
+        assert [(q["kind"], q["track"]) for q in queued] == [("now_playing", "Second")]
+
+        with app.app_context():
+            scrobble.drain()
+        assert [c["params"]["track"] for c in service["calls"]] == ["Second"]
+        assert self._queued(db) == []
+
+    def test_duplicate_scrobbles_are_queued_once(self, app, db, service):
+        self._link(db, 2)
+        with app.app_context():
+            for _ in range(2):
+                scrobble.enqueue(2, artist="A", track="T", timestamp=1_700_000_000)
+            assert scrobble.drain() == 1
+        assert len(service["calls"]) == 1
+
+    def test_failed_submission_backs_off(self, app, db, service):
+        self._link(db, 2)
+        service["ok"] = False
+        with app.app_context():
+            scrobble.enqueue(2, artist="A", track="T", timestamp=1_700_000_000)
+            assert scrobble.drain() == 1
+            # Rescheduled, so an immediate second pass finds nothing due.
+            assert scrobble.drain() == 0
+
+        queued = self._queued(db)
+        assert len(queued) == 1
+        assert queued[0]["attempts"] == 1
+        assert queued[0]["waiting"]
+
+        with db.cursor() as cur:
+            cur.execute("SELECT last_scrobbled_at FROM scrobble_account WHERE user_id = 2")
+            assert cur.fetchone()["last_scrobbled_at"] is None
+
+    def test_gives_up_after_max_attempts(self, app, db, service):
+        self._link(db, 2)
+        service["ok"] = False
+        with app.app_context():
+            scrobble.enqueue(2, artist="A", track="T", timestamp=1_700_000_000)
+        with db.cursor() as cur:
+            cur.execute("UPDATE scrobble_queue SET attempts = %s", (scrobble.MAX_ATTEMPTS - 1,))
+        db.commit()
+
+        with app.app_context():
+            scrobble.drain()
+        assert self._queued(db) == []
+
+
+# ── Transport ────────────────────────────────────────────────────────
+
+
+class TestTransport:
+    def _plays(self, n):
+        return [
+            {"artist": "A", "track": f"T{i}", "timestamp": 1_700_000_000 + 180 * i, "duration": 180}
+            for i in range(n)
+        ]
+
+    def test_batch_is_one_signed_call_with_indexed_params(self, app, stub_service):
+        with app.app_context():
+            assert scrobble.scrobble_many("lastfm", "SK", self._plays(3))
+
+        [request] = stub_service["requests"]
+        params = request["params"]
+        assert params["method"] == "track.scrobble"
+        assert [params[f"track[{i}]"] for i in range(3)] == ["T0", "T1", "T2"]
+        assert params["timestamp[2]"] == str(1_700_000_000 + 360)
+        assert "album[0]" not in params  # empty values are dropped
+
+        signed = {k: v for k, v in params.items() if k not in ("api_sig", "format")}
+        assert params["api_sig"] == scrobble._sign(signed, "s")
+
+    def test_batch_size_is_capped(self, app):
+        with app.app_context(), pytest.raises(ValueError):
+            scrobble.scrobble_many("lastfm", "SK", self._plays(scrobble.SCROBBLE_BATCH + 1))
+
+    def test_calls_reuse_one_connection(self, app, stub_service):
+        with app.app_context():
+            assert scrobble.now_playing("lastfm", "SK", "A", "T", 180)
+            assert scrobble.scrobble_many("lastfm", "SK", self._plays(1))
+
+        ports = {r["port"] for r in stub_service["requests"]}
+        assert len(stub_service["requests"]) == 2
+        assert len(ports) == 1
+
+    def test_stale_keep_alive_connection_is_retried(self, app, stub_service):
+        stub_service["drop"] = True
+        with app.app_context():
+            assert scrobble.now_playing("lastfm", "SK", "A", "T", 180)
+            assert scrobble.scrobble_many("lastfm", "SK", self._plays(1))
+
+        assert len(stub_service["requests"]) == 2
+        assert len({r["port"] for r in stub_service["requests"]}) == 2
+
+    def test_timed_out_post_is_not_sent_again(self, app, stub_service, monkeypatch):
+        monkeypatch.setattr(scrobble, "HTTP_TIMEOUT", 0.2)
+        with app.app_context():
+            assert scrobble.now_playing("lastfm", "SK", "A", "T", 180)
+            stub_service["delay"] = 0.5
+            assert not scrobble.scrobble_many("lastfm", "SK", self._plays(1))
+
+        assert len(stub_service["requests"]) == 2
+
+    def test_drain_groups_an_accounts_scrobbles(self, app, db, stub_service):
+        with db.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO scrobble_account (user_id, service, session_key, enabled)
+                VALUES (2, 'lastfm', 'SK', true)
+                """
+            )
+        db.commit()
+        plays = self._plays(scrobble.SCROBBLE_BATCH + 5)
+        with app.app_context():
+            for play in plays:
+                scrobble.enqueue(2, artist="A", track=play["track"], timestamp=play["timestamp"])
+            assert scrobble.drain() == len(plays)
+
+        sizes = [
+            sum(1 for k in r["params"] if k.startswith("track["))
+            for r in stub_service["requests"]
+        ]
+        assert sizes == [scrobble.SCROBBLE_BATCH, 5]
+        # Oldest plays go first.
+        assert stub_service["requests"][0]["params"]["track[0]"] == "T0"
+
+
 # ── Connect / callback ───────────────────────────────────────────────
 
 
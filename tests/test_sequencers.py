@@ -0,0 +1,95 @@
+"""Reveal-order sequencers."""
+
+import random
+from collections import deque
+from types import SimpleNamespace
+
+import pytest
+
+from world_stage.utils import LCG, SuspensefulVoteSequencer
+
+POINTS = [12, 10, 8, 7, 6, 5, 4, 3, 2, 1]
+
+
+def _synthetic_show(voters: int, songs: int, points: list[int], seed: int):
+    rng = random.Random(seed)
+    items = [SimpleNamespace(id=1000 + n, submitter=f"voter{n}") for n in range(songs)]
+    votes = {}
+    for n in range(voters):
+        user = f"voter{n}"
+        choices = [item.id for item in items if item.submitter != user]
+        picks = rng.sample(choices, min(len(points), len(choices)))
+        votes[user] = dict(zip(points[: len(picks)], picks, strict=True))
+    rng.shuffle(items)
+    return votes, items
+
+
+def _reference_order(sequencer: SuspensefulVoteSequencer) -> list[str]:
+    """The original get_order: copies and sorts every candidate's totals."""
+
+    def suspense_metric(temp_scores, vote):
+        sorted_scores = sorted(temp_scores.values(), reverse=True)
+        gap = sorted_scores[0] - sorted_scores[1] if len(sorted_scores) > 1 else 0
+        winner_points = sum(
+            pts for pts, item in vote.items() if item == sequencer.known_winner
+        )
+        return (winner_points * sequencer.winner_weight) + gap
+
+    low, medium, high, early_voters = sequencer._classify_votes()
+    current_scores = {song_id: 0 for song_id in sequencer.song_ids}
+    final_order: list[str] = []
+    lcg = LCG(sequencer.seed)
+
+    buckets = [low, medium, high]
+    bucket_idx = 0
+    while any(buckets):
+        tried = 0
+        while tried < len(buckets):
+            bucket = buckets[bucket_idx % len(buckets)]
+            bucket_idx += 1
+            tried += 1
+            if not bucket:
+                continue
+
+            best_user, best_vote, best_score = "", {}, float("inf")
+            for user, vote in bucket:
+                temp_scores = current_scores.copy()
+                for pts, item in vote.items():
+                    temp_scores[item] += pts
+                score = suspense_metric(temp_scores, vote)
+                if score < best_score:
+                    best_user, best_vote, best_score = user, vote, score
+
+            for pts, item in best_vote.items():
+                current_scores[item] += pts
+            final_order.append(best_user)
+            buckets[(bucket_idx - 1) % len(buckets)] = deque(
+                (u, v) for u, v in bucket if u != best_user
+            )
+            break
+
+    for v in early_voters:
+        final_order.insert(lcg.next(sequencer.first_half), v)
+    return final_order
+
+
+@pytest.mark.parametrize("voters", [50, 200, 500])
+def test_suspenseful_order_matches_the_reference(voters):
+    votes, items = _synthetic_show(voters, 40, POINTS, seed=voters)
+    sequencer = SuspensefulVoteSequencer(votes, items, POINTS, seed=voters)
+    order = sequencer.get_order()
+    assert order == _reference_order(sequencer)
+    assert sorted(order) == sorted(votes)
+
+
+def test_suspenseful_order_matches_the_reference_on_small_and_tied_shows():
+    rng = random.Random(0)
+    for trial in range(300):
+        points = rng.choice([POINTS, [3, 2, 1], [1], [5, 5, 3]])
+        votes, items = _synthetic_show(
+            rng.choice([1, 2, 3, 7, 20]), rng.choice([1, 2, 3, 6, 15]), points, seed=trial
+        )
+        sequencer = SuspensefulVoteSequencer(
+            votes, items, points, seed=trial, winner_weight=rng.choice([0, 1, 2])
+        )
+        assert sequencer.get_order() == _reference_order(sequencer), trial
@@ -248,6 +248,7 @@ def create_app(config: dict | None = None) -> Flask:
         DATABASE=os.path.join(app.instance_path, "songs.db"),
         LOCAL_ASSETS=_environment_boolean("LOCAL_ASSETS"),
         PERFORMANCE_HEADERS=_environment_boolean("PERFORMANCE_HEADERS"),
+        ASYNC_RESULT_REFRESH=_environment_boolean("ASYNC_RESULT_REFRESH"),
         STATIC_ROOT="/opt/worldstage/static",
         STATIC_URL_PREFIX="/static",
     )
@@ -330,10 +331,13 @@ def create_app(config: dict | None = None) -> Flask:
     with contextlib.suppress(OSError):
         os.makedirs(app.instance_path)
 
-    from . import db, media, scrobble
+    from . import analytics, cache, db, media, results, scrobble
 
+    analytics.init_app(app)
+    cache.init_app(app)
     db.init_app(app)
     media.init_app(app)
+    results.init_app(app)
     scrobble.init_app(app)
 
     from .routes import (
@@ -0,0 +1,152 @@
+"""Bulk rebuild of the per-show analytics caches.
+
+Ballot and show changes keep ``taste_similarity_show_cache``,
+``country_bias_show_cache`` and ``submitter_bias_show_cache`` up to date
+on their own. After a migration that changes how they are computed,
+``flask rebuild-analytics`` rebuilds every published show in both ballot
+modes, several shows at a time on separate pooled connections, along
+with the voters' ``voter_vote_summary`` rows.
+
+Each rebuild commits together with its row in
+``analytics_rebuild_checkpoint``. A run starts by clearing that table;
+``--resume`` keeps it and skips the shows already done.
+
+``--engine numpy`` computes the caches with the optional NumPy backend
+in ``analytics_engine`` instead of ``refresh_analytics_show_cache``.
+"""
+
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import click
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from psycopg_pool import ConnectionPool
+
+from .db import get_db
+
+log = logging.getLogger(__name__)
+
+
+def _pending_rebuilds(year_id: int | None, resume: bool) -> list[dict]:
+    """Every published (show, ballot mode) still to rebuild, largest first
+    so the long rebuilds don't end up running alone at the end."""
+    db = get_db()
+    cursor = db.cursor()
+    if not resume:
+        cursor.execute("DELETE FROM analytics_rebuild_checkpoint")
+    cursor.execute(
+        """
+        SELECT show.id AS show_id, show.year_id, show.short_name, mode.ballot_mode,
+            (SELECT COUNT(*) FROM vote_set WHERE vote_set.show_id = show.id) AS ballots
+        FROM show
+        CROSS JOIN (VALUES ('official'), ('effective')) AS mode(ballot_mode)
+        WHERE show.status = 'full'
+          AND (%(year_id)s::bigint IS NULL OR show.year_id = %(year_id)s)
+          AND NOT EXISTS (
+              SELECT 1 FROM analytics_rebuild_checkpoint checkpoint
+              WHERE checkpoint.show_id = show.id
+                AND checkpoint.ballot_mode = mode.ballot_mode
+          )
+        ORDER BY ballots DESC, show.id, mode.ballot_mode
+        """,
+        {"year_id": year_id},
+    )
+    rows = cursor.fetchall()
+    db.commit()
+    return rows
+
+
+def rebuild_show(
+    pool: ConnectionPool, show_id: int, ballot_mode: str, engine: str = "sql"
+) -> float:
+    """Rebuild one show's caches and check it off. Returns the seconds taken."""
+    started_at = time.perf_counter()
+    with pool.connection() as conn, conn.cursor() as cursor:
+        if engine == "numpy":
+            from . import analytics_engine
+
+            analytics_engine.refresh_show_cache(cursor, show_id, ballot_mode)
+        else:
+            cursor.execute("SELECT refresh_analytics_show_cache(%s, %s)", (show_id, ballot_mode))
+        cursor.execute("SELECT refresh_voter_vote_summary(%s, %s)", (show_id, ballot_mode))
+        cursor.execute(
+            """
+            INSERT INTO analytics_rebuild_checkpoint (show_id, ballot_mode)
+            VALUES (%s, %s)
+            ON CONFLICT (show_id, ballot_mode) DO UPDATE
+            SET rebuilt_at = CURRENT_TIMESTAMP
+            """,
+            (show_id, ballot_mode),
+        )
+    return time.perf_counter() - started_at
+
+
+@click.command("rebuild-analytics")
+@click.option("--workers", default=4, show_default=True, help="Shows rebuilt concurrently.")
+@click.option("--year", "year_id", type=int, help="Only rebuild shows from this year.")
+@click.option("--resume", is_flag=True, help="Skip shows already rebuilt by the last run.")
+@click.option(
+    "--engine",
+    type=click.Choice(["sql", "numpy"]),
+    default="sql",
+    show_default=True,
+    help="Compute the caches in the database or with NumPy.",
+)
+@with_appcontext
+def rebuild_analytics_command(workers: int, year_id: int | None, resume: bool, engine: str):
+    """Rebuild the analytics caches of every published show."""
+    if engine == "numpy":
+        try:
+            import numpy  # noqa: F401
+        except ImportError:
+            raise click.ClickException(
+                "--engine numpy needs NumPy: pip install 'world-stage[analytics]'"
+            ) from None
+
+    targets = _pending_rebuilds(year_id, resume)
+    if not targets:
+        click.echo("Nothing to rebuild.")
+        return
+
+    pool: ConnectionPool = current_app.config["DB_POOL"]
+    # get_db() holds one pooled connection for the whole command; more
+    # workers than the rest would only queue on the pool.
+    workers = max(1, min(workers, pool.max_size - 1))
+    click.echo(f"Rebuilding {len(targets)} show caches on {workers} connections...")
+
+    started_at = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(rebuild_show, pool, t["show_id"], t["ballot_mode"], engine): t
+            for t in targets
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            target = futures[future]
+            label = (
+                f"show {target['show_id']} ({target['year_id']} {target['short_name']}) "
+                f"{target['ballot_mode']}"
+            )
+            try:
+                elapsed = future.result()
+            except Exception:
+                log.exception("rebuilding analytics for %s failed", label)
+                failed += 1
+                click.echo(f"  [{done}/{len(targets)}] {label}: FAILED")
+                continue
+            click.echo(f"  [{done}/{len(targets)}] {label}: {elapsed * 1000:.0f} ms")
+
+    click.echo(
+        f"Done in {time.perf_counter() - started_at:.1f} s: "
+        f"{len(targets) - failed} rebuilt, {failed} failed."
+    )
+    if failed:
+        click.echo("Run again with --resume to retry the failed shows.")
+        sys.exit(1)
+
+
+def init_app(app: Flask):
+    app.cli.add_command(rebuild_analytics_command)
@@ -0,0 +1,375 @@
+"""NumPy backend for rebuilding the per-show analytics caches.
+
+``refresh_analytics_show_cache`` aggregates a show's ballots with
+self-joins: every voter pair for taste similarity, every voter against
+every song for the bias caches. Here the show's ballots are loaded once
+into voter x song matrices and the same sums come out of a handful of
+matrix products, which stay fast at a thousand voters.
+
+Only the integer sums are computed in NumPy. They are copied into
+temporary tables and the cache rows are derived from them by the same
+numeric expressions the SQL function uses, so both backends write
+identical rows.
+
+NumPy is optional (``pip install world-stage[analytics]``); this module
+is only imported by ``flask rebuild-analytics --engine numpy``.
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+BALLOT_MODES = ("official", "effective")
+
+
+@dataclass
+class ShowBallots:
+    """One show's ballots in matrix form.
+
+    Rows are voters with a ballot in the selected mode, ordered by id;
+    columns are the show's songs. ``voted`` marks vote rows (a vote with
+    a NULL score still counts as a row), ``scores`` holds their scores
+    with NULL as 0, and ``maxed`` marks scores equal to the point
+    system's maximum."""
+
+    voter_ids: np.ndarray
+    song_submitters: np.ndarray
+    song_countries: np.ndarray
+    voted: np.ndarray
+    scores: np.ndarray
+    maxed: np.ndarray
+
+    @property
+    def own_songs(self) -> np.ndarray:
+        """voter x song: the voter submitted the song."""
+        return self.song_submitters[np.newaxis, :] == self.voter_ids[:, np.newaxis]
+
+    @property
+    def eligible(self) -> np.ndarray:
+        """voter x song: the song counts towards the voter's bias, i.e. it
+        has a submitter and it isn't the voter (SQL ``submitter_id <>
+        voter_id``)."""
+        return (self.song_submitters[np.newaxis, :] >= 0) & ~self.own_songs
+
+
+def load_show(cursor, show_id: int, ballot_mode: str) -> ShowBallots:
+    cursor.execute(
+        """
+        SELECT s.id, COALESCE(s.submitter_id, -1) AS submitter_id, s.country_id
+        FROM song_show ss
+        JOIN song s ON s.id = ss.song_id
+        WHERE ss.show_id = %s
+        ORDER BY s.id
+        """,
+        (show_id,),
+    )
+    songs = cursor.fetchall()
+    song_index = {song["id"]: i for i, song in enumerate(songs)}
+
+    # Ballots without a voter never enter any of the caches.
+    cursor.execute(
+        """
+        SELECT selected.voter_id, v.song_id, v.score, v.score = point_max.max_score AS maxed
+        FROM bias_vote_sets(%(include_revotes)s) selected
+        CROSS JOIN (
+            SELECT MAX(p.score) AS max_score
+            FROM show sh
+            JOIN point p ON p.point_system_id = sh.point_system_id
+            WHERE sh.id = %(show_id)s
+        ) point_max
+        LEFT JOIN vote v ON v.vote_set_id = selected.id
+            AND v.song_id IN (SELECT song_id FROM song_show WHERE show_id = %(show_id)s)
+        WHERE selected.show_id = %(show_id)s AND selected.voter_id IS NOT NULL
+        ORDER BY selected.voter_id
+        """,
+        {"show_id": show_id, "include_revotes": ballot_mode == "effective"},
+    )
+    votes = cursor.fetchall()
+    voter_ids = np.array(sorted({row["voter_id"] for row in votes}), dtype=np.int64)
+    voter_index = {voter_id: i for i, voter_id in enumerate(voter_ids.tolist())}
+
+    shape = (len(voter_ids), len(songs))
+    voted = np.zeros(shape, dtype=np.int64)
+    scores = np.zeros(shape, dtype=np.int64)
+    maxed = np.zeros(shape, dtype=np.int64)
+    for row in votes:
+        if row["song_id"] is None:
+            continue
+        cell = voter_index[row["voter_id"]], song_index[row["song_id"]]
+        voted[cell] = 1
+        scores[cell] = row["score"] or 0
+        maxed[cell] = bool(row["maxed"])
+
+    return ShowBallots(
+        voter_ids=voter_ids,
+        song_submitters=np.array([song["submitter_id"] for song in songs], dtype=np.int64),
+        song_countries=np.array([song["country_id"] for song in songs], dtype=object),
+        voted=voted,
+        scores=scores,
+        maxed=maxed,
+    )
+
+
+def taste_pair_sums(ballots: ShowBallots) -> list[tuple]:
+    """(voter_a, voter_b, n, sum_a, sum_b, sum_ab, sum_aa, sum_bb) for every
+    voter pair with a song in common, voter_a < voter_b.
+
+    A song submitted by either voter of a pair doesn't count for that pair.
+    Clearing each voter's own songs from their row drops exactly those
+    terms from every product."""
+    keep = ~ballots.own_songs
+    voted = ballots.voted * keep
+    scores = ballots.scores * keep
+    squares = scores * scores
+
+    n = voted @ voted.T
+    sum_a = scores @ voted.T
+    sum_ab = scores @ scores.T
+    sum_aa = squares @ voted.T
+
+    a, b = np.nonzero(np.triu(n, k=1))
+    voter_ids = ballots.voter_ids
+    return list(zip(
+        voter_ids[a].tolist(), voter_ids[b].tolist(),
+        n[a, b].tolist(),
+        sum_a[a, b].tolist(), sum_a[b, a].tolist(),
+        sum_ab[a, b].tolist(),
+        sum_aa[a, b].tolist(), sum_aa[b, a].tolist(),
+        strict=True,
+    ))
+
+
+def _groups(keys: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """The distinct keys of the eligible songs and a song x key indicator."""
+    values, inverse = np.unique(keys, return_inverse=True)
+    indicator = np.zeros((len(keys), len(values)), dtype=np.int64)
+    indicator[np.arange(len(keys)), inverse] = 1
+    return values, indicator
+
+
+def bias_sums(
+    ballots: ShowBallots, song_groups: np.ndarray
+) -> tuple[list[tuple], list[tuple], list[tuple]]:
+    """Per (voter, group) rows of the bias components before weighting.
+
+    Returns ``sc`` rows (voter, group, actual, others_t), ``parts`` rows
+    (voter, group, parts, votings_nonblank, votings_max) and ``vfield``
+    rows (voter, n), matching the CTEs of the same names in
+    ``refresh_bias_show_cache``."""
+    eligible = ballots.eligible.astype(np.int64)
+    # Songs nobody voted for have no song_totals row and add no sc row.
+    voted_songs = ballots.voted.any(axis=0).astype(np.int64)
+    totals = ballots.scores.sum(axis=0)
+
+    groups, indicator = _groups(song_groups)
+    counted = eligible * voted_songs
+    actual = (ballots.scores * counted) @ indicator
+    others = (counted * totals) @ indicator - actual
+    sc_present = counted @ indicator
+    parts = eligible @ indicator
+    nonblank = (ballots.voted * eligible) @ indicator
+    at_max = (ballots.maxed * eligible) @ indicator
+
+    voter_ids = ballots.voter_ids.tolist()
+    group_keys = [str(group) for group in groups.tolist()]
+    sc_rows, parts_rows = [], []
+    for t, g in zip(*np.nonzero(parts), strict=True):
+        if sc_present[t, g]:
+            sc_rows.append((voter_ids[t], group_keys[g], int(actual[t, g]), int(others[t, g])))
+        parts_rows.append(
+            (voter_ids[t], group_keys[g], int(parts[t, g]), int(nonblank[t, g]), int(at_max[t, g]))
+        )
+    vfield_rows = list(zip(voter_ids, eligible.sum(axis=1).tolist(), strict=True))
+    return sc_rows, parts_rows, vfield_rows
+
+
+def reciprocal_sums(ballots: ShowBallots) -> list[tuple]:
+    """(submitter, voter, received, received_any, received_max): the points
+    each voter gave each submitter's songs in this show."""
+    eligible = ballots.eligible.astype(np.int64)
+    submitted = ballots.song_submitters >= 0
+    submitters, indicator = _groups(ballots.song_submitters[submitted])
+
+    received = (ballots.scores * eligible)[:, submitted] @ indicator
+    received_any = (ballots.voted * eligible)[:, submitted] @ indicator
+    received_max = (ballots.maxed * eligible)[:, submitted] @ indicator
+
+    v, u = np.nonzero(received_any)
+    return list(zip(
+        submitters[u].tolist(), ballots.voter_ids[v].tolist(),
+        received[v, u].tolist(), received_any[v, u].tolist(), received_max[v, u].tolist(),
+        strict=True,
+    ))
+
+
+_STAGING = {
+    "analytics_engine_pairs": """
+        voter_a_id bigint, voter_b_id bigint, n numeric, sum_a numeric, sum_b numeric,
+        sum_ab numeric, sum_aa numeric, sum_bb numeric
+    """,
+    "analytics_engine_sc": "voter_id bigint, group_key text, actual bigint, others_t numeric",
+    "analytics_engine_parts": """
+        voter_id bigint, group_key text, parts bigint, votings_nonblank bigint,
+        votings_max bigint
+    """,
+    "analytics_engine_vfield": "voter_id bigint, n bigint",
+    "analytics_engine_reciprocal": """
+        voter_id bigint, submitter_id bigint, received bigint, received_any bigint,
+        received_max bigint
+    """,
+}
+
+
+def _stage(cursor, table: str, rows: list[tuple]) -> None:
+    cursor.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {table} ({_STAGING[table]}) ON COMMIT DELETE ROWS"
+    )
+    cursor.execute(f"TRUNCATE {table}")
+    with cursor.copy(f"COPY {table} FROM STDIN") as copy:
+        for row in rows:
+            copy.write_row(row)
+
+
+# The weighting below is the tail of refresh_bias_show_cache, reading the
+# staged sc/parts/vfield rows instead of computing them.
+_BIAS_AGG = """
+    pool AS (
+        SELECT voter_id, SUM(actual) AS pool_v, SUM(others_t) AS others_all
+        FROM analytics_engine_sc
+        GROUP BY voter_id
+    ),
+    agg AS (
+        SELECT sc.voter_id, sc.group_key,
+            SUM(sc.actual) AS a_raw,
+            SUM(sc.others_t::numeric / NULLIF(pool.others_all, 0) * pool.pool_v) AS e_raw,
+            SUM(vfield.n * sc.actual::numeric / NULLIF(pool.pool_v, 0)) AS a_w,
+            SUM(vfield.n * sc.others_t::numeric / NULLIF(pool.others_all, 0)) AS e_w,
+            SUM(vfield.n * vfield.n * sc.others_t::numeric
+                / (NULLIF(pool.others_all, 0) * NULLIF(pool.pool_v, 0))) AS v_w
+        FROM analytics_engine_sc sc
+        JOIN pool USING (voter_id)
+        JOIN analytics_engine_vfield vfield USING (voter_id)
+        WHERE pool.pool_v > 0
+        GROUP BY sc.voter_id, sc.group_key
+    )
+"""
+
+
+def refresh_show_cache(cursor, show_id: int, ballot_mode: str) -> None:
+    """Rebuild one show's analytics caches, like
+    ``refresh_analytics_show_cache``. The caller commits."""
+    if ballot_mode not in BALLOT_MODES:
+        raise ValueError(f"Unknown analytics ballot mode: {ballot_mode}")
+
+    for table in (
+        "taste_similarity_show_cache",
+        "country_bias_show_cache",
+        "submitter_bias_show_cache",
+    ):
+        cursor.execute(
+            f"DELETE FROM {table} WHERE show_id = %s AND ballot_mode = %s",
+            (show_id, ballot_mode),
+        )
+    cursor.execute("SELECT year_id, status FROM show WHERE id = %s", (show_id,))
+    show = cursor.fetchone()
+    if show is None or show["status"] != "full":
+        return
+
+    ballots = load_show(cursor, show_id, ballot_mode)
+    params = {"show_id": show_id, "year_id": show["year_id"], "ballot_mode": ballot_mode}
+
+    _stage(cursor, "analytics_engine_pairs", taste_pair_sums(ballots))
+    cursor.execute(
+        """
+        INSERT INTO taste_similarity_show_cache (
+            show_id, year_id, ballot_mode, voter_a_id, voter_b_id,
+            co_voted_songs, covariance, variance_a, variance_b
+        )
+        SELECT %(show_id)s, %(year_id)s, %(ballot_mode)s, voter_a_id, voter_b_id,
+            n::bigint,
+            sum_ab - sum_a * sum_b / n,
+            sum_aa - sum_a * sum_a / n,
+            sum_bb - sum_b * sum_b / n
+        FROM analytics_engine_pairs
+        """,
+        params,
+    )
+
+    for key, song_groups in (
+        ("country_id", ballots.song_countries),
+        ("submitter_id", ballots.song_submitters),
+    ):
+        sc_rows, parts_rows, vfield_rows = bias_sums(ballots, song_groups)
+        _stage(cursor, "analytics_engine_sc", sc_rows)
+        _stage(cursor, "analytics_engine_parts", parts_rows)
+        _stage(cursor, "analytics_engine_vfield", vfield_rows)
+        if key == "country_id":
+            cursor.execute(
+                f"""
+                INSERT INTO country_bias_show_cache (
+                    show_id, year_id, ballot_mode, voter_id, country_id,
+                    parts, votings_nonblank, votings_max,
+                    a_raw, e_raw, a_w, e_w, v_w
+                )
+                WITH {_BIAS_AGG}
+                SELECT %(show_id)s, %(year_id)s, %(ballot_mode)s,
+                    parts.voter_id, parts.group_key,
+                    parts.parts, parts.votings_nonblank, parts.votings_max,
+                    COALESCE(agg.a_raw, 0)::bigint,
+                    COALESCE(agg.e_raw, 0),
+                    COALESCE(agg.a_w, 0),
+                    COALESCE(agg.e_w, 0),
+                    COALESCE(agg.v_w, 0)
+                FROM analytics_engine_parts parts
+                LEFT JOIN agg USING (voter_id, group_key)
+                """,
+                params,
+            )
+            continue
+
+        _stage(cursor, "analytics_engine_reciprocal", reciprocal_sums(ballots))
+        cursor.execute(
+            f"""
+            INSERT INTO submitter_bias_show_cache (
+                show_id, year_id, ballot_mode, voter_id, submitter_id,
+                parts, votings_nonblank, votings_max,
+                a_raw, e_raw, a_w, e_w, v_w,
+                received, received_any, received_max
+            )
+            WITH {_BIAS_AGG},
+            parts AS (
+                SELECT voter_id, group_key::bigint AS submitter_id,
+                    parts, votings_nonblank, votings_max
+                FROM analytics_engine_parts
+            ),
+            agg_by_submitter AS (
+                SELECT voter_id, group_key::bigint AS submitter_id, a_raw, e_raw, a_w, e_w, v_w
+                FROM agg
+            ),
+            keys AS (
+                SELECT voter_id, submitter_id FROM parts
+                UNION
+                SELECT voter_id, submitter_id FROM agg_by_submitter
+                UNION
+                SELECT voter_id, submitter_id FROM analytics_engine_reciprocal
+            )
+            SELECT %(show_id)s, %(year_id)s, %(ballot_mode)s,
+                keys.voter_id, keys.submitter_id,
+                COALESCE(parts.parts, 0),
+                COALESCE(parts.votings_nonblank, 0),
+                COALESCE(parts.votings_max, 0),
+                COALESCE(agg.a_raw, 0)::bigint,
+                COALESCE(agg.e_raw, 0),
+                COALESCE(agg.a_w, 0),
+                COALESCE(agg.e_w, 0),
+                COALESCE(agg.v_w, 0),
+                COALESCE(reciprocal.received, 0)::bigint,
+                COALESCE(reciprocal.received_any, 0),
+                COALESCE(reciprocal.received_max, 0)
+            FROM keys
+            LEFT JOIN parts USING (voter_id, submitter_id)
+            LEFT JOIN agg_by_submitter agg USING (voter_id, submitter_id)
+            LEFT JOIN analytics_engine_reciprocal reciprocal USING (voter_id, submitter_id)
+            """,
+            params,
+        )
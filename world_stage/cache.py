@@ -0,0 +1,163 @@
+"""Per-worker caches of rarely-changing rows, kept fresh over LISTEN/NOTIFY.
+
+Each worker process keeps its own copy of hot lookups in named regions.
+Statement-level triggers on the source tables call
+``pg_notify('cache_invalidate', '<region>')``, and a listener thread in
+every worker clears the named region when the notification arrives, so
+an admin edit is visible everywhere as soon as it commits.
+
+The listener is started on first use in each process, never before
+Gunicorn forks. Whenever it (re)connects it clears every region, since
+notifications sent while it was away are lost; while it is down the
+cache is bypassed. Each region also has a TTL and a size bound as a
+backstop.
+
+Caching is off under ``TESTING`` unless ``PROCESS_CACHE`` is set, so
+tests that write rows directly see them on the next request.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from typing import Any
+
+import psycopg
+from flask import Flask, current_app
+
+log = logging.getLogger(__name__)
+
+CHANNEL = "cache_invalidate"
+RECONNECT_DELAY = 5.0
+
+# name -> (ttl seconds, max entries)
+_REGIONS: dict[str, tuple[float, int]] = {}
+
+
+def define_region(name: str, *, ttl: float, maxsize: int) -> str:
+    """Declare a region; call at import time. Returns ``name``."""
+    _REGIONS[name] = (ttl, maxsize)
+    return name
+
+
+class Region:
+    """A bounded LRU of ``key -> value`` with a per-entry TTL."""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every eviction. A value loaded across one may predate
+        # the write that caused it, so it is returned but not stored.
+        self._generation = 0
+
+    def get(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            hit = self._entries.get(key)
+            if hit is not None and hit[0] > now:
+                self._entries.move_to_end(key)
+                return hit[1]
+            generation = self._generation
+        value = loader()
+        with self._lock:
+            if generation == self._generation:
+                self._entries[key] = (now + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            self._generation += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class Bus:
+    """One process's regions and the listener thread that evicts them."""
+
+    def __init__(self, conninfo: str):
+        self.conninfo = conninfo
+        self.pid = os.getpid()
+        self.regions = {name: Region(*spec) for name, spec in _REGIONS.items()}
+        self.ready = threading.Event()
+        self._thread = threading.Thread(
+            target=self._listen, name="cache-invalidation", daemon=True
+        )
+        self._thread.start()
+
+    def region(self, name: str) -> Region:
+        if name not in self.regions:
+            # Defined after this bus was created (late import).
+            self.regions[name] = Region(*_REGIONS[name])
+        return self.regions[name]
+
+    def clear(self, names: list[str] | None = None) -> None:
+        for name in names if names is not None else list(self.regions):
+            region = self.regions.get(name)
+            if region is not None:
+                region.clear()
+
+    def _listen(self) -> None:
+        while True:
+            try:
+                with psycopg.connect(self.conninfo, autocommit=True) as conn:
+                    conn.execute(f"LISTEN {CHANNEL}")
+                    self.clear()
+                    self.ready.set()
+                    for notify in conn.notifies():
+                        self.clear([notify.payload])
+            except psycopg.Error as e:
+                log.warning("cache invalidation listener disconnected: %s", e)
+            self.ready.clear()
+            self.clear()
+            time.sleep(RECONNECT_DELAY)
+
+
+def _bus() -> Bus | None:
+    app = current_app._get_current_object()
+    if not app.config["PROCESS_CACHE"]:
+        return None
+    state = app.extensions["process_cache"]
+    bus = state["bus"]
+    if bus is None or bus.pid != os.getpid():
+        with state["lock"]:
+            bus = state["bus"]
+            if bus is None or bus.pid != os.getpid():
+                bus = state["bus"] = Bus(app.config["DB_POOL"].conninfo)
+    return bus
+
+
+def cached(region: str, key: Hashable, loader: Callable[[], Any]) -> Any:
+    """``loader()``, served from this worker's copy in ``region`` when
+    the invalidation listener is connected. Cached values are shared
+    between requests and must not be mutated."""
+    bus = _bus()
+    if bus is None or not bus.ready.is_set():
+        return loader()
+    return bus.region(region).get(key, loader)
+
+
+def forget(region: str, key: Hashable) -> None:
+    """Drop one entry from this worker's copy of ``region``, for writes
+    the worker itself just made; other workers hear from the triggers."""
+    bus = _bus()
+    if bus is not None:
+        bus.region(region).pop(key)
+
+
+def init_app(app: Flask):
+    app.config.setdefault("PROCESS_CACHE", not app.testing)
+    app.extensions["process_cache"] = {"bus": None, "lock": threading.Lock()}
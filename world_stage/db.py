@@ -7,7 +7,7 @@ from typing import Any, Self
 
 import click
 import psycopg
-from flask import current_app, g
+from flask import current_app, g, has_request_context
 from psycopg.abc import Params, Query, QueryNoTemplate
 from psycopg_pool import ConnectionPool
 
@@ -71,7 +71,14 @@ def fetchone(cursor: psycopg.Cursor[dict[str, Any]]) -> dict[str, Any]:
 def get_db() -> psycopg.Connection[dict[str, Any]]:
     if "db" not in g:
         pool: ConnectionPool = current_app.config["DB_POOL"]
-        g.db = pool.getconn()
+        db = pool.getconn()
+        # Only request-serving sessions defer result refreshes to the
+        # worker; CLI commands and migrations share the pool but keep
+        # refreshing inside their own COMMIT.
+        if current_app.config["ASYNC_RESULT_REFRESH"] and has_request_context():
+            _set_result_refresh(db, "async")
+            g.db_async_refresh = True
+        g.db = db
 
     return typing.cast(psycopg.Connection[dict[str, Any]], g.db)
 
@@ -81,9 +88,17 @@ def close_db(e=None) -> None:
     if db is not None:
         pool: ConnectionPool = current_app.config["DB_POOL"]
         db.rollback()
+        if g.pop("db_async_refresh", False):
+            _set_result_refresh(db, "sync")
         pool.putconn(db)
 
 
+def _set_result_refresh(db: psycopg.Connection, mode: str) -> None:
+    """Set ``world_stage.result_refresh`` for the rest of the session."""
+    db.execute("SELECT set_config('world_stage.result_refresh', %s, false)", (mode,))
+    db.commit()
+
+
 def init_db():
     db = get_db()
     with current_app.open_resource("schema.sql", "r") as f:
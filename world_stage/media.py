@@ -5,20 +5,54 @@ duration is probed with ffprobe (reads only the container metadata,
 not the whole file) whenever a song's video link is set to a file on
 the media host, and can be backfilled in bulk with the
 ``backfill-durations`` CLI command.
+
+A probe can take up to a minute on a slow host, so song writes don't
+run it: they store NULL and queue the song in ``duration_probe_queue``,
+and ``flask probe-worker`` (supervised in production by
+``scripts/systemd/worldstage-probe-worker.service``) fills in the
+duration in the background.
+
+Probe results are cached per URL in ``media_probe_cache`` together
+with the file's HTTP validators (ETag, Last-Modified, Content-Length).
+A HEAD request is enough to tell whether the cached duration still
+holds; ffprobe only runs for new or changed files.
 """
 
+import logging
 import subprocess
+import urllib.error
 import urllib.parse
+import urllib.request
 from concurrent.futures import ThreadPoolExecutor
 
 import click
-from flask import Flask
+import psycopg
+from flask import Flask, current_app
 from flask.cli import with_appcontext
+from psycopg_pool import ConnectionPool
 
 from .db import get_db
 
+log = logging.getLogger(__name__)
+
 MEDIA_HOST = "media.world-stage.org"
 
+HEAD_TIMEOUT = 10
+VALIDATORS = ("etag", "last_modified", "content_length")
+
+# Probe queue tuning. A claimed row is leased for PROBE_LEASE seconds,
+# longer than ffprobe's own timeout, so a crashed worker's rows come due
+# again. A failed probe is retried after PROBE_RETRY_BASE * 2**(n-1)
+# seconds, up to PROBE_MAX_ATTEMPTS tries, after which the duration
+# stays NULL until the link changes or an admin re-queues it.
+PROBE_BATCH = 32
+PROBE_LEASE = 180
+PROBE_RETRY_BASE = 60
+PROBE_MAX_ATTEMPTS = 5
+# The worker re-checks the queue this often even without a NOTIFY, to
+# pick up retries that have come due.
+PROBE_POLL_INTERVAL = 30.0
+
 
 def is_media_link(url: str | None) -> bool:
     if not url:
@@ -52,6 +86,98 @@ def probe_duration(url: str) -> float | None:
         return None
 
 
+def head_validators(url: str) -> dict | None:
+    """The file's ETag, Last-Modified and Content-Length from a HEAD
+    request, or None if it is unreachable or sends neither an ETag nor
+    a Last-Modified (the length alone can't tell a re-encode apart)."""
+    try:
+        with urllib.request.urlopen(
+            urllib.request.Request(url, method="HEAD"), timeout=HEAD_TIMEOUT
+        ) as resp:
+            headers = resp.headers
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+    length = headers.get("Content-Length")
+    validators = {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "content_length": int(length) if length and length.isdigit() else None,
+    }
+    if validators["etag"] is None and validators["last_modified"] is None:
+        return None
+    return validators
+
+
+def _probe_cached(url: str, cached: dict | None) -> tuple[float | None, dict | None]:
+    """Duration for ``url``, and the cache row to store (None when the
+    cache is already current or the probe failed)."""
+    validators = head_validators(url)
+    if (
+        validators is not None
+        and cached is not None
+        and all(cached[k] == validators[k] for k in VALIDATORS)
+    ):
+        return cached["duration"], None
+    duration = probe_duration(url)
+    if duration is None or validators is None:
+        return duration, None
+    return duration, {"url": url, "duration": duration, **validators}
+
+
+def probe_durations(
+    cursor, urls: list[str], executor: ThreadPoolExecutor | None = None
+) -> list[float | None]:
+    """Durations for ``urls``, in order, going through the probe cache.
+
+    Cache reads and writes happen on ``cursor`` in the calling thread;
+    only the HEAD requests and probes run on ``executor``. The cache read
+    is committed before they start, so the pooled connection isn't left
+    idle in a transaction for the length of the probes; the caller
+    commits the cache writes.
+    """
+    cursor.execute(
+        """
+        SELECT url, etag, last_modified, content_length, duration
+        FROM media_probe_cache
+        WHERE url = ANY(%s)
+        """,
+        (list(set(urls)),),
+    )
+    cached = {row["url"]: row for row in cursor.fetchall()}
+    cursor.connection.commit()
+
+    def probe(url):
+        return _probe_cached(url, cached.get(url))
+
+    results = list(executor.map(probe, urls) if executor else map(probe, urls))
+    fresh = {row["url"]: row for _, row in results if row is not None}
+    if fresh:
+        rows = list(fresh.values())
+        cursor.execute(
+            """
+            INSERT INTO media_probe_cache
+                (url, etag, last_modified, content_length, duration)
+            SELECT * FROM unnest(
+                %s::text[], %s::text[], %s::text[], %s::bigint[], %s::double precision[]
+            )
+            ON CONFLICT (url) DO UPDATE
+                SET etag = EXCLUDED.etag,
+                    last_modified = EXCLUDED.last_modified,
+                    content_length = EXCLUDED.content_length,
+                    duration = EXCLUDED.duration,
+                    probed_at = CURRENT_TIMESTAMP
+            """,
+            (
+                [r["url"] for r in rows],
+                [r["etag"] for r in rows],
+                [r["last_modified"] for r in rows],
+                [r["content_length"] for r in rows],
+                [r["duration"] for r in rows],
+            ),
+        )
+    return [duration for duration, _ in results]
+
+
 def duration_for_link(
     url: str | None,
     old_url: str | None = None,
@@ -59,20 +185,144 @@ def duration_for_link(
 ) -> float | None:
     """The duration to store alongside a video_link write.
 
-    Probes only links on the media host; anything else stores NULL.
     An unchanged link keeps its already-probed value so song edits
-    that don't touch the link don't pay for a probe.
+    that don't touch the link don't pay for a probe. Anything else
+    stores NULL; media-host links get their value later from the probe
+    queue (see ``needs_probe``).
     """
-    if not is_media_link(url):
-        return None
-    if url == old_url and old_duration is not None:
+    if is_media_link(url) and url == old_url:
         return old_duration
-    return probe_duration(url)
+    return None
+
+
+def needs_probe(
+    url: str | None,
+    old_url: str | None = None,
+    old_duration: float | None = None,
+) -> bool:
+    """Whether a video_link write has to queue a probe."""
+    return is_media_link(url) and duration_for_link(url, old_url, old_duration) is None
+
+
+def queue_probe(cursor, song_id: int, url: str) -> None:
+    """Queue a background probe of the song's ``url``, replacing any
+    pending one. Takes effect, and wakes the probe worker, when the
+    caller commits."""
+    cursor.execute(
+        """
+        INSERT INTO duration_probe_queue (song_id, video_link)
+        VALUES (%s, %s)
+        ON CONFLICT (song_id) DO UPDATE
+            SET video_link = EXCLUDED.video_link,
+                attempts = 0,
+                queued_at = CURRENT_TIMESTAMP,
+                next_attempt_at = CURRENT_TIMESTAMP
+        """,
+        (song_id, url),
+    )
+    cursor.execute("NOTIFY duration_probe_queue")
+
+
+def _claim_probes(limit: int) -> list[dict]:
+    """Lease up to ``limit`` due probes, committed right away so no lock
+    is held on the queue while ffprobe runs."""
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(
+        """
+        UPDATE duration_probe_queue
+        SET attempts = attempts + 1,
+            next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+        WHERE song_id IN (
+            SELECT song_id FROM duration_probe_queue
+            WHERE next_attempt_at <= CURRENT_TIMESTAMP
+            ORDER BY next_attempt_at
+            LIMIT %s
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING song_id, video_link, attempts, queued_at
+        """,
+        (PROBE_LEASE, limit),
+    )
+    rows = cursor.fetchall()
+    db.commit()
+    return rows
+
+
+def drain_probes(executor: ThreadPoolExecutor | None = None, limit: int = PROBE_BATCH) -> int:
+    """Run one batch of due probes. Returns how many were claimed.
+
+    Probes run on ``executor`` when given, otherwise one after another.
+    A duration is only stored while the song still has the probed link,
+    and a queue row re-queued during the probe (``queued_at`` moved) is
+    left for the newer request.
+    """
+    rows = _claim_probes(limit)
+    if not rows:
+        return 0
+
+    db = get_db()
+    cursor = db.cursor()
+    durations = probe_durations(cursor, [row["video_link"] for row in rows], executor)
+
+    probed, done, retry = [], [], []
+    for row, duration in zip(rows, durations, strict=True):
+        key = (row["song_id"], row["queued_at"])
+        if duration is not None:
+            probed.append((row["song_id"], row["video_link"], duration))
+            done.append(key)
+        elif row["attempts"] >= PROBE_MAX_ATTEMPTS:
+            log.warning(
+                "duration probe for song %s gave up after %d attempts: %s",
+                row["song_id"], row["attempts"], row["video_link"],
+            )
+            done.append(key)
+        else:
+            retry.append((*key, PROBE_RETRY_BASE * 2 ** (row["attempts"] - 1)))
+
+    if probed:
+        cursor.execute(
+            """
+            UPDATE song
+            SET duration = probed.duration
+            FROM unnest(%s::bigint[], %s::text[], %s::double precision[])
+                AS probed(id, video_link, duration)
+            WHERE song.id = probed.id AND song.video_link = probed.video_link
+            """,
+            ([p[0] for p in probed], [p[1] for p in probed], [p[2] for p in probed]),
+        )
+    if done:
+        cursor.execute(
+            """
+            DELETE FROM duration_probe_queue q
+            USING unnest(%s::bigint[], %s::timestamptz[]) AS done(song_id, queued_at)
+            WHERE q.song_id = done.song_id AND q.queued_at = done.queued_at
+            """,
+            ([d[0] for d in done], [d[1] for d in done]),
+        )
+    if retry:
+        cursor.execute(
+            """
+            UPDATE duration_probe_queue q
+            SET next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => retry.delay)
+            FROM unnest(%s::bigint[], %s::timestamptz[], %s::integer[])
+                AS retry(song_id, queued_at, delay)
+            WHERE q.song_id = retry.song_id AND q.queued_at = retry.queued_at
+            """,
+            ([r[0] for r in retry], [r[1] for r in retry], [r[2] for r in retry]),
+        )
+    db.commit()
+    return len(rows)
 
 
 @click.command("backfill-durations")
 @click.option("--workers", default=8, show_default=True, help="Concurrent probes.")
-@click.option("--all", "reprobe_all", is_flag=True, help="Re-probe songs that already have a duration.")
+@click.option(
+    "--all",
+    "reprobe_all",
+    is_flag=True,
+    help="Re-check songs that already have a duration; unchanged files reuse the cached probe.",
+)
 @with_appcontext
 def backfill_durations_command(workers: int, reprobe_all: bool):
     """Probe and store durations for songs hosted on media.world-stage.org."""
@@ -96,22 +346,48 @@ def backfill_durations_command(workers: int, reprobe_all: bool):
     click.echo(f"Probing {len(songs)} songs...")
     failed = 0
     with ThreadPoolExecutor(max_workers=workers) as pool:
-        durations = pool.map(lambda s: probe_duration(s["video_link"]), songs)
-        for i, (song, duration) in enumerate(zip(songs, durations), 1):
-            if duration is None:
-                failed += 1
-                click.echo(f"  FAILED {song['video_link']}")
-            else:
-                cursor.execute(
-                    "UPDATE song SET duration = %s WHERE id = %s",
-                    (duration, song["id"]),
-                )
-            if i % 100 == 0:
-                db.commit()
-                click.echo(f"  {i}/{len(songs)}")
-    db.commit()
+        for start in range(0, len(songs), 100):
+            chunk = songs[start : start + 100]
+            durations = probe_durations(cursor, [s["video_link"] for s in chunk], pool)
+            for song, duration in zip(chunk, durations, strict=True):
+                if duration is None:
+                    failed += 1
+                    click.echo(f"  FAILED {song['video_link']}")
+                else:
+                    cursor.execute(
+                        "UPDATE song SET duration = %s WHERE id = %s",
+                        (duration, song["id"]),
+                    )
+            db.commit()
+            click.echo(f"  {start + len(chunk)}/{len(songs)}")
     click.echo(f"Done: {len(songs) - failed} updated, {failed} failed.")
 
 
+@click.command("probe-worker")
+@click.option("--workers", default=8, show_default=True, help="Concurrent probes.")
+@click.option("--once", is_flag=True, help="Run the probes due now, then exit.")
+@with_appcontext
+def probe_worker_command(workers: int, once: bool):
+    """Probe durations for songs queued by song writes."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        if once:
+            total = 0
+            while probed := drain_probes(executor):
+                total += probed
+            click.echo(f"Processed {total} queued probes.")
+            return
+
+        pool: ConnectionPool = current_app.config["DB_POOL"]
+        with psycopg.connect(pool.conninfo, autocommit=True) as listener:
+            listener.execute("LISTEN duration_probe_queue")
+            click.echo("Waiting for probes...")
+            while True:
+                while drain_probes(executor):
+                    pass
+                for _ in listener.notifies(timeout=PROBE_POLL_INTERVAL, stop_after=1):
+                    pass
+
+
 def init_app(app: Flask):
     app.cli.add_command(backfill_durations_command)
+    app.cli.add_command(probe_worker_command)
@@ -0,0 +1,30 @@
+BEGIN;
+
+-- Outbound Last.fm / Libre.fm submissions. Radio requests only insert here;
+-- `flask scrobble-worker` drains the queue, so no request waits on the
+-- services. A newer now-playing update replaces a pending one for the same
+-- account (queued_at moves forward), and a scrobble is queued once per
+-- (account, timestamp, track) however many of a user's tabs report it.
+CREATE TABLE IF NOT EXISTS scrobble_queue (
+    id bigint PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    account_id integer NOT NULL REFERENCES scrobble_account (id) ON DELETE CASCADE,
+    kind text NOT NULL CHECK (kind IN ('now_playing', 'scrobble')),
+    artist text NOT NULL,
+    track text NOT NULL,
+    album text,
+    duration integer,
+    played_at bigint,
+    attempts integer NOT NULL DEFAULT 0,
+    queued_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    next_attempt_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CHECK ((kind = 'scrobble') = (played_at IS NOT NULL))
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS scrobble_queue_now_playing_key
+    ON scrobble_queue (account_id) WHERE kind = 'now_playing';
+CREATE UNIQUE INDEX IF NOT EXISTS scrobble_queue_scrobble_key
+    ON scrobble_queue (account_id, played_at, artist, track) WHERE kind = 'scrobble';
+CREATE INDEX IF NOT EXISTS scrobble_queue_next_attempt_idx
+    ON scrobble_queue (next_attempt_at);
+
+COMMIT;
@@ -0,0 +1,18 @@
+BEGIN;
+
+-- Songs whose media-host video_link still needs an ffprobe. Song writes
+-- store duration NULL and queue the song here; `flask probe-worker` probes
+-- in the background and fills in song.duration. Changing the link again
+-- replaces the pending probe (queued_at moves forward).
+CREATE TABLE IF NOT EXISTS duration_probe_queue (
+    song_id bigint PRIMARY KEY REFERENCES song (id) ON DELETE CASCADE,
+    video_link text NOT NULL,
+    attempts integer NOT NULL DEFAULT 0,
+    queued_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    next_attempt_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS duration_probe_queue_next_attempt_idx
+    ON duration_probe_queue (next_attempt_at);
+
+COMMIT;
@@ -0,0 +1,17 @@
+BEGIN;
+
+-- ffprobe results per media URL, with the HTTP validators the file was
+-- served with at the time. Probing first sends a HEAD request and reuses
+-- the cached duration while ETag, Last-Modified and Content-Length are
+-- unchanged, so `backfill-durations --all` only spawns ffprobe for files
+-- that were actually replaced.
+CREATE TABLE IF NOT EXISTS media_probe_cache (
+    url text PRIMARY KEY,
+    etag text,
+    last_modified text,
+    content_length bigint,
+    duration double precision NOT NULL,
+    probed_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+COMMIT;
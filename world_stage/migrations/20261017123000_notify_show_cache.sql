@@ -0,0 +1,39 @@
+BEGIN;
+
+-- Per-worker caches (world_stage/cache.py) are cleared by name when a
+-- notification arrives on the cache_invalidate channel. Triggers pass the
+-- region names to clear as arguments. Notifications are sent on commit, and
+-- Postgres collapses duplicates within a transaction, so a bulk edit costs
+-- one message per region.
+CREATE OR REPLACE FUNCTION notify_cache_invalidate()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    region text;
+BEGIN
+    FOREACH region IN ARRAY TG_ARGV LOOP
+        PERFORM pg_notify('cache_invalidate', region);
+    END LOOP;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_show_cache_invalidate ON show;
+CREATE TRIGGER trg_show_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON show
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('show');
+
+-- ShowData embeds its point system's scores.
+DROP TRIGGER IF EXISTS trg_point_cache_invalidate ON point;
+CREATE TRIGGER trg_point_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON point
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('show', 'point_system');
+
+-- "cs24-f" style keys resolve through year.special_short_name.
+DROP TRIGGER IF EXISTS trg_year_show_cache_invalidate ON year;
+CREATE TRIGGER trg_year_show_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON year
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('show');
+
+COMMIT;
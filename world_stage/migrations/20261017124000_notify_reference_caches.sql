@@ -0,0 +1,37 @@
+BEGIN;
+
+-- Reference-data regions for the per-worker caches (see
+-- 20261017123000_notify_show_cache). Each table names the regions built
+-- from it.
+DROP TRIGGER IF EXISTS trg_year_show_cache_invalidate ON year;
+DROP TRIGGER IF EXISTS trg_year_cache_invalidate ON year;
+CREATE TRIGGER trg_year_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON year
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('year', 'show');
+
+DROP TRIGGER IF EXISTS trg_country_cache_invalidate ON country;
+CREATE TRIGGER trg_country_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON country
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country');
+
+DROP TRIGGER IF EXISTS trg_language_cache_invalidate ON language;
+CREATE TRIGGER trg_language_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON language
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('language');
+
+DROP TRIGGER IF EXISTS trg_genre_cache_invalidate ON genre;
+CREATE TRIGGER trg_genre_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON genre
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('genre');
+
+DROP TRIGGER IF EXISTS trg_subgenre_cache_invalidate ON subgenre;
+CREATE TRIGGER trg_subgenre_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON subgenre
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('genre');
+
+DROP TRIGGER IF EXISTS trg_point_system_cache_invalidate ON point_system;
+CREATE TRIGGER trg_point_system_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON point_system
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('point_system', 'show');
+
+COMMIT;
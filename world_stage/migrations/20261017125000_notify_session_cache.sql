@@ -0,0 +1,21 @@
+BEGIN;
+
+-- Per-worker session cache (utils/auth.py). New sessions get fresh ids, so
+-- only removing or changing a session, or changing what it resolves to
+-- (username, role, approval, role permissions), has to clear cached entries.
+DROP TRIGGER IF EXISTS trg_session_cache_invalidate ON session;
+CREATE TRIGGER trg_session_cache_invalidate
+AFTER UPDATE OR DELETE OR TRUNCATE ON session
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('session');
+
+DROP TRIGGER IF EXISTS trg_account_session_cache_invalidate ON account;
+CREATE TRIGGER trg_account_session_cache_invalidate
+AFTER UPDATE OF username, role, approved OR DELETE ON account
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('session');
+
+DROP TRIGGER IF EXISTS trg_account_role_session_cache_invalidate ON account_role;
+CREATE TRIGGER trg_account_role_session_cache_invalidate
+AFTER UPDATE OR DELETE ON account_role
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('session');
+
+COMMIT;
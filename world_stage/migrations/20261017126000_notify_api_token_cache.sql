@@ -0,0 +1,22 @@
+BEGIN;
+
+-- Per-worker API token cache (utils/auth.py). last_used_at writes don't
+-- change what a token resolves to, so only revocation or re-pointing a
+-- token clears the region, along with the account and role changes that
+-- already clear cached sessions.
+DROP TRIGGER IF EXISTS trg_api_token_cache_invalidate ON api_token;
+CREATE TRIGGER trg_api_token_cache_invalidate
+AFTER UPDATE OF token_hash, user_id OR DELETE OR TRUNCATE ON api_token
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('api_token');
+
+DROP TRIGGER IF EXISTS trg_account_session_cache_invalidate ON account;
+CREATE TRIGGER trg_account_session_cache_invalidate
+AFTER UPDATE OF username, role, approved OR DELETE ON account
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('session', 'api_token');
+
+DROP TRIGGER IF EXISTS trg_account_role_session_cache_invalidate ON account_role;
+CREATE TRIGGER trg_account_role_session_cache_invalidate
+AFTER UPDATE OR DELETE ON account_role
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('session', 'api_token');
+
+COMMIT;
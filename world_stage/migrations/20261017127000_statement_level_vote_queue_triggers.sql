@@ -0,0 +1,142 @@
+BEGIN;
+
+-- Queue result and analytics refreshes once per statement on vote instead of
+-- once per row. A ballot write, a bulk import or a "move" of votes between
+-- sets now costs one set-based insert per queue, however many rows it touches.
+--
+-- Postgres only allows transition tables on single-event triggers, so each
+-- queue gets an INSERT, an UPDATE and a DELETE trigger sharing one function.
+
+CREATE OR REPLACE FUNCTION queue_show_result_refresh_for_vote_sets(
+    p_vote_set_ids bigint[]
+)
+RETURNS void
+LANGUAGE sql AS $$
+    -- Mirrors queue_show_result_refresh(): an official change also refreshes
+    -- the revote view of a show once Revoting has begun there.
+    INSERT INTO show_result_refresh_queue (show_id, result_mode)
+    SELECT DISTINCT vote_set.show_id, mode.result_mode
+    FROM vote_set
+    CROSS JOIN LATERAL (
+        SELECT vote_set.result_mode
+        UNION ALL
+        SELECT 'revote'
+        WHERE vote_set.result_mode = 'official'
+          AND EXISTS (
+              SELECT 1
+              FROM vote_set revote
+              WHERE revote.show_id = vote_set.show_id
+                AND revote.result_mode = 'revote'
+          )
+    ) AS mode(result_mode)
+    WHERE vote_set.id = ANY(p_vote_set_ids)
+    ON CONFLICT DO NOTHING;
+$$;
+
+CREATE OR REPLACE FUNCTION queue_analytics_show_refresh_for_vote_sets(
+    p_vote_set_ids bigint[]
+)
+RETURNS void
+LANGUAGE sql AS $$
+    -- Mirrors queue_analytics_show_refresh(): only published shows are cached,
+    -- and official ballots feed both ballot modes.
+    INSERT INTO analytics_show_refresh_queue (show_id, ballot_mode)
+    SELECT DISTINCT vote_set.show_id, mode.ballot_mode
+    FROM vote_set
+    JOIN show ON show.id = vote_set.show_id AND show.status = 'full'
+    CROSS JOIN (VALUES ('official'), ('effective')) AS mode(ballot_mode)
+    WHERE vote_set.id = ANY(p_vote_set_ids)
+      AND (mode.ballot_mode = 'effective' OR vote_set.result_mode = 'official')
+    ON CONFLICT DO NOTHING;
+$$;
+
+CREATE OR REPLACE FUNCTION trigger_queue_show_result_refresh_from_votes()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM queue_show_result_refresh_for_vote_sets(
+            ARRAY(SELECT DISTINCT vote_set_id FROM new_votes)
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM queue_show_result_refresh_for_vote_sets(
+            ARRAY(SELECT DISTINCT vote_set_id FROM old_votes)
+        );
+    ELSE
+        PERFORM queue_show_result_refresh_for_vote_sets(
+            ARRAY(
+                SELECT vote_set_id FROM old_votes
+                UNION
+                SELECT vote_set_id FROM new_votes
+            )
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_queue_analytics_from_votes()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM queue_analytics_show_refresh_for_vote_sets(
+            ARRAY(SELECT DISTINCT vote_set_id FROM new_votes)
+        );
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM queue_analytics_show_refresh_for_vote_sets(
+            ARRAY(SELECT DISTINCT vote_set_id FROM old_votes)
+        );
+    ELSE
+        PERFORM queue_analytics_show_refresh_for_vote_sets(
+            ARRAY(
+                SELECT vote_set_id FROM old_votes
+                UNION
+                SELECT vote_set_id FROM new_votes
+            )
+        );
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_queue_show_result_refresh_on_vote ON vote;
+DROP TRIGGER IF EXISTS trg_queue_analytics_on_vote ON vote;
+
+CREATE TRIGGER trg_queue_show_result_refresh_on_vote_insert
+    AFTER INSERT ON vote
+    REFERENCING NEW TABLE AS new_votes
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_queue_show_result_refresh_from_votes();
+
+CREATE TRIGGER trg_queue_show_result_refresh_on_vote_update
+    AFTER UPDATE ON vote
+    REFERENCING OLD TABLE AS old_votes NEW TABLE AS new_votes
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_queue_show_result_refresh_from_votes();
+
+CREATE TRIGGER trg_queue_show_result_refresh_on_vote_delete
+    AFTER DELETE ON vote
+    REFERENCING OLD TABLE AS old_votes
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION trigger_queue_show_result_refresh_from_votes();
+
+CREATE TRIGGER trg_queue_analytics_on_vote_insert
+    AFTER INSERT ON vote
+    REFERENCING NEW TABLE AS new_votes
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_queue_analytics_from_votes();
+
+CREATE TRIGGER trg_queue_analytics_on_vote_update
+    AFTER UPDATE ON vote
+    REFERENCING OLD TABLE AS old_votes NEW TABLE AS new_votes
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_queue_analytics_from_votes();
+
+CREATE TRIGGER trg_queue_analytics_on_vote_delete
+    AFTER DELETE ON vote
+    REFERENCING OLD TABLE AS old_votes
+    FOR EACH STATEMENT EXECUTE FUNCTION trigger_queue_analytics_from_votes();
+
+DROP FUNCTION IF EXISTS trigger_queue_show_result_refresh_from_vote();
+DROP FUNCTION IF EXISTS trigger_queue_analytics_from_vote();
+DROP FUNCTION IF EXISTS queue_show_result_refresh_from_vote_set_id(bigint);
+
+COMMIT;
@@ -0,0 +1,75 @@
+BEGIN;
+
+-- Opt-in asynchronous result refresh. By default a ballot's show results are
+-- rebuilt inside its own COMMIT (process_show_result_refresh_queue), and
+-- concurrent voters in one show wait on each other's queue row. Sessions that
+-- set world_stage.result_refresh = 'async' append a request row instead, and
+-- `flask refresh-worker` rebuilds each show at most once per debounce window.
+-- Requests are never deduplicated on insert, so voters never wait on a lock.
+
+CREATE TABLE show_result_refresh_request (
+    id bigint PRIMARY KEY GENERATED ALWAYS AS IDENTITY,
+    show_id bigint NOT NULL REFERENCES show (id) ON DELETE CASCADE,
+    result_mode text NOT NULL
+        CHECK (result_mode IN ('official', 'revote')),
+    requested_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX show_result_refresh_request_show_idx
+    ON show_result_refresh_request (show_id, result_mode);
+
+-- One row per (show, mode) the worker has refreshed. The worker locks it
+-- while refreshing, so each show is rebuilt by one worker at a time.
+CREATE TABLE show_result_refresh_state (
+    show_id bigint NOT NULL REFERENCES show (id) ON DELETE CASCADE,
+    result_mode text NOT NULL
+        CHECK (result_mode IN ('official', 'revote')),
+    refreshed_at timestamptz,
+    PRIMARY KEY (show_id, result_mode)
+);
+
+CREATE OR REPLACE FUNCTION refresh_show_result(
+    p_show_id bigint, p_result_mode text
+)
+RETURNS void AS $$
+BEGIN
+    IF p_result_mode = 'revote' THEN
+        PERFORM refresh_revote_penalties(p_show_id);
+    END IF;
+
+    PERFORM refresh_show_results_for_mode(p_show_id, p_result_mode);
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION process_show_result_refresh_queue()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM refresh_show_result(NEW.show_id, NEW.result_mode);
+
+    DELETE FROM show_result_refresh_queue
+    WHERE show_id = NEW.show_id AND result_mode = NEW.result_mode;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Skipping the queue insert also skips its deferred refresh trigger.
+CREATE OR REPLACE FUNCTION redirect_show_result_refresh()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('world_stage.result_refresh', true) IS DISTINCT FROM 'async' THEN
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO show_result_refresh_request (show_id, result_mode)
+    VALUES (NEW.show_id, NEW.result_mode);
+    PERFORM pg_notify('show_result_refresh', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_redirect_show_result_refresh
+    BEFORE INSERT ON show_result_refresh_queue
+    FOR EACH ROW
+    EXECUTE FUNCTION redirect_show_result_refresh();
+
+COMMIT;
@@ -0,0 +1,665 @@
+BEGIN;
+
+-- Apply ballot changes to country_show_results as deltas instead of
+-- rebuilding the show from every vote.
+--
+-- Vote writes record per-(song, score) count changes in show_result_delta and
+-- queue a cheap rerank. The rerank folds the deltas into point_distribution,
+-- then recomputes totals, places and percentages from the distributions plus
+-- the current vote_set counts: O(changed votes + songs + voters), with no
+-- scan of vote. Anything else (song_show, points, a vote_set moved between
+-- shows or countries) still queues a full rebuild, and so does a rerank that
+-- finds the materialized rows out of step with the show's entries.
+
+CREATE TABLE show_result_delta (
+    show_id bigint NOT NULL REFERENCES show (id) ON DELETE CASCADE,
+    result_mode text NOT NULL
+        CHECK (result_mode IN ('official', 'revote')),
+    song_id bigint NOT NULL,
+    score integer NOT NULL,
+    delta integer NOT NULL
+);
+
+CREATE INDEX show_result_delta_show_idx ON show_result_delta (show_id, result_mode);
+
+ALTER TABLE show_result_refresh_queue
+    ADD COLUMN full_rebuild boolean NOT NULL DEFAULT true;
+ALTER TABLE show_result_refresh_request
+    ADD COLUMN full_rebuild boolean NOT NULL DEFAULT true;
+
+CREATE OR REPLACE FUNCTION queue_show_result_refresh(
+    p_show_id bigint, p_result_mode text
+)
+RETURNS void AS $$
+BEGIN
+    IF p_show_id IS NULL OR p_result_mode IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO show_result_refresh_queue (show_id, result_mode, full_rebuild)
+    VALUES (p_show_id, p_result_mode, true)
+    ON CONFLICT (show_id, result_mode) DO UPDATE SET full_rebuild = true
+    WHERE NOT show_result_refresh_queue.full_rebuild;
+
+    -- Revote results use official ballots until a voter replaces their ballot.
+    -- Keep that view current when an official ballot changes after revoting began.
+    IF p_result_mode = 'official' AND EXISTS (
+        SELECT 1
+        FROM vote_set
+        WHERE show_id = p_show_id AND result_mode = 'revote'
+    ) THEN
+        INSERT INTO show_result_refresh_queue (show_id, result_mode, full_rebuild)
+        VALUES (p_show_id, 'revote', true)
+        ON CONFLICT (show_id, result_mode) DO UPDATE SET full_rebuild = true
+        WHERE NOT show_result_refresh_queue.full_rebuild;
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION queue_show_result_rerank(
+    p_show_id bigint, p_result_mode text
+)
+RETURNS void AS $$
+BEGIN
+    IF p_show_id IS NULL OR p_result_mode IS NULL THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO show_result_refresh_queue (show_id, result_mode, full_rebuild)
+    VALUES (p_show_id, p_result_mode, false)
+    ON CONFLICT DO NOTHING;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Count changes to the results of every (show, mode) the given votes feed,
+-- using the same ballot and same-country rules as
+-- refresh_show_results_for_mode. With p_result_mode, the changes count
+-- towards that mode only (a Revote ballot replacing an official one).
+CREATE OR REPLACE FUNCTION record_show_result_deltas(
+    p_vote_set_ids bigint[],
+    p_song_ids bigint[],
+    p_scores integer[],
+    p_signs integer[],
+    p_result_mode text DEFAULT NULL
+)
+RETURNS void
+LANGUAGE sql AS $$
+    WITH changes AS (
+        SELECT vs.show_id, vs.voter_id, vs.country_id AS voter_country_id,
+            vs.result_mode AS ballot_mode, c.song_id, c.score, c.sign
+        FROM unnest(p_vote_set_ids, p_song_ids, p_scores, p_signs)
+            AS c(vote_set_id, song_id, score, sign)
+        JOIN vote_set vs ON vs.id = c.vote_set_id
+        WHERE c.song_id IS NOT NULL
+    ),
+    counted AS (
+        SELECT ch.show_id, mode.result_mode, ch.song_id, ch.score, ch.sign
+        FROM changes ch
+        JOIN show si ON si.id = ch.show_id
+        JOIN song s ON s.id = ch.song_id
+        CROSS JOIN LATERAL (
+            SELECT p_result_mode WHERE p_result_mode IS NOT NULL
+            UNION ALL
+            SELECT ch.ballot_mode WHERE p_result_mode IS NULL
+            UNION ALL
+            -- As in queue_show_result_refresh, an official ballot only feeds
+            -- the revote results once revoting has begun in the show.
+            SELECT 'revote'
+            WHERE p_result_mode IS NULL
+              AND ch.ballot_mode = 'official'
+              AND EXISTS (
+                  SELECT 1 FROM vote_set revote
+                  WHERE revote.show_id = ch.show_id AND revote.result_mode = 'revote'
+              )
+              AND NOT EXISTS (
+                  SELECT 1 FROM vote_set replacement
+                  WHERE replacement.show_id = ch.show_id
+                    AND replacement.voter_id = ch.voter_id
+                    AND replacement.result_mode = 'revote'
+              )
+        ) AS mode(result_mode)
+        WHERE
+            mode.result_mode = 'revote'
+            OR (si.year_id IS NULL OR si.year_id < 0 OR si.year_id >= 1979)
+            OR (si.year_id BETWEEN 1965 AND 1978
+                AND ch.voter_country_id IS DISTINCT FROM s.country_id)
+            OR (si.year_id >= 0 AND si.year_id < 1965 AND si.year_id <> 1960
+                AND ch.voter_country_id IS DISTINCT FROM s.country_id)
+            OR (si.year_id = 1960 AND (
+                ch.voter_country_id IS DISTINCT FROM s.country_id
+                OR (ch.voter_country_id = s.country_id AND ch.score = 1)
+            ))
+    ),
+    recorded AS (
+        INSERT INTO show_result_delta (show_id, result_mode, song_id, score, delta)
+        SELECT show_id, result_mode, song_id, score, SUM(sign)
+        FROM counted
+        WHERE score IS NOT NULL
+        GROUP BY show_id, result_mode, song_id, score
+        HAVING SUM(sign) <> 0
+    )
+    -- point_distribution has no slot for a vote without a score, which the
+    -- full rebuild still counts as received.
+    INSERT INTO show_result_refresh_queue (show_id, result_mode, full_rebuild)
+    SELECT show_id, result_mode, bool_or(score IS NULL)
+    FROM counted
+    GROUP BY show_id, result_mode
+    ON CONFLICT (show_id, result_mode) DO UPDATE SET full_rebuild = true
+    WHERE EXCLUDED.full_rebuild AND NOT show_result_refresh_queue.full_rebuild;
+$$;
+
+CREATE OR REPLACE FUNCTION record_ballot_show_result_deltas(
+    p_vote_set_id bigint, p_result_mode text, p_sign integer
+)
+RETURNS void AS $$
+DECLARE
+    v_vote_set_ids bigint[];
+    v_song_ids bigint[];
+    v_scores integer[];
+    v_signs integer[];
+BEGIN
+    SELECT array_agg(vote_set_id), array_agg(song_id), array_agg(score), array_agg(p_sign)
+    INTO v_vote_set_ids, v_song_ids, v_scores, v_signs
+    FROM vote
+    WHERE vote_set_id = p_vote_set_id;
+
+    IF v_vote_set_ids IS NOT NULL THEN
+        PERFORM record_show_result_deltas(
+            v_vote_set_ids, v_song_ids, v_scores, v_signs, p_result_mode
+        );
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION trigger_queue_show_result_refresh_from_votes()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_vote_set_ids bigint[];
+    v_song_ids bigint[];
+    v_scores integer[];
+    v_signs integer[];
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT array_agg(vote_set_id), array_agg(song_id), array_agg(score), array_agg(1)
+        INTO v_vote_set_ids, v_song_ids, v_scores, v_signs
+        FROM new_votes;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT array_agg(vote_set_id), array_agg(song_id), array_agg(score), array_agg(-1)
+        INTO v_vote_set_ids, v_song_ids, v_scores, v_signs
+        FROM old_votes;
+    ELSE
+        SELECT array_agg(vote_set_id), array_agg(song_id), array_agg(score), array_agg(sign)
+        INTO v_vote_set_ids, v_song_ids, v_scores, v_signs
+        FROM (
+            SELECT vote_set_id, song_id, score, 1 AS sign FROM new_votes
+            UNION ALL
+            SELECT vote_set_id, song_id, score, -1 FROM old_votes
+        ) changes;
+    END IF;
+
+    IF v_vote_set_ids IS NOT NULL THEN
+        PERFORM record_show_result_deltas(v_vote_set_ids, v_song_ids, v_scores, v_signs);
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- A new or deleted ballot changes voter counts (a rerank); its votes are
+-- counted by the vote trigger. A Revote ballot also swaps the voter's
+-- official ballot out of (or back into) the revote results. Edits that move
+-- a ballot between shows, modes, voters or countries rebuild in full, and
+-- nickname or IP changes don't touch results at all.
+CREATE OR REPLACE FUNCTION trigger_queue_show_result_refresh_from_vote_set()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_ballot vote_set;
+    v_official_id bigint;
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        IF NEW.show_id IS DISTINCT FROM OLD.show_id
+           OR NEW.result_mode IS DISTINCT FROM OLD.result_mode
+           OR NEW.voter_id IS DISTINCT FROM OLD.voter_id
+           OR NEW.country_id IS DISTINCT FROM OLD.country_id THEN
+            PERFORM queue_show_result_refresh(OLD.show_id, OLD.result_mode);
+            PERFORM queue_show_result_refresh(NEW.show_id, NEW.result_mode);
+        END IF;
+        RETURN NEW;
+    END IF;
+
+    IF TG_OP = 'INSERT' THEN
+        v_ballot := NEW;
+    ELSE
+        v_ballot := OLD;
+    END IF;
+
+    -- Official changes only reach the revote rows while a Revote ballot
+    -- exists, so after the last one was deleted they may be stale: the
+    -- first ballot back rebuilds them instead of applying deltas on top.
+    IF TG_OP = 'INSERT' AND v_ballot.result_mode = 'revote' AND NOT EXISTS (
+        SELECT 1 FROM vote_set
+        WHERE show_id = v_ballot.show_id AND result_mode = 'revote' AND id <> v_ballot.id
+    ) THEN
+        PERFORM queue_show_result_refresh(v_ballot.show_id, 'revote');
+        RETURN v_ballot;
+    END IF;
+
+    PERFORM queue_show_result_rerank(v_ballot.show_id, v_ballot.result_mode);
+
+    IF v_ballot.result_mode = 'revote' THEN
+        SELECT id INTO v_official_id
+        FROM vote_set
+        WHERE show_id = v_ballot.show_id
+          AND voter_id = v_ballot.voter_id
+          AND result_mode = 'official';
+        IF FOUND THEN
+            PERFORM record_ballot_show_result_deltas(
+                v_official_id, 'revote', CASE WHEN TG_OP = 'INSERT' THEN -1 ELSE 1 END
+            );
+        END IF;
+    ELSIF EXISTS (
+        SELECT 1 FROM vote_set
+        WHERE show_id = v_ballot.show_id AND result_mode = 'revote'
+    ) THEN
+        PERFORM queue_show_result_rerank(v_ballot.show_id, 'revote');
+    END IF;
+
+    RETURN v_ballot;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION add_point_distribution(p_distribution jsonb, p_deltas jsonb)
+RETURNS jsonb
+LANGUAGE sql IMMUTABLE AS $$
+    SELECT COALESCE(jsonb_object_agg(score, total) FILTER (WHERE total <> 0), '{}'::jsonb)
+    FROM (
+        SELECT entries.key AS score, SUM(entries.value::integer) AS total
+        FROM (
+            SELECT * FROM jsonb_each_text(p_distribution)
+            UNION ALL
+            SELECT * FROM jsonb_each_text(p_deltas)
+        ) entries
+        GROUP BY entries.key
+    ) totals;
+$$;
+
+-- Fold pending deltas into a show's materialized rows and re-rank them.
+-- Returns false, changing nothing, when the rows no longer match the show's
+-- participating entries and a full rebuild is needed instead.
+CREATE OR REPLACE FUNCTION rerank_show_results(
+    p_show_id bigint, p_result_mode text
+)
+RETURNS boolean AS $$
+DECLARE
+    v_max_point integer;
+    v_updated integer;
+BEGIN
+    IF p_result_mode NOT IN ('official', 'revote') THEN
+        RAISE EXCEPTION 'Unknown result mode: %', p_result_mode;
+    END IF;
+
+    -- Wait out any other refresh of these rows, so the statements below
+    -- read every change committed before them.
+    PERFORM 1 FROM country_show_results
+    WHERE show_id = p_show_id AND result_mode = p_result_mode
+    FOR UPDATE;
+
+    IF EXISTS (
+        SELECT ss.song_id
+        FROM song_show ss
+        JOIN song s ON s.id = ss.song_id
+        JOIN country c ON c.id = s.country_id
+        WHERE ss.show_id = p_show_id AND c.is_participating
+        EXCEPT
+        SELECT song_id FROM country_show_results
+        WHERE show_id = p_show_id AND result_mode = p_result_mode
+    ) OR EXISTS (
+        SELECT song_id FROM country_show_results
+        WHERE show_id = p_show_id AND result_mode = p_result_mode
+        EXCEPT
+        SELECT ss.song_id
+        FROM song_show ss
+        JOIN song s ON s.id = ss.song_id
+        JOIN country c ON c.id = s.country_id
+        WHERE ss.show_id = p_show_id AND c.is_participating
+    ) THEN
+        RETURN false;
+    END IF;
+
+    WITH consumed AS (
+        DELETE FROM show_result_delta
+        WHERE show_id = p_show_id AND result_mode = p_result_mode
+        RETURNING song_id, score, delta
+    ),
+    per_song AS (
+        SELECT song_id, jsonb_object_agg(score::text, delta) AS deltas
+        FROM (
+            SELECT song_id, score, SUM(delta) AS delta
+            FROM consumed
+            GROUP BY song_id, score
+        ) per_score
+        GROUP BY song_id
+    )
+    UPDATE country_show_results r
+    SET point_distribution = add_point_distribution(r.point_distribution, per_song.deltas)
+    FROM per_song
+    WHERE r.show_id = p_show_id
+      AND r.result_mode = p_result_mode
+      AND r.song_id = per_song.song_id;
+
+    SELECT MAX(p.score)
+    INTO v_max_point
+    FROM show sh
+    JOIN point p ON p.point_system_id = sh.point_system_id
+    WHERE sh.id = p_show_id;
+
+    WITH si AS (
+        SELECT sh.id, sh.year_id, sh.dtf, sh.sc, sh.special, sh.short_name
+        FROM show sh WHERE sh.id = p_show_id
+    ),
+    all_vote_sets AS (
+        SELECT * FROM effective_show_vote_sets(p_show_id, p_result_mode)
+    ),
+    voters_by_country AS (
+        SELECT vs.country_id, COUNT(*) AS cnt
+        FROM all_vote_sets vs
+        WHERE vs.country_id IS NOT NULL
+        GROUP BY vs.country_id
+    ),
+    totals AS (
+        SELECT COUNT(*) AS total_valid FROM all_vote_sets
+    ),
+    tallied AS (
+        SELECT r.song_id, r.country_id,
+            GREATEST(
+                COALESCE(SUM(d.key::integer * d.value::integer), 0)
+                    - COALESCE(CASE WHEN p_result_mode = 'revote' THEN ss.revote_penalty
+                                    ELSE ss.penalty END, 0),
+                0
+            ) AS total_points,
+            COALESCE(SUM(d.value::integer), 0) AS total_votes_received,
+            COALESCE(
+                STRING_AGG(
+                    LPAD(d.key, 3, '0') || ':' || LPAD(d.value, 3, '0'),
+                    ',' ORDER BY d.key::integer DESC
+                ),
+                ''
+            ) AS countback_string
+        FROM country_show_results r
+        JOIN song_show ss ON ss.show_id = r.show_id AND ss.song_id = r.song_id
+        LEFT JOIN LATERAL jsonb_each_text(r.point_distribution) d ON true
+        WHERE r.show_id = p_show_id AND r.result_mode = p_result_mode
+        GROUP BY r.song_id, r.country_id, ss.penalty, ss.revote_penalty
+    ),
+    ranked AS (
+        SELECT t.*,
+            DENSE_RANK() OVER (
+                ORDER BY total_points DESC, total_votes_received DESC, countback_string DESC
+            ) AS place,
+            COUNT(*) OVER () AS total_countries,
+            CASE
+                WHEN v_max_point IS NULL THEN 0
+                WHEN si.year_id IS NULL OR si.year_id < 0 OR si.year_id >= 1979
+                    THEN v_max_point * (SELECT total_valid FROM totals)
+                WHEN (si.year_id BETWEEN 1966 AND 1978)
+                     OR (si.year_id = 1965 AND si.short_name = 'f')
+                    THEN v_max_point * GREATEST(
+                        (SELECT total_valid FROM totals) - COALESCE(vbc.cnt, 0), 0
+                    )
+                WHEN si.year_id = 1960
+                    THEN v_max_point * GREATEST(
+                        (SELECT total_valid FROM totals) - COALESCE(vbc.cnt, 0), 0
+                    ) + COALESCE(vbc.cnt, 0)
+                ELSE v_max_point * GREATEST(
+                    (SELECT total_valid FROM totals) - COALESCE(vbc.cnt, 0), 0
+                )
+            END AS max_possible_points_calc,
+            si.short_name, si.dtf, si.sc, si.special
+        FROM tallied t
+        CROSS JOIN si
+        LEFT JOIN voters_by_country vbc ON vbc.country_id = t.country_id
+    )
+    UPDATE country_show_results r
+    SET total_points = ranked.total_points,
+        total_votes_received = ranked.total_votes_received,
+        place = ranked.place,
+        total_countries = ranked.total_countries,
+        placement_percentage = ROUND(CASE
+            WHEN ranked.place = ranked.total_countries THEN 0
+            WHEN ranked.total_countries > 1 THEN ((ranked.total_countries - ranked.place)::numeric
+                / (ranked.total_countries - 1)) * 100
+            ELSE 100
+        END, 2),
+        max_possible_points = COALESCE(ranked.max_possible_points_calc, 0),
+        points_percentage = ROUND(COALESCE(ranked.total_points::numeric
+            / NULLIF(ranked.max_possible_points_calc::numeric, 0), 0) * 100, 2),
+        entry_status = CASE
+            WHEN ranked.short_name = 'f' THEN NULL
+            WHEN ranked.place <= COALESCE(ranked.dtf, 0) THEN 'dtf'
+            WHEN ranked.place <= COALESCE(ranked.dtf, 0) + COALESCE(ranked.special, 0)
+                THEN 'special'
+            WHEN ranked.place <= COALESCE(ranked.dtf, 0) + COALESCE(ranked.special, 0)
+                + COALESCE(ranked.sc, 0) THEN 'sc'
+            ELSE 'nq'
+        END,
+        max_pts = v_max_point,
+        total_voters = (SELECT total_valid FROM totals),
+        calculated_at = CURRENT_TIMESTAMP
+    FROM ranked
+    WHERE r.show_id = p_show_id
+      AND r.result_mode = p_result_mode
+      AND r.song_id = ranked.song_id;
+
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RAISE NOTICE 'Refreshed % results for show %; rows=%', p_result_mode, p_show_id, v_updated;
+    RETURN true;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The full rebuild consumes pending deltas in the same statement that reads
+-- the votes, so both see one snapshot: every delta it drops is already in
+-- the votes it counts, and a ballot committed after it keeps its delta.
+CREATE OR REPLACE FUNCTION refresh_show_results_for_mode(
+    p_show_id bigint, p_result_mode text
+)
+RETURNS void AS $$
+DECLARE
+    v_max_point integer;
+    v_inserted integer;
+BEGIN
+    IF p_result_mode NOT IN ('official', 'revote') THEN
+        RAISE EXCEPTION 'Unknown result mode: %', p_result_mode;
+    END IF;
+
+    SELECT MAX(p.score)
+    INTO v_max_point
+    FROM show sh
+    JOIN point p ON p.point_system_id = sh.point_system_id
+    WHERE sh.id = p_show_id;
+
+    DELETE FROM country_show_results
+    WHERE show_id = p_show_id AND result_mode = p_result_mode;
+
+    WITH consumed AS (
+        DELETE FROM show_result_delta
+        WHERE show_id = p_show_id AND result_mode = p_result_mode
+    ),
+    si AS (
+        SELECT sh.id, sh.year_id, sh.dtf, sh.sc, sh.special, sh.short_name, sh.show_name
+        FROM show sh WHERE sh.id = p_show_id
+    ),
+    all_vote_sets AS (
+        SELECT * FROM effective_show_vote_sets(p_show_id, p_result_mode)
+    ),
+    voters_by_country AS (
+        SELECT vs.country_id, COUNT(*) AS cnt
+        FROM all_vote_sets vs
+        WHERE vs.country_id IS NOT NULL
+        GROUP BY vs.country_id
+    ),
+    totals AS (
+        SELECT COUNT(*) AS total_valid FROM all_vote_sets
+    ),
+    point_counts AS (
+        SELECT s.id AS song_id, s.country_id, v.score, COUNT(*) AS cnt
+        FROM si
+        JOIN song_show ss ON ss.show_id = si.id
+        JOIN song s ON s.id = ss.song_id
+        JOIN vote v ON v.song_id = s.id
+        JOIN all_vote_sets vs ON vs.id = v.vote_set_id
+        WHERE
+            p_result_mode = 'revote'
+            OR (si.year_id IS NULL OR si.year_id < 0 OR si.year_id >= 1979)
+            OR (si.year_id BETWEEN 1965 AND 1978 AND vs.country_id IS DISTINCT FROM s.country_id)
+            OR (si.year_id >= 0 AND si.year_id < 1965 AND si.year_id <> 1960
+                AND vs.country_id IS DISTINCT FROM s.country_id)
+            OR (si.year_id = 1960 AND (
+                vs.country_id IS DISTINCT FROM s.country_id
+                OR (vs.country_id = s.country_id AND v.score = 1)
+            ))
+        GROUP BY s.id, s.country_id, v.score
+    ),
+    aggregated AS (
+        SELECT
+            s.country_id, c.name AS country_name, si.id AS show_id, s.id AS song_id,
+            ss.running_order, si.show_name, si.short_name, si.year_id,
+            si.dtf, si.sc, si.special,
+            GREATEST(COALESCE(SUM(pc.score * pc.cnt), 0) - COALESCE(CASE WHEN p_result_mode = 'revote' THEN ss.revote_penalty ELSE ss.penalty END, 0), 0)
+                AS total_points,
+            COALESCE(SUM(pc.cnt), 0) AS total_votes_received,
+            COALESCE(
+                JSONB_OBJECT_AGG(pc.score::text, pc.cnt ORDER BY pc.score DESC)
+                    FILTER (WHERE pc.score IS NOT NULL),
+                '{}'::jsonb
+            ) AS point_distribution,
+            COALESCE(
+                STRING_AGG(
+                    LPAD(pc.score::text, 3, '0') || ':' || LPAD(pc.cnt::text, 3, '0'),
+                    ',' ORDER BY pc.score DESC
+                ) FILTER (WHERE pc.score IS NOT NULL),
+                ''
+            ) AS countback_string,
+            (SELECT total_valid FROM totals) AS total_voters,
+            CASE
+                WHEN v_max_point IS NULL THEN 0
+                WHEN si.year_id IS NULL OR si.year_id < 0 OR si.year_id >= 1979
+                    THEN v_max_point * (SELECT total_valid FROM totals)
+                WHEN (si.year_id BETWEEN 1966 AND 1978)
+                     OR (si.year_id = 1965 AND si.short_name = 'f')
+                    THEN v_max_point * GREATEST(
+                        (SELECT total_valid FROM totals) - COALESCE(vbc.cnt, 0), 0
+                    )
+                WHEN si.year_id = 1960
+                    THEN v_max_point * GREATEST(
+                        (SELECT total_valid FROM totals) - COALESCE(vbc.cnt, 0), 0
+                    ) + COALESCE(vbc.cnt, 0)
+                ELSE v_max_point * GREATEST(
+                    (SELECT total_valid FROM totals) - COALESCE(vbc.cnt, 0), 0
+                )
+            END AS max_possible_points_calc
+        FROM si
+        JOIN song_show ss ON ss.show_id = si.id
+        JOIN song s ON s.id = ss.song_id
+        JOIN country c ON c.id = s.country_id
+        LEFT JOIN point_counts pc ON pc.song_id = s.id
+        LEFT JOIN voters_by_country vbc ON vbc.country_id = s.country_id
+        WHERE c.is_participating
+        GROUP BY s.country_id, c.name, si.id, s.id, ss.running_order, ss.penalty, ss.revote_penalty,
+            si.show_name, si.short_name, si.year_id, si.dtf, si.sc, si.special, vbc.cnt
+    ),
+    ranked AS (
+        SELECT a.*, DENSE_RANK() OVER (
+            ORDER BY total_points DESC, total_votes_received DESC, countback_string DESC
+        ) AS place, COUNT(*) OVER () AS total_countries
+        FROM aggregated a
+    )
+    INSERT INTO country_show_results (
+        country_id, country_name, show_id, show_name, short_name, year_id,
+        song_id, running_order, total_points, total_votes_received, point_distribution,
+        place, total_countries, placement_percentage, max_possible_points,
+        points_percentage, entry_status, max_pts, total_voters, result_mode
+    )
+    SELECT
+        r.country_id, r.country_name, r.show_id, r.show_name, r.short_name, r.year_id,
+        r.song_id, r.running_order, r.total_points, r.total_votes_received,
+        r.point_distribution, r.place, r.total_countries,
+        ROUND(CASE
+            WHEN r.place = r.total_countries THEN 0
+            WHEN r.total_countries > 1 THEN ((r.total_countries - r.place)::numeric
+                / (r.total_countries - 1)) * 100
+            ELSE 100
+        END, 2),
+        COALESCE(r.max_possible_points_calc, 0),
+        ROUND(COALESCE(r.total_points::numeric
+            / NULLIF(r.max_possible_points_calc::numeric, 0), 0) * 100, 2),
+        CASE
+            WHEN r.short_name = 'f' THEN NULL
+            WHEN r.place <= COALESCE(r.dtf, 0) THEN 'dtf'
+            WHEN r.place <= COALESCE(r.dtf, 0) + COALESCE(r.special, 0) THEN 'special'
+            WHEN r.place <= COALESCE(r.dtf, 0) + COALESCE(r.special, 0)
+                + COALESCE(r.sc, 0) THEN 'sc'
+            ELSE 'nq'
+        END,
+        v_max_point, r.total_voters, p_result_mode
+    FROM ranked r;
+
+    GET DIAGNOSTICS v_inserted = ROW_COUNT;
+    RAISE NOTICE 'Refreshed % results for show %; rows=%', p_result_mode, p_show_id, v_inserted;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP FUNCTION IF EXISTS refresh_show_result(bigint, text);
+
+CREATE OR REPLACE FUNCTION refresh_show_result(
+    p_show_id bigint, p_result_mode text, p_full_rebuild boolean DEFAULT true
+)
+RETURNS void AS $$
+BEGIN
+    IF p_result_mode = 'revote' THEN
+        PERFORM refresh_revote_penalties(p_show_id);
+    END IF;
+
+    IF p_full_rebuild OR NOT rerank_show_results(p_show_id, p_result_mode) THEN
+        PERFORM refresh_show_results_for_mode(p_show_id, p_result_mode);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION process_show_result_refresh_queue()
+RETURNS TRIGGER AS $$
+DECLARE
+    v_full_rebuild boolean;
+BEGIN
+    -- Read the flag now: a later write in the transaction may have asked
+    -- for a full rebuild after this row was queued as a rerank.
+    SELECT full_rebuild INTO v_full_rebuild
+    FROM show_result_refresh_queue
+    WHERE show_id = NEW.show_id AND result_mode = NEW.result_mode;
+    IF NOT FOUND THEN
+        RETURN NEW;
+    END IF;
+
+    PERFORM refresh_show_result(NEW.show_id, NEW.result_mode, v_full_rebuild);
+
+    DELETE FROM show_result_refresh_queue
+    WHERE show_id = NEW.show_id AND result_mode = NEW.result_mode;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION redirect_show_result_refresh()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF current_setting('world_stage.result_refresh', true) IS DISTINCT FROM 'async' THEN
+        RETURN NEW;
+    END IF;
+
+    INSERT INTO show_result_refresh_request (show_id, result_mode, full_rebuild)
+    VALUES (NEW.show_id, NEW.result_mode, NEW.full_rebuild);
+    PERFORM pg_notify('show_result_refresh', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP FUNCTION IF EXISTS queue_show_result_refresh_for_vote_sets(bigint[]);
+
+COMMIT;
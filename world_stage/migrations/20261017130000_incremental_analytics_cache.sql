@@ -0,0 +1,537 @@
+BEGIN;
+
+-- Refresh the analytics caches per changed ballot instead of per show.
+--
+-- Taste similarity is a self-join over every voter pair in a show, but each
+-- row only depends on its two ballots: a changed ballot invalidates the pairs
+-- involving its voter and nothing else. Vote writes now queue the voters they
+-- touched, and the deferred refresh recomputes just their pairs. The country
+-- and submitter bias caches compare each voter with everyone else's share of
+-- the points, so they are still rebuilt per show, but from per-song totals
+-- rather than a voter-by-voter join.
+--
+-- Anything that changes a show as a whole (publication, entries, countries,
+-- submitters, the point system, moving a ballot) still queues a full rebuild.
+
+CREATE TABLE analytics_voter_refresh_queue (
+    show_id bigint NOT NULL,
+    ballot_mode text NOT NULL CHECK (ballot_mode IN ('official', 'effective')),
+    voter_id bigint NOT NULL,
+    PRIMARY KEY (show_id, ballot_mode, voter_id)
+);
+
+ALTER TABLE analytics_show_refresh_queue
+    ADD COLUMN full_rebuild boolean NOT NULL DEFAULT true;
+
+-- Country and submitter bias for one show and ballot mode.
+CREATE OR REPLACE FUNCTION refresh_bias_show_cache(
+    p_show_id bigint,
+    p_ballot_mode text
+)
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_year_id bigint;
+    v_status text;
+    v_include_revotes boolean;
+BEGIN
+    IF p_ballot_mode NOT IN ('official', 'effective') THEN
+        RAISE EXCEPTION 'Unknown analytics ballot mode: %', p_ballot_mode;
+    END IF;
+    v_include_revotes := p_ballot_mode = 'effective';
+
+    DELETE FROM country_bias_show_cache
+    WHERE show_id = p_show_id AND ballot_mode = p_ballot_mode;
+    DELETE FROM submitter_bias_show_cache
+    WHERE show_id = p_show_id AND ballot_mode = p_ballot_mode;
+
+    SELECT year_id, status INTO v_year_id, v_status
+    FROM show
+    WHERE id = p_show_id;
+
+    IF NOT FOUND OR v_status IS DISTINCT FROM 'full' THEN
+        RETURN;
+    END IF;
+
+    -- Country bias components for every voter/target pair in this show.
+    INSERT INTO country_bias_show_cache (
+        show_id, year_id, ballot_mode, voter_id, country_id,
+        parts, votings_nonblank, votings_max,
+        a_raw, e_raw, a_w, e_w, v_w
+    )
+    WITH selected_sets AS MATERIALIZED (
+        SELECT id, voter_id
+        FROM bias_vote_sets(v_include_revotes)
+        WHERE show_id = p_show_id
+    ),
+    point_max AS (
+        SELECT MAX(p.score) AS max_score
+        FROM show sh
+        JOIN point p ON p.point_system_id = sh.point_system_id
+        WHERE sh.id = p_show_id
+    ),
+    song_totals AS (
+        SELECT v.song_id, SUM(v.score) AS total
+        FROM selected_sets source
+        JOIN vote v ON v.vote_set_id = source.id
+        JOIN song_show ss ON ss.show_id = p_show_id AND ss.song_id = v.song_id
+        WHERE source.voter_id IS NOT NULL
+        GROUP BY v.song_id
+    ),
+    sc AS (
+        SELECT target.voter_id, s.country_id,
+            COALESCE(SUM(own.score), 0) AS actual,
+            COALESCE(SUM(st.total), 0) - COALESCE(SUM(own.score), 0) AS others_t
+        FROM selected_sets target
+        CROSS JOIN song_totals st
+        JOIN song s ON s.id = st.song_id
+        LEFT JOIN vote own ON own.vote_set_id = target.id AND own.song_id = st.song_id
+        WHERE s.submitter_id <> target.voter_id
+        GROUP BY target.voter_id, s.country_id
+    ),
+    pool AS (
+        SELECT voter_id, SUM(actual) AS pool_v, SUM(others_t) AS others_all
+        FROM sc
+        GROUP BY voter_id
+    ),
+    vfield AS (
+        SELECT target.voter_id, COUNT(DISTINCT s.id) AS n
+        FROM selected_sets target
+        JOIN song_show ss ON ss.show_id = p_show_id
+        JOIN song s ON s.id = ss.song_id
+        WHERE s.submitter_id <> target.voter_id
+        GROUP BY target.voter_id
+    ),
+    agg AS (
+        SELECT sc.voter_id, sc.country_id,
+            SUM(sc.actual) AS a_raw,
+            SUM(sc.others_t::numeric / NULLIF(pool.others_all, 0) * pool.pool_v) AS e_raw,
+            SUM(vfield.n * sc.actual::numeric / NULLIF(pool.pool_v, 0)) AS a_w,
+            SUM(vfield.n * sc.others_t::numeric / NULLIF(pool.others_all, 0)) AS e_w,
+            SUM(vfield.n * vfield.n * sc.others_t::numeric
+                / (NULLIF(pool.others_all, 0) * NULLIF(pool.pool_v, 0))) AS v_w
+        FROM sc
+        JOIN pool USING (voter_id)
+        JOIN vfield USING (voter_id)
+        WHERE pool.pool_v > 0
+        GROUP BY sc.voter_id, sc.country_id
+    ),
+    parts AS (
+        SELECT target.voter_id, s.country_id,
+            COUNT(*) AS parts,
+            COUNT(uv.id) AS votings_nonblank,
+            COUNT(*) FILTER (WHERE uv.score = point_max.max_score) AS votings_max
+        FROM selected_sets target
+        JOIN song_show ss ON ss.show_id = p_show_id
+        JOIN song s ON s.id = ss.song_id
+        CROSS JOIN point_max
+        LEFT JOIN vote uv ON uv.vote_set_id = target.id AND uv.song_id = s.id
+        WHERE s.submitter_id <> target.voter_id
+        GROUP BY target.voter_id, s.country_id
+    )
+    SELECT p_show_id, v_year_id, p_ballot_mode,
+        parts.voter_id, parts.country_id,
+        parts.parts, parts.votings_nonblank, parts.votings_max,
+        COALESCE(agg.a_raw, 0)::bigint,
+        COALESCE(agg.e_raw, 0),
+        COALESCE(agg.a_w, 0),
+        COALESCE(agg.e_w, 0),
+        COALESCE(agg.v_w, 0)
+    FROM parts
+    LEFT JOIN agg USING (voter_id, country_id);
+
+    -- Submitter bias uses the same additive components.  Reciprocal rows are
+    -- retained even when this show has no matching `parts` row: a pair may
+    -- become reportable because the submitter entered another shared show.
+    INSERT INTO submitter_bias_show_cache (
+        show_id, year_id, ballot_mode, voter_id, submitter_id,
+        parts, votings_nonblank, votings_max,
+        a_raw, e_raw, a_w, e_w, v_w,
+        received, received_any, received_max
+    )
+    WITH selected_sets AS MATERIALIZED (
+        SELECT id, voter_id
+        FROM bias_vote_sets(v_include_revotes)
+        WHERE show_id = p_show_id
+    ),
+    point_max AS (
+        SELECT MAX(p.score) AS max_score
+        FROM show sh
+        JOIN point p ON p.point_system_id = sh.point_system_id
+        WHERE sh.id = p_show_id
+    ),
+    song_totals AS (
+        SELECT v.song_id, SUM(v.score) AS total
+        FROM selected_sets source
+        JOIN vote v ON v.vote_set_id = source.id
+        JOIN song_show ss ON ss.show_id = p_show_id AND ss.song_id = v.song_id
+        WHERE source.voter_id IS NOT NULL
+        GROUP BY v.song_id
+    ),
+    sc AS (
+        SELECT target.voter_id, s.submitter_id,
+            COALESCE(SUM(own.score), 0) AS actual,
+            COALESCE(SUM(st.total), 0) - COALESCE(SUM(own.score), 0) AS others_t
+        FROM selected_sets target
+        CROSS JOIN song_totals st
+        JOIN song s ON s.id = st.song_id
+        LEFT JOIN vote own ON own.vote_set_id = target.id AND own.song_id = st.song_id
+        WHERE s.submitter_id <> target.voter_id
+        GROUP BY target.voter_id, s.submitter_id
+    ),
+    pool AS (
+        SELECT voter_id, SUM(actual) AS pool_v, SUM(others_t) AS others_all
+        FROM sc
+        GROUP BY voter_id
+    ),
+    vfield AS (
+        SELECT target.voter_id, COUNT(DISTINCT s.id) AS n
+        FROM selected_sets target
+        JOIN song_show ss ON ss.show_id = p_show_id
+        JOIN song s ON s.id = ss.song_id
+        WHERE s.submitter_id <> target.voter_id
+        GROUP BY target.voter_id
+    ),
+    agg AS (
+        SELECT sc.voter_id, sc.submitter_id,
+            SUM(sc.actual) AS a_raw,
+            SUM(sc.others_t::numeric / NULLIF(pool.others_all, 0) * pool.pool_v) AS e_raw,
+            SUM(vfield.n * sc.actual::numeric / NULLIF(pool.pool_v, 0)) AS a_w,
+            SUM(vfield.n * sc.others_t::numeric / NULLIF(pool.others_all, 0)) AS e_w,
+            SUM(vfield.n * vfield.n * sc.others_t::numeric
+                / (NULLIF(pool.others_all, 0) * NULLIF(pool.pool_v, 0))) AS v_w
+        FROM sc
+        JOIN pool USING (voter_id)
+        JOIN vfield USING (voter_id)
+        WHERE pool.pool_v > 0
+        GROUP BY sc.voter_id, sc.submitter_id
+    ),
+    parts AS (
+        SELECT target.voter_id, s.submitter_id,
+            COUNT(*) AS parts,
+            COUNT(uv.id) AS votings_nonblank,
+            COUNT(*) FILTER (WHERE uv.score = point_max.max_score) AS votings_max
+        FROM selected_sets target
+        JOIN song_show ss ON ss.show_id = p_show_id
+        JOIN song s ON s.id = ss.song_id
+        CROSS JOIN point_max
+        LEFT JOIN vote uv ON uv.vote_set_id = target.id AND uv.song_id = s.id
+        WHERE s.submitter_id <> target.voter_id
+        GROUP BY target.voter_id, s.submitter_id
+    ),
+    reciprocal AS (
+        SELECT s.submitter_id AS voter_id,
+            source.voter_id AS submitter_id,
+            SUM(v.score) AS received,
+            COUNT(*) AS received_any,
+            COUNT(*) FILTER (WHERE v.score = point_max.max_score) AS received_max
+        FROM selected_sets source
+        JOIN vote v ON v.vote_set_id = source.id
+        JOIN song_show ss ON ss.show_id = p_show_id AND ss.song_id = v.song_id
+        JOIN song s ON s.id = v.song_id
+        CROSS JOIN point_max
+        WHERE s.submitter_id IS NOT NULL
+          AND s.submitter_id <> source.voter_id
+        GROUP BY s.submitter_id, source.voter_id
+    ),
+    keys AS (
+        SELECT voter_id, submitter_id FROM parts
+        UNION
+        SELECT voter_id, submitter_id FROM agg
+        UNION
+        SELECT voter_id, submitter_id FROM reciprocal
+    )
+    SELECT p_show_id, v_year_id, p_ballot_mode,
+        keys.voter_id, keys.submitter_id,
+        COALESCE(parts.parts, 0),
+        COALESCE(parts.votings_nonblank, 0),
+        COALESCE(parts.votings_max, 0),
+        COALESCE(agg.a_raw, 0)::bigint,
+        COALESCE(agg.e_raw, 0),
+        COALESCE(agg.a_w, 0),
+        COALESCE(agg.e_w, 0),
+        COALESCE(agg.v_w, 0),
+        COALESCE(reciprocal.received, 0)::bigint,
+        COALESCE(reciprocal.received_any, 0),
+        COALESCE(reciprocal.received_max, 0)
+    FROM keys
+    LEFT JOIN parts USING (voter_id, submitter_id)
+    LEFT JOIN agg USING (voter_id, submitter_id)
+    LEFT JOIN reciprocal USING (voter_id, submitter_id);
+END;
+$$;
+
+-- Taste similarity rows for the pairs involving any of p_voter_ids. Each pair
+-- is computed once, from the changed voter's side, and stored in canonical
+-- (lower id, higher id) order.
+CREATE OR REPLACE FUNCTION refresh_taste_similarity_for_voters(
+    p_show_id bigint,
+    p_ballot_mode text,
+    p_voter_ids bigint[]
+)
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_year_id bigint;
+    v_status text;
+    v_include_revotes boolean;
+BEGIN
+    IF p_ballot_mode NOT IN ('official', 'effective') THEN
+        RAISE EXCEPTION 'Unknown analytics ballot mode: %', p_ballot_mode;
+    END IF;
+    v_include_revotes := p_ballot_mode = 'effective';
+
+    DELETE FROM taste_similarity_show_cache
+    WHERE show_id = p_show_id AND ballot_mode = p_ballot_mode
+      AND (voter_a_id = ANY(p_voter_ids) OR voter_b_id = ANY(p_voter_ids));
+
+    SELECT year_id, status INTO v_year_id, v_status
+    FROM show
+    WHERE id = p_show_id;
+
+    IF NOT FOUND OR v_status IS DISTINCT FROM 'full' THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO taste_similarity_show_cache (
+        show_id, year_id, ballot_mode, voter_a_id, voter_b_id,
+        co_voted_songs, covariance, variance_a, variance_b
+    )
+    WITH selected_sets AS MATERIALIZED (
+        SELECT id, voter_id
+        FROM bias_vote_sets(v_include_revotes)
+        WHERE show_id = p_show_id
+    ),
+    pair_sums AS (
+        SELECT a.voter_id AS changed_id,
+            b.voter_id AS other_id,
+            COUNT(*)::numeric AS n,
+            SUM(va.score)::numeric AS sum_a,
+            SUM(vb.score)::numeric AS sum_b,
+            SUM(va.score::numeric * vb.score) AS sum_ab,
+            SUM(va.score::numeric * va.score) AS sum_aa,
+            SUM(vb.score::numeric * vb.score) AS sum_bb
+        FROM selected_sets a
+        JOIN selected_sets b ON b.voter_id <> a.voter_id
+            -- Two changed voters pair up once, from the lower id.
+            AND (b.voter_id <> ALL(p_voter_ids) OR a.voter_id < b.voter_id)
+        JOIN vote va ON va.vote_set_id = a.id
+        JOIN vote vb ON vb.vote_set_id = b.id AND vb.song_id = va.song_id
+        JOIN song_show ss ON ss.show_id = p_show_id AND ss.song_id = va.song_id
+        JOIN song s ON s.id = va.song_id
+        WHERE a.voter_id = ANY(p_voter_ids)
+          AND s.submitter_id IS DISTINCT FROM a.voter_id
+          AND s.submitter_id IS DISTINCT FROM b.voter_id
+        GROUP BY a.voter_id, b.voter_id
+    )
+    SELECT p_show_id, v_year_id, p_ballot_mode,
+        LEAST(changed_id, other_id),
+        GREATEST(changed_id, other_id),
+        n::bigint,
+        sum_ab - sum_a * sum_b / n,
+        CASE WHEN changed_id < other_id
+            THEN sum_aa - sum_a * sum_a / n
+            ELSE sum_bb - sum_b * sum_b / n
+        END,
+        CASE WHEN changed_id < other_id
+            THEN sum_bb - sum_b * sum_b / n
+            ELSE sum_aa - sum_a * sum_a / n
+        END
+    FROM pair_sums;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION refresh_analytics_show_cache(
+    p_show_id bigint,
+    p_ballot_mode text
+)
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_year_id bigint;
+    v_status text;
+    v_include_revotes boolean;
+BEGIN
+    IF p_ballot_mode NOT IN ('official', 'effective') THEN
+        RAISE EXCEPTION 'Unknown analytics ballot mode: %', p_ballot_mode;
+    END IF;
+    v_include_revotes := p_ballot_mode = 'effective';
+
+    DELETE FROM taste_similarity_show_cache
+    WHERE show_id = p_show_id AND ballot_mode = p_ballot_mode;
+    PERFORM refresh_bias_show_cache(p_show_id, p_ballot_mode);
+
+    SELECT year_id, status INTO v_year_id, v_status
+    FROM show
+    WHERE id = p_show_id;
+
+    IF NOT FOUND OR v_status IS DISTINCT FROM 'full' THEN
+        RETURN;
+    END IF;
+
+    -- One canonical row per voter pair.  The centred covariance and variances
+    -- are additive across shows, which keeps every later filter inexpensive.
+    INSERT INTO taste_similarity_show_cache (
+        show_id, year_id, ballot_mode, voter_a_id, voter_b_id,
+        co_voted_songs, covariance, variance_a, variance_b
+    )
+    WITH selected_sets AS MATERIALIZED (
+        SELECT id, voter_id
+        FROM bias_vote_sets(v_include_revotes)
+        WHERE show_id = p_show_id
+    ),
+    pair_sums AS (
+        SELECT a.voter_id AS voter_a_id,
+            b.voter_id AS voter_b_id,
+            COUNT(*)::numeric AS n,
+            SUM(va.score)::numeric AS sum_a,
+            SUM(vb.score)::numeric AS sum_b,
+            SUM(va.score::numeric * vb.score) AS sum_ab,
+            SUM(va.score::numeric * va.score) AS sum_aa,
+            SUM(vb.score::numeric * vb.score) AS sum_bb
+        FROM selected_sets a
+        JOIN selected_sets b ON a.voter_id < b.voter_id
+        JOIN vote va ON va.vote_set_id = a.id
+        JOIN vote vb ON vb.vote_set_id = b.id AND vb.song_id = va.song_id
+        JOIN song_show ss ON ss.show_id = p_show_id AND ss.song_id = va.song_id
+        JOIN song s ON s.id = va.song_id
+        WHERE s.submitter_id IS DISTINCT FROM a.voter_id
+          AND s.submitter_id IS DISTINCT FROM b.voter_id
+        GROUP BY a.voter_id, b.voter_id
+    )
+    SELECT p_show_id, v_year_id, p_ballot_mode, voter_a_id, voter_b_id,
+        n::bigint,
+        sum_ab - sum_a * sum_b / n,
+        sum_aa - sum_a * sum_a / n,
+        sum_bb - sum_b * sum_b / n
+    FROM pair_sums;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION queue_analytics_show_refresh(
+    p_show_id bigint,
+    p_result_mode text
+)
+RETURNS void
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF p_show_id IS NULL OR p_result_mode IS NULL THEN
+        RETURN;
+    END IF;
+    IF p_result_mode NOT IN ('official', 'revote') THEN
+        RAISE EXCEPTION 'Unknown result mode: %', p_result_mode;
+    END IF;
+    IF NOT EXISTS (SELECT 1 FROM show WHERE id = p_show_id AND status = 'full') THEN
+        RETURN;
+    END IF;
+
+    -- Upgrades a pending per-voter refresh of the same show.
+    INSERT INTO analytics_show_refresh_queue AS queue (show_id, ballot_mode, full_rebuild)
+    SELECT p_show_id, mode.ballot_mode, true
+    FROM (VALUES ('official'), ('effective')) AS mode(ballot_mode)
+    WHERE mode.ballot_mode = 'effective' OR p_result_mode = 'official'
+    ON CONFLICT (show_id, ballot_mode) DO UPDATE
+    SET full_rebuild = true
+    WHERE NOT queue.full_rebuild;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION queue_analytics_show_refresh_for_vote_sets(
+    p_vote_set_ids bigint[]
+)
+RETURNS void
+LANGUAGE sql AS $$
+    -- Mirrors queue_analytics_show_refresh(): only published shows are cached,
+    -- and official ballots feed both ballot modes.
+    INSERT INTO analytics_voter_refresh_queue (show_id, ballot_mode, voter_id)
+    SELECT DISTINCT vote_set.show_id, mode.ballot_mode, vote_set.voter_id
+    FROM vote_set
+    JOIN show ON show.id = vote_set.show_id AND show.status = 'full'
+    CROSS JOIN (VALUES ('official'), ('effective')) AS mode(ballot_mode)
+    WHERE vote_set.id = ANY(p_vote_set_ids)
+      AND vote_set.voter_id IS NOT NULL
+      AND (mode.ballot_mode = 'effective' OR vote_set.result_mode = 'official')
+    ON CONFLICT DO NOTHING;
+
+    INSERT INTO analytics_show_refresh_queue (show_id, ballot_mode, full_rebuild)
+    SELECT DISTINCT vote_set.show_id, mode.ballot_mode, false
+    FROM vote_set
+    JOIN show ON show.id = vote_set.show_id AND show.status = 'full'
+    CROSS JOIN (VALUES ('official'), ('effective')) AS mode(ballot_mode)
+    WHERE vote_set.id = ANY(p_vote_set_ids)
+      AND (mode.ballot_mode = 'effective' OR vote_set.result_mode = 'official')
+    ON CONFLICT DO NOTHING;
+$$;
+
+-- A ballot appearing or disappearing only affects its voter's pairs. Moving a
+-- ballot to another show, mode or voter rebuilds both ends; other vote_set
+-- columns are not used by the analytics caches.
+CREATE OR REPLACE FUNCTION trigger_queue_analytics_from_vote_set()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM queue_analytics_show_refresh_for_vote_sets(ARRAY[NEW.id]);
+    ELSIF TG_OP = 'DELETE' THEN
+        -- The row is gone, so queue from OLD directly.
+        IF EXISTS (SELECT 1 FROM show WHERE id = OLD.show_id AND status = 'full') THEN
+            IF OLD.voter_id IS NOT NULL THEN
+                INSERT INTO analytics_voter_refresh_queue (show_id, ballot_mode, voter_id)
+                SELECT OLD.show_id, mode.ballot_mode, OLD.voter_id
+                FROM (VALUES ('official'), ('effective')) AS mode(ballot_mode)
+                WHERE mode.ballot_mode = 'effective' OR OLD.result_mode = 'official'
+                ON CONFLICT DO NOTHING;
+            END IF;
+            INSERT INTO analytics_show_refresh_queue (show_id, ballot_mode, full_rebuild)
+            SELECT OLD.show_id, mode.ballot_mode, false
+            FROM (VALUES ('official'), ('effective')) AS mode(ballot_mode)
+            WHERE mode.ballot_mode = 'effective' OR OLD.result_mode = 'official'
+            ON CONFLICT DO NOTHING;
+        END IF;
+    ELSIF NEW.show_id IS DISTINCT FROM OLD.show_id
+       OR NEW.result_mode IS DISTINCT FROM OLD.result_mode
+       OR NEW.voter_id IS DISTINCT FROM OLD.voter_id THEN
+        PERFORM queue_analytics_show_refresh(OLD.show_id, OLD.result_mode);
+        PERFORM queue_analytics_show_refresh(NEW.show_id, NEW.result_mode);
+    END IF;
+    RETURN COALESCE(NEW, OLD);
+END;
+$$;
+
+-- The trigger fires once per inserted queue row, but a full rebuild requested
+-- after the row was queued only updates it, so read the current flag.
+CREATE OR REPLACE FUNCTION process_analytics_show_refresh_queue()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_full_rebuild boolean;
+    v_voter_ids bigint[];
+BEGIN
+    SELECT full_rebuild INTO v_full_rebuild
+    FROM analytics_show_refresh_queue
+    WHERE show_id = NEW.show_id AND ballot_mode = NEW.ballot_mode;
+    IF NOT FOUND THEN
+        RETURN NEW;
+    END IF;
+
+    WITH done AS (
+        DELETE FROM analytics_voter_refresh_queue
+        WHERE show_id = NEW.show_id AND ballot_mode = NEW.ballot_mode
+        RETURNING voter_id
+    )
+    SELECT COALESCE(array_agg(voter_id), '{}') INTO v_voter_ids FROM done;
+
+    IF v_full_rebuild THEN
+        PERFORM refresh_analytics_show_cache(NEW.show_id, NEW.ballot_mode);
+    ELSE
+        PERFORM refresh_taste_similarity_for_voters(NEW.show_id, NEW.ballot_mode, v_voter_ids);
+        PERFORM refresh_bias_show_cache(NEW.show_id, NEW.ballot_mode);
+    END IF;
+
+    DELETE FROM analytics_show_refresh_queue
+    WHERE show_id = NEW.show_id AND ballot_mode = NEW.ballot_mode;
+    RETURN NEW;
+END;
+$$;
+
+COMMIT;
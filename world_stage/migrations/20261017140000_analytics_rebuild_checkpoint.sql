@@ -0,0 +1,13 @@
+BEGIN;
+
+-- Progress of `flask rebuild-analytics`: one row per (show, ballot mode)
+-- rebuilt by the current run, written in the same transaction as the
+-- rebuild, so an interrupted run can continue with --resume.
+CREATE TABLE analytics_rebuild_checkpoint (
+    show_id bigint NOT NULL REFERENCES show (id) ON DELETE CASCADE,
+    ballot_mode text NOT NULL CHECK (ballot_mode IN ('official', 'effective')),
+    rebuilt_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (show_id, ballot_mode)
+);
+
+COMMIT;
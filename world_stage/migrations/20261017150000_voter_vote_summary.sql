@@ -0,0 +1,148 @@
+BEGIN;
+
+-- One row per song of every published show a voter cast a ballot in, with
+-- the score they gave it and the columns /user/<username>/votes groups by.
+-- The votes and revotes pages read their per-country, per-submitter,
+-- per-year and medal views from here instead of re-joining every ballot
+-- the voter ever cast. Rows are kept up to date by the analytics refresh:
+-- 'official' rows with the official caches, 'revote' rows (Revote ballot
+-- where there is one, official otherwise) with the effective ones.
+CREATE TABLE voter_vote_summary (
+    voter_id bigint NOT NULL REFERENCES account (id) ON DELETE CASCADE,
+    result_mode text NOT NULL CHECK (result_mode IN ('official', 'revote')),
+    show_id bigint NOT NULL REFERENCES show (id) ON DELETE CASCADE,
+    song_id bigint NOT NULL REFERENCES song (id) ON DELETE CASCADE,
+    year_id bigint,
+    country_id text,
+    submitter_id bigint,
+    score integer,
+    place integer,
+    show_max integer,
+    PRIMARY KEY (voter_id, result_mode, show_id, song_id)
+);
+
+CREATE INDEX voter_vote_summary_country_idx
+    ON voter_vote_summary (voter_id, result_mode, country_id);
+CREATE INDEX voter_vote_summary_submitter_idx
+    ON voter_vote_summary (voter_id, result_mode, submitter_id);
+CREATE INDEX voter_vote_summary_year_idx
+    ON voter_vote_summary (voter_id, result_mode, year_id);
+CREATE INDEX voter_vote_summary_show_idx
+    ON voter_vote_summary (show_id, result_mode);
+
+-- Rebuild one show's rows for p_voter_ids, or for every voter when NULL.
+CREATE OR REPLACE FUNCTION refresh_voter_vote_summary(
+    p_show_id bigint,
+    p_ballot_mode text,
+    p_voter_ids bigint[] DEFAULT NULL
+)
+RETURNS void
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_result_mode text;
+BEGIN
+    IF p_ballot_mode NOT IN ('official', 'effective') THEN
+        RAISE EXCEPTION 'Unknown analytics ballot mode: %', p_ballot_mode;
+    END IF;
+    v_result_mode := CASE p_ballot_mode WHEN 'official' THEN 'official' ELSE 'revote' END;
+
+    DELETE FROM voter_vote_summary
+    WHERE show_id = p_show_id AND result_mode = v_result_mode
+      AND (p_voter_ids IS NULL OR voter_id = ANY(p_voter_ids));
+
+    IF NOT EXISTS (SELECT 1 FROM show WHERE id = p_show_id AND status = 'full') THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO voter_vote_summary (
+        voter_id, result_mode, show_id, song_id,
+        year_id, country_id, submitter_id, score, place, show_max
+    )
+    SELECT selected.voter_id, v_result_mode, sh.id, song.id,
+        sh.year_id, song.country_id, song.submitter_id,
+        vote.score,
+        (SELECT MIN(point.place) FROM point
+         WHERE point.point_system_id = sh.point_system_id AND point.score = vote.score),
+        (SELECT MAX(point.score) FROM point
+         WHERE point.point_system_id = sh.point_system_id)
+    FROM bias_vote_sets(p_ballot_mode = 'effective') selected
+    JOIN show sh ON sh.id = selected.show_id
+    JOIN song_show ss ON ss.show_id = sh.id
+    JOIN song ON song.id = ss.song_id
+    LEFT JOIN vote ON vote.vote_set_id = selected.id AND vote.song_id = song.id
+    WHERE selected.show_id = p_show_id
+      AND selected.voter_id IS NOT NULL
+      AND (p_voter_ids IS NULL OR selected.voter_id = ANY(p_voter_ids))
+    ON CONFLICT DO NOTHING;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION process_analytics_show_refresh_queue()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+DECLARE
+    v_full_rebuild boolean;
+    v_voter_ids bigint[];
+BEGIN
+    SELECT full_rebuild INTO v_full_rebuild
+    FROM analytics_show_refresh_queue
+    WHERE show_id = NEW.show_id AND ballot_mode = NEW.ballot_mode;
+    IF NOT FOUND THEN
+        RETURN NEW;
+    END IF;
+
+    WITH done AS (
+        DELETE FROM analytics_voter_refresh_queue
+        WHERE show_id = NEW.show_id AND ballot_mode = NEW.ballot_mode
+        RETURNING voter_id
+    )
+    SELECT COALESCE(array_agg(voter_id), '{}') INTO v_voter_ids FROM done;
+
+    IF v_full_rebuild THEN
+        PERFORM refresh_analytics_show_cache(NEW.show_id, NEW.ballot_mode);
+        PERFORM refresh_voter_vote_summary(NEW.show_id, NEW.ballot_mode);
+    ELSE
+        PERFORM refresh_taste_similarity_for_voters(NEW.show_id, NEW.ballot_mode, v_voter_ids);
+        PERFORM refresh_bias_show_cache(NEW.show_id, NEW.ballot_mode);
+        PERFORM refresh_voter_vote_summary(NEW.show_id, NEW.ballot_mode, v_voter_ids);
+    END IF;
+
+    DELETE FROM analytics_show_refresh_queue
+    WHERE show_id = NEW.show_id AND ballot_mode = NEW.ballot_mode;
+    RETURN NEW;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trigger_queue_analytics_from_show()
+RETURNS TRIGGER
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.status IS DISTINCT FROM 'full' THEN
+        DELETE FROM taste_similarity_show_cache WHERE show_id = NEW.id;
+        DELETE FROM country_bias_show_cache WHERE show_id = NEW.id;
+        DELETE FROM submitter_bias_show_cache WHERE show_id = NEW.id;
+        DELETE FROM voter_vote_summary WHERE show_id = NEW.id;
+    ELSIF TG_OP = 'INSERT'
+       OR OLD.status IS DISTINCT FROM NEW.status
+       OR OLD.year_id IS DISTINCT FROM NEW.year_id
+       OR OLD.point_system_id IS DISTINCT FROM NEW.point_system_id THEN
+        PERFORM queue_analytics_show_refresh(NEW.id, 'official');
+    END IF;
+    RETURN NEW;
+END;
+$$;
+
+DO $$
+DECLARE
+    show_row record;
+BEGIN
+    FOR show_row IN SELECT id FROM show WHERE status = 'full' LOOP
+        PERFORM refresh_voter_vote_summary(show_row.id, 'official');
+        PERFORM refresh_voter_vote_summary(show_row.id, 'effective');
+    END LOOP;
+END;
+$$;
+
+ANALYZE voter_vote_summary;
+
+COMMIT;
@@ -0,0 +1,170 @@
+BEGIN;
+
+-- The country page (songs, published results and career stats) is cached per
+-- worker in the country_page region. It only changes when one of the
+-- country's songs is edited or results are published, so the region is
+-- cleared by the tables the page is built from, and by result rows only when
+-- they are visible on it: official results of full shows and year results of
+-- closed years. Results rebuilt while a show is still being voted on don't
+-- touch the region.
+
+CREATE OR REPLACE FUNCTION notify_country_page_from_show_results()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    published boolean;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT EXISTS (
+            SELECT 1 FROM new_results r JOIN show ON show.id = r.show_id
+            WHERE r.result_mode = 'official' AND show.status = 'full'
+        ) INTO published;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT EXISTS (
+            SELECT 1 FROM old_results r JOIN show ON show.id = r.show_id
+            WHERE r.result_mode = 'official' AND show.status = 'full'
+        ) INTO published;
+    ELSE
+        SELECT EXISTS (
+            SELECT 1 FROM (
+                SELECT show_id, result_mode FROM old_results
+                UNION
+                SELECT show_id, result_mode FROM new_results
+            ) r JOIN show ON show.id = r.show_id
+            WHERE r.result_mode = 'official' AND show.status = 'full'
+        ) INTO published;
+    END IF;
+
+    IF published THEN
+        PERFORM pg_notify('cache_invalidate', 'country_page');
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION notify_country_page_from_year_results()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    published boolean;
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        SELECT EXISTS (
+            SELECT 1 FROM new_results r JOIN year ON year.id = r.year_id
+            WHERE year.status = 'closed'
+        ) INTO published;
+    ELSIF TG_OP = 'DELETE' THEN
+        SELECT EXISTS (
+            SELECT 1 FROM old_results r JOIN year ON year.id = r.year_id
+            WHERE year.status = 'closed'
+        ) INTO published;
+    ELSE
+        SELECT EXISTS (
+            SELECT 1 FROM (
+                SELECT year_id FROM old_results
+                UNION
+                SELECT year_id FROM new_results
+            ) r JOIN year ON year.id = r.year_id
+            WHERE year.status = 'closed'
+        ) INTO published;
+    END IF;
+
+    IF published THEN
+        PERFORM pg_notify('cache_invalidate', 'country_page');
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_on_show_results_insert ON country_show_results;
+CREATE TRIGGER trg_country_page_cache_on_show_results_insert
+AFTER INSERT ON country_show_results
+REFERENCING NEW TABLE AS new_results
+FOR EACH STATEMENT EXECUTE FUNCTION notify_country_page_from_show_results();
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_on_show_results_update ON country_show_results;
+CREATE TRIGGER trg_country_page_cache_on_show_results_update
+AFTER UPDATE ON country_show_results
+REFERENCING OLD TABLE AS old_results NEW TABLE AS new_results
+FOR EACH STATEMENT EXECUTE FUNCTION notify_country_page_from_show_results();
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_on_show_results_delete ON country_show_results;
+CREATE TRIGGER trg_country_page_cache_on_show_results_delete
+AFTER DELETE ON country_show_results
+REFERENCING OLD TABLE AS old_results
+FOR EACH STATEMENT EXECUTE FUNCTION notify_country_page_from_show_results();
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_on_year_results_insert ON country_year_results;
+CREATE TRIGGER trg_country_page_cache_on_year_results_insert
+AFTER INSERT ON country_year_results
+REFERENCING NEW TABLE AS new_results
+FOR EACH STATEMENT EXECUTE FUNCTION notify_country_page_from_year_results();
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_on_year_results_update ON country_year_results;
+CREATE TRIGGER trg_country_page_cache_on_year_results_update
+AFTER UPDATE ON country_year_results
+REFERENCING OLD TABLE AS old_results NEW TABLE AS new_results
+FOR EACH STATEMENT EXECUTE FUNCTION notify_country_page_from_year_results();
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_on_year_results_delete ON country_year_results;
+CREATE TRIGGER trg_country_page_cache_on_year_results_delete
+AFTER DELETE ON country_year_results
+REFERENCING OLD TABLE AS old_results
+FOR EACH STATEMENT EXECUTE FUNCTION notify_country_page_from_year_results();
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_on_results_truncate ON country_show_results;
+CREATE TRIGGER trg_country_page_cache_on_results_truncate
+AFTER TRUNCATE ON country_show_results
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_on_results_truncate ON country_year_results;
+CREATE TRIGGER trg_country_page_cache_on_results_truncate
+AFTER TRUNCATE ON country_year_results
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+-- Publishing a show or closing a year changes which results the page shows.
+DROP TRIGGER IF EXISTS trg_country_page_cache_invalidate ON show;
+CREATE TRIGGER trg_country_page_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON show
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_invalidate ON year;
+CREATE TRIGGER trg_country_page_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON year
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+-- The songs themselves, and the rows joined into them.
+DROP TRIGGER IF EXISTS trg_country_page_cache_invalidate ON song;
+CREATE TRIGGER trg_country_page_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON song
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_invalidate ON song_language;
+CREATE TRIGGER trg_country_page_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON song_language
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_invalidate ON country;
+CREATE TRIGGER trg_country_page_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON country
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_invalidate ON alternative_name;
+CREATE TRIGGER trg_country_page_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON alternative_name
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+DROP TRIGGER IF EXISTS trg_country_page_cache_invalidate ON language;
+CREATE TRIGGER trg_country_page_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON language
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+-- Submitter names; password changes and logins don't matter here.
+DROP TRIGGER IF EXISTS trg_country_page_cache_invalidate ON account;
+CREATE TRIGGER trg_country_page_cache_invalidate
+AFTER UPDATE OF username ON account
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('country_page');
+
+COMMIT;
@@ -0,0 +1,234 @@
+BEGIN;
+
+-- Data version for the render cache (world_stage/utils/render_cache.py).
+-- Archive pages are keyed by their year's newest song_audit_log row and
+-- newest result row; this per-year counter covers what the audit log doesn't
+-- record. It is a row rather than a sequence so a bump only becomes visible
+-- when the edit that caused it commits.
+--
+-- Only closed years are cached, so only closed years are bumped: edits to
+-- the open year never wait on this table's row locks. Closing a year bumps
+-- it, which retires anything cached before it was last reopened.
+CREATE TABLE render_cache_version (
+    year_id bigint PRIMARY KEY,
+    version bigint NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION bump_render_cache_versions(p_year_ids bigint[])
+RETURNS void
+LANGUAGE sql AS $$
+    -- Years are locked in id order so concurrent edits can't deadlock.
+    INSERT INTO render_cache_version (year_id, version)
+    SELECT year.id, 1
+    FROM year
+    WHERE year.id = ANY(p_year_ids) AND year.status = 'closed'
+    ORDER BY year.id
+    ON CONFLICT (year_id) DO UPDATE
+    SET version = render_cache_version.version + 1;
+$$;
+
+-- Rows that carry their own year_id (song, show).
+CREATE OR REPLACE FUNCTION bump_render_cache_version_from_year_row()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM bump_render_cache_versions(ARRAY[OLD.year_id, NEW.year_id]);
+    RETURN NULL;
+END;
+$$;
+
+-- Rows that belong to a song (languages, signatures, subgenres, running orders).
+CREATE OR REPLACE FUNCTION bump_render_cache_version_from_song_rows()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_render_cache_versions(ARRAY(
+            SELECT DISTINCT song.year_id FROM new_rows JOIN song ON song.id = new_rows.song_id
+        ));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_render_cache_versions(ARRAY(
+            SELECT DISTINCT song.year_id FROM old_rows JOIN song ON song.id = old_rows.song_id
+        ));
+    ELSE
+        PERFORM bump_render_cache_versions(ARRAY(
+            SELECT song.year_id FROM old_rows JOIN song ON song.id = old_rows.song_id
+            UNION
+            SELECT song.year_id FROM new_rows JOIN song ON song.id = new_rows.song_id
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Reference data shown on every year's pages; edited rarely, by admins.
+CREATE OR REPLACE FUNCTION bump_all_render_cache_versions()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM bump_render_cache_versions(ARRAY(SELECT id FROM year));
+    RETURN NULL;
+END;
+$$;
+
+-- Looked up on every cacheable page view.
+CREATE INDEX song_audit_log_year_idx ON song_audit_log (song_year_id, id);
+
+-- Song columns the pages render that the audit trigger doesn't log. A song
+-- moved between years is logged under its new year only, so both are bumped.
+-- duration is left out: the probe worker writes it in the background, and a
+-- song page shows the new length once the entry is next edited.
+DROP TRIGGER IF EXISTS trg_render_cache_version ON song;
+CREATE TRIGGER trg_render_cache_version
+AFTER UPDATE OF year_id, native_language_id, title_language_id, entry_number ON song
+FOR EACH ROW
+WHEN ((OLD.year_id, OLD.native_language_id, OLD.title_language_id, OLD.entry_number)
+      IS DISTINCT FROM
+      (NEW.year_id, NEW.native_language_id, NEW.title_language_id, NEW.entry_number))
+EXECUTE FUNCTION bump_render_cache_version_from_year_row();
+
+-- Show metadata the results, scoreboard and qualifier pages render.
+DROP TRIGGER IF EXISTS trg_render_cache_version ON show;
+CREATE TRIGGER trg_render_cache_version
+AFTER INSERT OR DELETE ON show
+FOR EACH ROW EXECUTE FUNCTION bump_render_cache_version_from_year_row();
+
+DROP TRIGGER IF EXISTS trg_render_cache_version_update ON show;
+CREATE TRIGGER trg_render_cache_version_update
+AFTER UPDATE OF year_id, point_system_id, show_name, short_name, date, dtf, sc, special,
+    status, voting_closes
+ON show
+FOR EACH ROW
+WHEN ((OLD.year_id, OLD.point_system_id, OLD.show_name, OLD.short_name, OLD.date,
+       OLD.dtf, OLD.sc, OLD.special, OLD.status, OLD.voting_closes)
+      IS DISTINCT FROM
+      (NEW.year_id, NEW.point_system_id, NEW.show_name, NEW.short_name, NEW.date,
+       NEW.dtf, NEW.sc, NEW.special, NEW.status, NEW.voting_closes))
+EXECUTE FUNCTION bump_render_cache_version_from_year_row();
+
+-- Closing a year, its host and a special's names.
+CREATE OR REPLACE FUNCTION bump_render_cache_version_from_year()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM bump_render_cache_versions(ARRAY[NEW.id]);
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_render_cache_version ON year;
+CREATE TRIGGER trg_render_cache_version
+AFTER UPDATE OF status, host_id, special_name, special_short_name ON year
+FOR EACH ROW
+WHEN ((OLD.status, OLD.host_id, OLD.special_name, OLD.special_short_name)
+      IS DISTINCT FROM
+      (NEW.status, NEW.host_id, NEW.special_name, NEW.special_short_name))
+EXECUTE FUNCTION bump_render_cache_version_from_year();
+
+-- Point values, for the years whose shows use the point system.
+CREATE OR REPLACE FUNCTION bump_render_cache_version_from_point()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM bump_render_cache_versions(ARRAY(
+        SELECT DISTINCT year_id FROM show
+        WHERE point_system_id IN (OLD.point_system_id, NEW.point_system_id)
+    ));
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_render_cache_version ON point;
+CREATE TRIGGER trg_render_cache_version
+AFTER INSERT OR UPDATE OR DELETE ON point
+FOR EACH ROW EXECUTE FUNCTION bump_render_cache_version_from_point();
+
+-- Voter and submitter names, for the years the account took part in.
+CREATE OR REPLACE FUNCTION bump_render_cache_version_from_account()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM bump_render_cache_versions(ARRAY(
+        SELECT year_id FROM song WHERE submitter_id = NEW.id
+        UNION
+        SELECT show.year_id FROM vote_set JOIN show ON show.id = vote_set.show_id
+        WHERE vote_set.voter_id = NEW.id
+    ));
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_render_cache_version ON account;
+CREATE TRIGGER trg_render_cache_version
+AFTER UPDATE OF username ON account
+FOR EACH ROW
+WHEN (OLD.username IS DISTINCT FROM NEW.username)
+EXECUTE FUNCTION bump_render_cache_version_from_account();
+
+-- Per-song rows. Postgres only allows transition tables on single-event
+-- triggers, so each table gets an INSERT, an UPDATE and a DELETE trigger.
+DO $$
+DECLARE
+    tbl text;
+BEGIN
+    FOREACH tbl IN ARRAY ARRAY[
+        'song_language', 'song_key_signature', 'song_time_signature',
+        'song_subgenre', 'song_show'
+    ] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_render_cache_version_insert ON %I', tbl);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_render_cache_version_update ON %I', tbl);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_render_cache_version_delete ON %I', tbl);
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_render_cache_version_truncate ON %I', tbl);
+        EXECUTE format($sql$
+            CREATE TRIGGER trg_render_cache_version_insert
+            AFTER INSERT ON %I
+            REFERENCING NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_render_cache_version_from_song_rows()
+        $sql$, tbl);
+        EXECUTE format($sql$
+            CREATE TRIGGER trg_render_cache_version_update
+            AFTER UPDATE ON %I
+            REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_render_cache_version_from_song_rows()
+        $sql$, tbl);
+        EXECUTE format($sql$
+            CREATE TRIGGER trg_render_cache_version_delete
+            AFTER DELETE ON %I
+            REFERENCING OLD TABLE AS old_rows
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_render_cache_version_from_song_rows()
+        $sql$, tbl);
+        EXECUTE format($sql$
+            CREATE TRIGGER trg_render_cache_version_truncate
+            AFTER TRUNCATE ON %I
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_all_render_cache_versions()
+        $sql$, tbl);
+    END LOOP;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_render_cache_version ON country;
+CREATE TRIGGER trg_render_cache_version
+AFTER UPDATE OF name, cc3 ON country
+FOR EACH STATEMENT EXECUTE FUNCTION bump_all_render_cache_versions();
+
+DROP TRIGGER IF EXISTS trg_render_cache_version ON alternative_name;
+CREATE TRIGGER trg_render_cache_version
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON alternative_name
+FOR EACH STATEMENT EXECUTE FUNCTION bump_all_render_cache_versions();
+
+DROP TRIGGER IF EXISTS trg_render_cache_version ON language;
+CREATE TRIGGER trg_render_cache_version
+AFTER UPDATE OR DELETE OR TRUNCATE ON language
+FOR EACH STATEMENT EXECUTE FUNCTION bump_all_render_cache_versions();
+
+DROP TRIGGER IF EXISTS trg_render_cache_version ON genre;
+CREATE TRIGGER trg_render_cache_version
+AFTER UPDATE OR DELETE OR TRUNCATE ON genre
+FOR EACH STATEMENT EXECUTE FUNCTION bump_all_render_cache_versions();
+
+DROP TRIGGER IF EXISTS trg_render_cache_version ON subgenre;
+CREATE TRIGGER trg_render_cache_version
+AFTER UPDATE OR DELETE OR TRUNCATE ON subgenre
+FOR EACH STATEMENT EXECUTE FUNCTION bump_all_render_cache_versions();
+
+COMMIT;
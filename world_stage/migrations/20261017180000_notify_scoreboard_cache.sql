@@ -0,0 +1,159 @@
+BEGIN;
+
+-- The scoreboard payload of each full show is cached per worker in the
+-- scoreboard region (routes/year/scoreboard.py). Ballots, results and
+-- running-order rows only clear it when they belong to a full show, so
+-- voting in another show doesn't rebuild the payload during a reveal.
+CREATE OR REPLACE FUNCTION notify_scoreboard_from_show_rows()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    changed bigint[] := '{}';
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        IF TG_TABLE_NAME = 'vote' THEN
+            changed := changed || ARRAY(
+                SELECT vs.show_id FROM new_rows r
+                JOIN vote_set vs ON vs.id = r.vote_set_id
+                WHERE vs.result_mode = 'official'
+            );
+        ELSIF TG_TABLE_NAME = 'song_show' THEN
+            changed := changed || ARRAY(SELECT show_id FROM new_rows);
+        ELSE
+            changed := changed || ARRAY(
+                SELECT show_id FROM new_rows WHERE result_mode = 'official'
+            );
+        END IF;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        IF TG_TABLE_NAME = 'vote' THEN
+            changed := changed || ARRAY(
+                SELECT vs.show_id FROM old_rows r
+                JOIN vote_set vs ON vs.id = r.vote_set_id
+                WHERE vs.result_mode = 'official'
+            );
+        ELSIF TG_TABLE_NAME = 'song_show' THEN
+            changed := changed || ARRAY(SELECT show_id FROM old_rows);
+        ELSE
+            changed := changed || ARRAY(
+                SELECT show_id FROM old_rows WHERE result_mode = 'official'
+            );
+        END IF;
+    END IF;
+
+    IF EXISTS (SELECT 1 FROM show WHERE id = ANY(changed) AND status = 'full') THEN
+        PERFORM pg_notify('cache_invalidate', 'scoreboard');
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_insert ON vote;
+CREATE TRIGGER trg_scoreboard_cache_on_insert
+AFTER INSERT ON vote
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_update ON vote;
+CREATE TRIGGER trg_scoreboard_cache_on_update
+AFTER UPDATE ON vote
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_delete ON vote;
+CREATE TRIGGER trg_scoreboard_cache_on_delete
+AFTER DELETE ON vote
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_insert ON vote_set;
+CREATE TRIGGER trg_scoreboard_cache_on_insert
+AFTER INSERT ON vote_set
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_update ON vote_set;
+CREATE TRIGGER trg_scoreboard_cache_on_update
+AFTER UPDATE ON vote_set
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_delete ON vote_set;
+CREATE TRIGGER trg_scoreboard_cache_on_delete
+AFTER DELETE ON vote_set
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_insert ON country_show_results;
+CREATE TRIGGER trg_scoreboard_cache_on_insert
+AFTER INSERT ON country_show_results
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_update ON country_show_results;
+CREATE TRIGGER trg_scoreboard_cache_on_update
+AFTER UPDATE ON country_show_results
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_delete ON country_show_results;
+CREATE TRIGGER trg_scoreboard_cache_on_delete
+AFTER DELETE ON country_show_results
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+-- Running orders and penalties.
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_insert ON song_show;
+CREATE TRIGGER trg_scoreboard_cache_on_insert
+AFTER INSERT ON song_show
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_update ON song_show;
+CREATE TRIGGER trg_scoreboard_cache_on_update
+AFTER UPDATE ON song_show
+REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_on_delete ON song_show;
+CREATE TRIGGER trg_scoreboard_cache_on_delete
+AFTER DELETE ON song_show
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE FUNCTION notify_scoreboard_from_show_rows();
+
+-- Show status changes drop shows out of the region; point changes alter
+-- the payload's point list.
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_invalidate ON show;
+CREATE TRIGGER trg_scoreboard_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON show
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('scoreboard');
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_invalidate ON point;
+CREATE TRIGGER trg_scoreboard_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON point
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('scoreboard');
+
+-- Entries and the names shown with them.
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_invalidate ON song;
+CREATE TRIGGER trg_scoreboard_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON song
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('scoreboard');
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_invalidate ON country;
+CREATE TRIGGER trg_scoreboard_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON country
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('scoreboard');
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_invalidate ON alternative_name;
+CREATE TRIGGER trg_scoreboard_cache_invalidate
+AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON alternative_name
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('scoreboard');
+
+DROP TRIGGER IF EXISTS trg_scoreboard_cache_invalidate ON account;
+CREATE TRIGGER trg_scoreboard_cache_invalidate
+AFTER UPDATE OF username ON account
+FOR EACH STATEMENT EXECUTE FUNCTION notify_cache_invalidate('scoreboard');
+
+COMMIT;
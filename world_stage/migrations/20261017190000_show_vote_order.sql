@@ -0,0 +1,49 @@
+BEGIN;
+
+-- The reveal order of a show's official ballots (world_stage/utils/vote_order.py).
+-- It is a pure function of the ballots, the show and its entries, so the app
+-- stores it when voting closes or the show is published and the scoreboard
+-- reads it instead of sequencing on every load. The official results refresh
+-- runs whenever a ballot or the running order changes, and drops the row.
+CREATE TABLE show_vote_order (
+    show_id bigint PRIMARY KEY REFERENCES show (id) ON DELETE CASCADE,
+    vote_order text[] NOT NULL,
+    computed_at timestamptz NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE OR REPLACE FUNCTION refresh_show_result(
+    p_show_id bigint, p_result_mode text, p_full_rebuild boolean DEFAULT true
+)
+RETURNS void AS $$
+BEGIN
+    IF p_result_mode = 'revote' THEN
+        PERFORM refresh_revote_penalties(p_show_id);
+    ELSE
+        DELETE FROM show_vote_order WHERE show_id = p_show_id;
+    END IF;
+
+    IF p_full_rebuild OR NOT rerank_show_results(p_show_id, p_result_mode) THEN
+        PERFORM refresh_show_results_for_mode(p_show_id, p_result_mode);
+    END IF;
+END;
+$$ LANGUAGE plpgsql;
+
+-- The sequencer ranks ballots by the show's point system.
+CREATE OR REPLACE FUNCTION forget_show_vote_order()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    DELETE FROM show_vote_order WHERE show_id = NEW.id;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_forget_show_vote_order ON show;
+CREATE TRIGGER trg_forget_show_vote_order
+AFTER UPDATE OF point_system_id ON show
+FOR EACH ROW
+WHEN (NEW.point_system_id IS DISTINCT FROM OLD.point_system_id)
+EXECUTE FUNCTION forget_show_vote_order();
+
+COMMIT;
@@ -0,0 +1,8 @@
+BEGIN;
+
+-- When an admin started the live reveal of a show. The scoreboard stream
+-- (/scoreboard/stream) sends each voter's points a fixed step after this,
+-- so every viewer follows one timeline. NULL: viewers replay at their own pace.
+ALTER TABLE show ADD COLUMN reveal_started_at timestamptz;
+
+COMMIT;
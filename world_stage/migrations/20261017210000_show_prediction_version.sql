@@ -0,0 +1,88 @@
+BEGIN;
+
+-- Data version for the cached prediction odds (routes/year/predictions.py).
+-- A counter rather than the newest prediction_set timestamp: CURRENT_TIMESTAMP
+-- is the transaction's start time, so a resubmission that commits after a
+-- page has read the newer timestamp of another one would never change the key.
+-- Each bump waits for the previous writer's commit, so every committed
+-- change moves the show to a new version.
+CREATE TABLE show_prediction_version (
+    show_id bigint PRIMARY KEY,
+    version bigint NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION bump_show_prediction_versions(p_show_ids bigint[])
+RETURNS void
+LANGUAGE sql AS $$
+    INSERT INTO show_prediction_version (show_id, version)
+    SELECT DISTINCT show_id, 1
+    FROM unnest(p_show_ids) AS show_id
+    WHERE show_id IS NOT NULL
+    ORDER BY show_id
+    ON CONFLICT (show_id) DO UPDATE
+    SET version = show_prediction_version.version + 1;
+$$;
+
+CREATE OR REPLACE FUNCTION trigger_bump_show_prediction_version_from_predictions()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        PERFORM bump_show_prediction_versions(ARRAY(
+            SELECT prediction_set.show_id
+            FROM new_predictions JOIN prediction_set ON prediction_set.id = new_predictions.set_id
+        ));
+    ELSIF TG_OP = 'DELETE' THEN
+        PERFORM bump_show_prediction_versions(ARRAY(
+            SELECT prediction_set.show_id
+            FROM old_predictions JOIN prediction_set ON prediction_set.id = old_predictions.set_id
+        ));
+    ELSE
+        PERFORM bump_show_prediction_versions(ARRAY(
+            SELECT prediction_set.show_id
+            FROM old_predictions JOIN prediction_set ON prediction_set.id = old_predictions.set_id
+            UNION
+            SELECT prediction_set.show_id
+            FROM new_predictions JOIN prediction_set ON prediction_set.id = new_predictions.set_id
+        ));
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+-- Predictions removed by a prediction_set delete cascade no longer find
+-- their set, so the set's own delete bumps the show.
+CREATE OR REPLACE FUNCTION trigger_bump_show_prediction_version_from_sets()
+RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    PERFORM bump_show_prediction_versions(ARRAY(SELECT show_id FROM old_sets));
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_show_prediction_version_insert ON prediction;
+CREATE TRIGGER trg_show_prediction_version_insert
+AFTER INSERT ON prediction
+REFERENCING NEW TABLE AS new_predictions
+FOR EACH STATEMENT EXECUTE FUNCTION trigger_bump_show_prediction_version_from_predictions();
+
+DROP TRIGGER IF EXISTS trg_show_prediction_version_update ON prediction;
+CREATE TRIGGER trg_show_prediction_version_update
+AFTER UPDATE ON prediction
+REFERENCING OLD TABLE AS old_predictions NEW TABLE AS new_predictions
+FOR EACH STATEMENT EXECUTE FUNCTION trigger_bump_show_prediction_version_from_predictions();
+
+DROP TRIGGER IF EXISTS trg_show_prediction_version_delete ON prediction;
+CREATE TRIGGER trg_show_prediction_version_delete
+AFTER DELETE ON prediction
+REFERENCING OLD TABLE AS old_predictions
+FOR EACH STATEMENT EXECUTE FUNCTION trigger_bump_show_prediction_version_from_predictions();
+
+DROP TRIGGER IF EXISTS trg_show_prediction_version_delete ON prediction_set;
+CREATE TRIGGER trg_show_prediction_version_delete
+AFTER DELETE ON prediction_set
+REFERENCING OLD TABLE AS old_sets
+FOR EACH STATEMENT EXECUTE FUNCTION trigger_bump_show_prediction_version_from_sets();
+
+COMMIT;
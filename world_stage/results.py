@@ -0,0 +1,272 @@
+"""Asynchronous refresh of materialized show results.
+
+By default ``country_show_results`` is rebuilt inside the COMMIT of the
+ballot that changed it. With ``ASYNC_RESULT_REFRESH`` set, connections
+serving a request mark themselves with ``world_stage.result_refresh =
+async`` (see ``db.get_db``) and ballot writes only append to
+``show_result_refresh_request``; ``flask refresh-worker`` rebuilds each
+affected show at most once per debounce window, and results pages read
+the last materialized state in between. Everything else (``migrate-db``
+and the other CLI commands, psql) keeps refreshing synchronously.
+
+Most ballot changes are applied incrementally: vote writes record
+per-score deltas and the refresh folds them into the existing rows and
+re-ranks (``rerank_show_results``). ``flask check-results`` compares
+that path against a full rebuild.
+"""
+
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import psycopg
+from flask import Flask, current_app
+from flask.cli import with_appcontext
+from psycopg_pool import ConnectionPool
+
+from .db import fetchone, get_db
+
+log = logging.getLogger(__name__)
+
+# A show refreshed less than REFRESH_DEBOUNCE seconds ago waits for the
+# window to pass, so a burst of ballots at closing time costs one
+# rebuild per window instead of one per ballot.
+REFRESH_DEBOUNCE = 5.0
+# The worker re-checks the queue this often even without a NOTIFY.
+REFRESH_POLL_INTERVAL = 30.0
+
+
+def _pending(debounce: float) -> list[dict]:
+    """Every (show, mode) with outstanding requests, with the seconds left
+    until its debounce window ends (0 when it is due now)."""
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(
+        """
+        SELECT request.show_id, request.result_mode,
+            GREATEST(0, COALESCE(EXTRACT(EPOCH FROM
+                state.refreshed_at + make_interval(secs => %s) - CURRENT_TIMESTAMP
+            ), 0))::double precision AS wait
+        FROM (
+            SELECT DISTINCT show_id, result_mode FROM show_result_refresh_request
+        ) request
+        LEFT JOIN show_result_refresh_state state USING (show_id, result_mode)
+        ORDER BY wait, request.show_id, request.result_mode
+        """,
+        (debounce,),
+    )
+    rows = cursor.fetchall()
+    db.commit()
+    return rows
+
+
+def _refresh(pool: ConnectionPool, show_id: int, result_mode: str, debounce: float) -> bool:
+    """Rebuild one show's results if no other worker holds it and its
+    window has passed. Returns whether it was rebuilt.
+
+    The requests are deleted before the rebuild, in the same transaction:
+    every ballot behind a deleted request committed before the rebuild
+    reads the votes, and requests appended meanwhile are left for the
+    next round."""
+    started_at = time.perf_counter()
+    with pool.connection() as conn, conn.cursor() as cursor:
+        cursor.execute(
+            """
+            INSERT INTO show_result_refresh_state (show_id, result_mode)
+            VALUES (%s, %s)
+            ON CONFLICT DO NOTHING
+            """,
+            (show_id, result_mode),
+        )
+        conn.commit()
+        cursor.execute(
+            """
+            SELECT 1 FROM show_result_refresh_state
+            WHERE show_id = %s AND result_mode = %s
+              AND (refreshed_at IS NULL
+                   OR refreshed_at <= CURRENT_TIMESTAMP - make_interval(secs => %s))
+            FOR UPDATE SKIP LOCKED
+            """,
+            (show_id, result_mode, debounce),
+        )
+        if cursor.fetchone() is None:
+            return False
+        cursor.execute(
+            """
+            WITH done AS (
+                DELETE FROM show_result_refresh_request
+                WHERE show_id = %s AND result_mode = %s
+                RETURNING full_rebuild
+            )
+            SELECT bool_or(full_rebuild) AS full_rebuild FROM done
+            """,
+            (show_id, result_mode),
+        )
+        full_rebuild = fetchone(cursor)["full_rebuild"]
+        if full_rebuild is None:
+            return False
+        cursor.execute(
+            "SELECT refresh_show_result(%s, %s, %s)", (show_id, result_mode, full_rebuild)
+        )
+        cursor.execute(
+            """
+            UPDATE show_result_refresh_state SET refreshed_at = CURRENT_TIMESTAMP
+            WHERE show_id = %s AND result_mode = %s
+            """,
+            (show_id, result_mode),
+        )
+    log.info(
+        "refreshed %s results for show %s in %.0f ms",
+        result_mode, show_id, (time.perf_counter() - started_at) * 1000,
+    )
+    return True
+
+
+def drain_refreshes(
+    executor: ThreadPoolExecutor | None = None, debounce: float = REFRESH_DEBOUNCE
+) -> tuple[int, float | None]:
+    """Rebuild every show whose requests are due. Shows are rebuilt on
+    ``executor`` when given, otherwise one after another.
+
+    Returns how many were rebuilt and the seconds until the next
+    debounced show comes due (None when nothing else is waiting)."""
+    pending = _pending(debounce)
+    due = [(row["show_id"], row["result_mode"]) for row in pending if row["wait"] <= 0]
+    waits = [row["wait"] for row in pending if row["wait"] > 0]
+
+    pool: ConnectionPool = current_app.config["DB_POOL"]
+    if executor is None:
+        done = [_refresh(pool, *key, debounce) for key in due]
+    else:
+        done = list(executor.map(lambda key: _refresh(pool, *key, debounce), due))
+    return sum(done), min(waits, default=None)
+
+
+@click.command("refresh-worker")
+@click.option("--workers", default=2, show_default=True, help="Shows rebuilt concurrently.")
+@click.option(
+    "--debounce",
+    default=REFRESH_DEBOUNCE,
+    show_default=True,
+    help="Minimum seconds between two rebuilds of the same show.",
+)
+@click.option("--once", is_flag=True, help="Rebuild every pending show now, then exit.")
+@with_appcontext
+def refresh_worker_command(workers: int, debounce: float, once: bool):
+    """Rebuild show results queued by ballots under ASYNC_RESULT_REFRESH."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        if once:
+            total = 0
+            while (refreshed := drain_refreshes(executor, debounce=0))[0]:
+                total += refreshed[0]
+            click.echo(f"Refreshed {total} shows.")
+            return
+
+        pool: ConnectionPool = current_app.config["DB_POOL"]
+        with psycopg.connect(pool.conninfo, autocommit=True) as listener:
+            listener.execute("LISTEN show_result_refresh")
+            click.echo("Waiting for ballots...")
+            while True:
+                _, wait = drain_refreshes(executor, debounce)
+                timeout = (
+                    REFRESH_POLL_INTERVAL if wait is None else min(wait, REFRESH_POLL_INTERVAL)
+                )
+                for _ in listener.notifies(timeout=timeout, stop_after=1):
+                    pass
+
+
+def _result_rows(cursor, show_id: int, result_mode: str) -> dict[int, dict]:
+    cursor.execute(
+        """
+        SELECT * FROM country_show_results
+        WHERE show_id = %s AND result_mode = %s
+        """,
+        (show_id, result_mode),
+    )
+    rows = {}
+    for row in cursor.fetchall():
+        row.pop("calculated_at")
+        rows[row["song_id"]] = row
+    return rows
+
+
+def check_show_results(cursor, show_id: int, result_mode: str) -> list[dict] | None:
+    """Compare the incremental refresh of one show with a full rebuild.
+
+    Both run in a savepoint that is rolled back. Returns one
+    ``{song_id, column, incremental, full}`` per differing value, or
+    None when the materialized rows are out of step with the show's
+    entries and only a full rebuild applies."""
+    with cursor.connection.transaction(force_rollback=True):
+        if result_mode == "revote":
+            cursor.execute("SELECT refresh_revote_penalties(%s)", (show_id,))
+        cursor.execute(
+            "SELECT rerank_show_results(%s, %s) AS reranked", (show_id, result_mode)
+        )
+        if not fetchone(cursor)["reranked"]:
+            return None
+        incremental = _result_rows(cursor, show_id, result_mode)
+        cursor.execute("SELECT refresh_show_results_for_mode(%s, %s)", (show_id, result_mode))
+        full = _result_rows(cursor, show_id, result_mode)
+
+    differences = []
+    for song_id in sorted(incremental.keys() | full.keys()):
+        ours, theirs = incremental.get(song_id, {}), full.get(song_id, {})
+        for column in sorted(ours.keys() | theirs.keys()):
+            if ours.get(column) != theirs.get(column):
+                differences.append({
+                    "song_id": song_id,
+                    "column": column,
+                    "incremental": ours.get(column),
+                    "full": theirs.get(column),
+                })
+    return differences
+
+
+@click.command("check-results")
+@click.option("--show", "show_id", type=int, help="Check one show instead of all.")
+@click.option("--repair", is_flag=True, help="Rebuild shows that differ in full.")
+@with_appcontext
+def check_results_command(show_id: int | None, repair: bool):
+    """Compare incrementally maintained show results with a full rebuild."""
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(
+        """
+        SELECT DISTINCT show_id, result_mode FROM country_show_results
+        WHERE %(show_id)s::bigint IS NULL OR show_id = %(show_id)s
+        ORDER BY show_id, result_mode
+        """,
+        {"show_id": show_id},
+    )
+    targets = cursor.fetchall()
+
+    mismatched = 0
+    for target in targets:
+        key = (target["show_id"], target["result_mode"])
+        differences = check_show_results(cursor, *key)
+        if differences is None:
+            click.echo(f"show {key[0]} ({key[1]}): entries changed, needs a full rebuild")
+        elif differences:
+            for d in differences:
+                click.echo(
+                    f"show {key[0]} ({key[1]}) song {d['song_id']}: {d['column']} "
+                    f"incremental={d['incremental']!r} full={d['full']!r}"
+                )
+        else:
+            continue
+        mismatched += 1
+        if repair:
+            cursor.execute("SELECT refresh_show_results_for_mode(%s, %s)", key)
+            db.commit()
+
+    click.echo(f"Checked {len(targets)} results, {mismatched} differ.")
+    if mismatched and not repair:
+        sys.exit(1)
+
+
+def init_app(app: Flask):
+    app.cli.add_command(check_results_command)
+    app.cli.add_command(refresh_worker_command)
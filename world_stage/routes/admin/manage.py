@@ -9,6 +9,7 @@ from ...db import get_db
 from ...utils import (
     get_years,
     render_template,
+    store_vote_order,
 )
 from .common import _resolve_special, bp
 
@@ -74,7 +75,8 @@ def _render_manage(year_id: int, year_data: dict):
     cursor = get_db().cursor()
     cursor.execute(
         """
-        SELECT show_name, short_name, date, status, voting_opens, voting_closes, predictions_close
+        SELECT show_name, short_name, date, status, voting_opens, voting_closes, predictions_close,
+            reveal_started_at
         FROM show WHERE year_id = %s
         ORDER BY id
     """,
@@ -189,6 +191,7 @@ def manage_show_post(year: int, show: str):
             """,
                 (year, show),
             )
+            store_vote_order(year, show)
         case "close_predictions":
             cursor.execute(
                 """
@@ -207,6 +210,24 @@ def manage_show_post(year: int, show: str):
             """,
                 (year, show),
             )
+        case "start_reveal":
+            cursor.execute(
+                """
+                UPDATE show
+                SET reveal_started_at = CURRENT_TIMESTAMP
+                WHERE year_id = %s AND short_name = %s
+            """,
+                (year, show),
+            )
+        case "stop_reveal":
+            cursor.execute(
+                """
+                UPDATE show
+                SET reveal_started_at = NULL
+                WHERE year_id = %s AND short_name = %s
+            """,
+                (year, show),
+            )
         case "set_status":
             status = body.get("status")
             if status not in ("none", "draw", "partial", "full"):
@@ -220,6 +241,8 @@ def manage_show_post(year: int, show: str):
             """,
                 (status, year, show),
             )
+            if status == "full":
+                store_vote_order(year, show)
         case "change_date":
             date_str = body.get("date")
             if not date_str:
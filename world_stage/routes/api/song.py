@@ -5,7 +5,7 @@ from flask import Blueprint, make_response, redirect, request, url_for
 from psycopg import sql
 
 from world_stage.db import fetchone, get_db
-from world_stage.media import duration_for_link
+from world_stage.media import duration_for_link, needs_probe, queue_probe
 from world_stage.utils import (
     ErrorID,
     err,
@@ -992,6 +992,9 @@ def create_song(auth: tuple):
     if subgenre_ids:
         _replace_song_subgenres(cursor, song_id, subgenre_ids)
 
+    if needs_probe(text["video_link"]):
+        queue_probe(cursor, song_id, text["video_link"])
+
     db.commit()
 
     row = _fetch_song(cursor, song_id)
@@ -1164,6 +1167,9 @@ def replace_song(id: int, auth: tuple):
     _replace_song_time_signatures(cursor, id, time_signatures or [])
     _replace_song_subgenres(cursor, id, subgenre_ids or [])
 
+    if needs_probe(text["video_link"], row["video_link"], row["duration"]):
+        queue_probe(cursor, id, text["video_link"])
+
     db.commit()
 
     updated = _fetch_song(cursor, id)
@@ -1218,13 +1224,13 @@ def update_song(id: int, auth: tuple):
                 sets.append(_assign(field))
                 params.append(_normalize_text(data[field]))
 
+    probe_link = None
     if "video_link" in data:
+        video_link = _normalize_text(data["video_link"])
         sets.append(_assign("duration"))
-        params.append(
-            duration_for_link(
-                _normalize_text(data["video_link"]), row["video_link"], row["duration"]
-            )
-        )
+        params.append(duration_for_link(video_link, row["video_link"], row["duration"]))
+        if needs_probe(video_link, row["video_link"], row["duration"]):
+            probe_link = video_link
 
     if "is_placeholder" in data:
         sets.append(_assign("is_placeholder"))
@@ -1355,6 +1361,9 @@ def update_song(id: int, auth: tuple):
     if subgenre_ids is not None:
         _replace_song_subgenres(cursor, id, subgenre_ids)
 
+    if probe_link is not None:
+        queue_probe(cursor, id, probe_link)
+
     db.commit()
 
     updated = _fetch_song(cursor, id)
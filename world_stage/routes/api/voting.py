@@ -9,6 +9,7 @@ from world_stage.utils import (
     get_show_id,
     require_api_auth,
     resp,
+    write_ballot,
 )
 
 bp = Blueprint("voting", __name__, url_prefix="/voting")
@@ -246,26 +247,14 @@ def save_ballot(show: str, auth):
     if country_id and country_id not in valid_country_ids:
         return err(ErrorID.BAD_REQUEST, "country_id is not available to this voter")
 
-    cursor.execute(
-        """
-        INSERT INTO vote_set (voter_id, show_id, country_id, nickname, ip_address, result_mode)
-        VALUES (%s, %s, %s, %s, %s, 'official')
-        ON CONFLICT (voter_id, show_id, result_mode) DO UPDATE
-        SET country_id = EXCLUDED.country_id,
-            nickname = EXCLUDED.nickname,
-            ip_address = EXCLUDED.ip_address
-        RETURNING id
-        """,
-        (user_id, show_data.id, country_id, nickname, request.remote_addr),
-    )
-    vote_set_id = fetchone(cursor)["id"]
-    cursor.execute("DELETE FROM vote WHERE vote_set_id = %s", (vote_set_id,))
-    cursor.executemany(
-        """
-        INSERT INTO vote (vote_set_id, song_id, score)
-        VALUES (%(set_id)s, %(song_id)s, %(score)s)
-        """,
-        [{"set_id": vote_set_id, **vote} for vote in votes],
+    write_ballot(
+        cursor,
+        voter_id=user_id,
+        show_id=show_data.id,
+        votes={vote["score"]: vote["song_id"] for vote in votes},
+        country_id=country_id,
+        nickname=nickname,
+        ip_address=request.remote_addr,
     )
     get_db().commit()
     return resp(_ballot(cursor, user_id, show_data.id))
@@ -4,8 +4,9 @@ from decimal import Decimal
 
 from flask import Blueprint, redirect, request, url_for
 
+from .. import cache
 from ..db import get_db
-from ..media import duration_for_link, is_media_link
+from ..media import is_media_link, queue_probe
 from ..utils import (
     UserPermissions,
     get_closed_years,
@@ -17,14 +18,21 @@ from ..utils import (
     get_song,
     get_special_song,
     get_special_songs_for_country,
+    render_cached,
     render_template,
     require_permissions,
     resolve_country_code,
+    song_page_version,
     with_auth,
 )
 
 bp = Blueprint("country", __name__, url_prefix="/country")
 
+# Songs, published results and stats for one country page. Cleared by
+# song edits and by results being published (see
+# 20261017160000_notify_country_page_cache), not by live voting.
+COUNTRY_PAGE_REGION = cache.define_region("country_page", ttl=3600, maxsize=512)
+
 
 def _ordinal(n: int) -> str:
     suffix = (
@@ -352,31 +360,41 @@ def bias(code: str):
     )
 
 
+def _load_country_page(code: str) -> dict | None:
+    songs = get_country_songs(code, select_languages=True)
+    if not songs:
+        return None
+    results = get_show_results_for_songs([s.id for s in songs])
+    regular_songs = [s for s in songs if s.year.id >= 0]
+    special_songs = [s for s in songs if s.year.id < 0]
+    ten_year_window = set(get_closed_years()[-10:])
+    return {
+        "songs": regular_songs,
+        "special_songs": special_songs,
+        "country_name": get_country_name(code),
+        "results": results,
+        "stats": _country_stats(regular_songs, results, ten_year_window=ten_year_window),
+        "special_stats": (
+            _country_stats(special_songs, results, special=True) if special_songs else None
+        ),
+    }
+
+
 @bp.get("/<code>")
 def country(code: str):
     canonical = resolve_country_code(code.upper())
     if canonical and canonical.lower() != code.lower():
         return redirect(url_for("country.country", code=canonical.lower()), 301)
-    songs = get_country_songs(code.upper(), select_languages=True)
-    if not songs:
+    page = cache.cached(
+        COUNTRY_PAGE_REGION, code.upper(), lambda: _load_country_page(code.upper())
+    )
+    if page is None:
         return render_template("error.html", error=f"Songs not found for country {code}")
-    name = get_country_name(code.upper())
-    results = get_show_results_for_songs([s.id for s in songs])
-    regular_songs = [s for s in songs if s.year.id >= 0]
-    special_songs = [s for s in songs if s.year.id < 0]
-    ten_year_window = set(get_closed_years()[-10:])
     return render_template(
         "country/country.html",
-        songs=regular_songs,
-        special_songs=special_songs,
         country=code,
-        country_name=name,
-        results=results,
-        stats=_country_stats(regular_songs, results, ten_year_window=ten_year_window),
-        special_stats=(
-            _country_stats(special_songs, results, special=True) if special_songs else None
-        ),
         format_decimal=_format_decimal,
+        **page,
     )
 
 
@@ -436,6 +454,7 @@ def generate_iframe(url: str, img_url: str | None):
 
 @bp.get("/<code>/<int:year>")
 @with_auth
+@render_cached(song_page_version)
 def details(code: str, year: int, user: tuple[int, str] | None, permissions: UserPermissions):
     canonical = resolve_country_code(code.upper())
     if canonical and canonical.lower() != code.lower():
@@ -510,13 +529,12 @@ def update_duration(song_id: int, permissions: UserPermissions):
     if not row:
         return render_template("error.html", error=f"Song {song_id} not found"), 404
 
-    duration = duration_for_link(row["video_link"])
-    if is_media_link(row["video_link"]) and duration is None:
-        return render_template(
-            "error.html", error="Could not read the duration from the media file"
-        ), 502
-
-    cursor.execute("UPDATE song SET duration = %s WHERE id = %s", (duration, song_id))
+    # The probe runs in the background worker; the duration shows up once
+    # it finishes.
+    if is_media_link(row["video_link"]):
+        queue_probe(cursor, song_id, row["video_link"])
+    else:
+        cursor.execute("UPDATE song SET duration = NULL WHERE id = %s", (song_id,))
     db.commit()
     return redirect(request.referrer or url_for("country.index"))
 
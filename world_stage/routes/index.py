@@ -5,6 +5,7 @@ from ..db import get_db
 from ..utils import (
     UserPermissions,
     create_cookie,
+    forget_api_token,
     generate_api_token,
     get_user_id_from_session,
     parse_cookie,
@@ -163,10 +164,14 @@ def delete_token(user: tuple[int, str]):
         cursor.execute(
             """
             DELETE FROM api_token WHERE id = %s AND user_id = %s
+            RETURNING token_hash
         """,
             (token_id, user_id),
         )
+        deleted = cursor.fetchone()
         db.commit()
+        if deleted:
+            forget_api_token(deleted["token_hash"])
 
     return redirect(url_for("main.settings"))
 
@@ -1,7 +1,9 @@
+import copy
 from typing import Any
 
 from flask import Blueprint, redirect, request, url_for
 
+from .. import cache
 from ..db import fetchone, get_db
 from ..utils import (
     UserPermissions,
@@ -14,6 +16,7 @@ from ..utils import (
     resolve_country_code,
     with_permissions,
 )
+from ..utils.lookups import GENRE_REGION, LANGUAGE_REGION
 
 bp = Blueprint("member", __name__, url_prefix="/member")
 
@@ -23,10 +26,14 @@ MAX_YEAR_SUBMISSIONS = 73
 
 def get_languages() -> list[dict]:
     """Get all available languages"""
+    return [dict(row) for row in cache.cached(LANGUAGE_REGION, "options", _load_languages)]
+
+
+def _load_languages() -> tuple[dict, ...]:
     db = get_db()
     cursor = db.cursor()
     cursor.execute("SELECT id, name FROM language ORDER BY name")
-    return cursor.fetchall()
+    return tuple(cursor.fetchall())
 
 
 def get_genre_options() -> list[dict]:
@@ -35,6 +42,10 @@ def get_genre_options() -> list[dict]:
     subgenre (the one whose name matches the genre) sorts first; the
     remaining subgenres follow alphabetically.
     """
+    return copy.deepcopy(cache.cached(GENRE_REGION, "options", _load_genre_options))
+
+
+def _load_genre_options() -> list[dict]:
     db = get_db()
     cursor = db.cursor()
     cursor.execute(
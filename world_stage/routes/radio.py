@@ -1,9 +1,12 @@
+import bisect
+import math
+import threading
 import time
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 
 from .. import scrobble
-from ..db import get_db
+from ..db import fetchone, get_db
 from ..utils import LCG, get_user_id_from_session, render_template, with_user
 from .country import mime_types
 
@@ -17,6 +20,9 @@ DAY_SECONDS = 86400
 SCROBBLE_SLOT_TOLERANCE = 5.0
 SCROBBLE_MAX_AGE = 3600.0
 
+SCHEDULE_DEFAULT_WINDOW = 3600.0
+SCHEDULE_MAX_WINDOW = float(DAY_SECONDS)
+
 
 def _mime(url: str) -> str | None:
     """Closed-year songs are hosted on media.world-stage.org as direct
@@ -58,6 +64,143 @@ def _get_pool() -> list[dict]:
     return pool
 
 
+def _day_slots(day: int, pool: list[dict]) -> tuple[list[float], list[int]]:
+    """Replay one UTC day's LCG draws into its slot table.
+
+    Returns ``(starts, picks)``: the offset from midnight at which each
+    slot begins (a running sum of the drawn songs' durations) and the
+    pool index played in it. The final slot is the one that crosses
+    midnight.
+    """
+    rng = LCG(day)
+    starts: list[float] = []
+    picks: list[int] = []
+    start = 0.0
+    while start < DAY_SECONDS:
+        index = rng.next(len(pool))
+        starts.append(start)
+        picks.append(index)
+        start += pool[index]["duration"]
+    return starts, picks
+
+
+def _slot_in(
+    now: float, pool: list[dict], starts: list[float], picks: list[int]
+) -> dict:
+    day_start = int(now // DAY_SECONDS) * DAY_SECONDS
+    i = bisect.bisect_right(starts, now - day_start) - 1
+    song = pool[picks[i]]
+    slot_start = day_start + starts[i]
+    return {
+        "song": song,
+        "slot_start": slot_start,
+        "slot_end": min(slot_start + song["duration"], day_start + DAY_SECONDS),
+    }
+
+
+class RadioSchedule:
+    """One worker's copy of the radio pool and its daily slot tables.
+
+    The pool is reloaded only when its version stamp changes: the most
+    recent song audit entry plus the set of closed years. Durations are
+    written without an audit entry (``backfill-durations``), so the pool
+    is also reloaded once it is ``POOL_MAX_AGE`` seconds old. Slot tables
+    are built once per UTC day and pool version, so looking up the song
+    at an instant is a bisect rather than a replay from midnight.
+    """
+
+    POOL_MAX_AGE = 900.0
+    # Yesterday (scrobbles may name a slot up to an hour old), today and
+    # tomorrow (a schedule window may cross midnight).
+    MAX_DAYS = 3
+
+    def __init__(self) -> None:
+        # (version, loaded_at, pool, days), replaced as a whole so a
+        # request never pairs one pool with another pool's slot tables.
+        self.loaded: tuple[
+            tuple | None, float, list[dict], dict[int, tuple[list[float], list[int]]]
+        ] = (None, 0.0, [], {})
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self) -> list[dict]:
+        return self.loaded[2]
+
+    def refresh(self) -> tuple[list[dict], dict[int, tuple[list[float], list[int]]]]:
+        """Return the current pool and its slot tables, reloading them if
+        they have gone stale."""
+        version = _pool_version()
+        loaded_version, loaded_at, pool, days = self.loaded
+        if version != loaded_version or time.monotonic() - loaded_at > self.POOL_MAX_AGE:
+            pool, days = _get_pool(), {}
+            self.loaded = (version, time.monotonic(), pool, days)
+        return pool, days
+
+    def _day(
+        self, day: int, pool: list[dict], days: dict[int, tuple[list[float], list[int]]]
+    ) -> tuple[list[float], list[int]]:
+        table = days.get(day)
+        if table is None:
+            table = _day_slots(day, pool)
+            with self._lock:
+                if len(days) >= self.MAX_DAYS:
+                    days.pop(min(days))
+                days[day] = table
+        return table
+
+    def slot_at(self, now: float) -> dict | None:
+        pool, days = self.refresh()
+        if not pool:
+            return None
+        return _slot_in(now, pool, *self._day(int(now // DAY_SECONDS), pool, days))
+
+    def slots_between(self, start: float, end: float) -> list[dict] | None:
+        """Every slot overlapping ``[start, end)``, in order."""
+        pool, days = self.refresh()
+        if not pool:
+            return None
+        slots = []
+        day = int(start // DAY_SECONDS)
+        while day * DAY_SECONDS < end:
+            day_start = day * DAY_SECONDS
+            starts, picks = self._day(day, pool, days)
+            i = max(bisect.bisect_right(starts, start - day_start) - 1, 0)
+            while i < len(starts) and day_start + starts[i] < end:
+                song = pool[picks[i]]
+                slot_start = day_start + starts[i]
+                slots.append(
+                    {
+                        "song": song,
+                        "slot_start": slot_start,
+                        "slot_end": min(
+                            slot_start + song["duration"], day_start + DAY_SECONDS
+                        ),
+                    }
+                )
+                i += 1
+            day += 1
+        return slots
+
+
+def _pool_version() -> tuple:
+    """A cheap stamp that changes whenever the pool query's result may."""
+    db = get_db()
+    cursor = db.cursor()
+    cursor.execute(
+        """
+        SELECT (SELECT MAX(changed_at) FROM song_audit_log) AS songs_changed_at,
+            (SELECT array_agg(id ORDER BY id) FROM year WHERE status = 'closed')
+                AS closed_years
+        """
+    )
+    row = fetchone(cursor)
+    return row["songs_changed_at"], tuple(row["closed_years"] or ())
+
+
+def _schedule() -> RadioSchedule:
+    return current_app.extensions.setdefault("radio_schedule", RadioSchedule())
+
+
 def _song_at(now: float, pool: list[dict] | None = None) -> dict | None:
     """The song scheduled at UTC instant ``now``, with its slot timing.
 
@@ -70,61 +213,46 @@ def _song_at(now: float, pool: list[dict] | None = None) -> dict | None:
     off there, once per day.
 
     Pure function of ``(now, pool)`` — shared by the live ``/radio/now``
-    endpoint and the server-side scrobble validator.
+    endpoint and the server-side scrobble validator. Without an explicit
+    ``pool`` the worker's cached schedule is used.
     """
     if pool is None:
-        pool = _get_pool()
+        return _schedule().slot_at(now)
     if not pool:
         return None
+    return _slot_in(now, pool, *_day_slots(int(now // DAY_SECONDS), pool))
 
-    day = int(now // DAY_SECONDS)
-    day_start = day * DAY_SECONDS
-    elapsed = now - day_start
 
-    rng = LCG(day)
-    start = 0.0
-    while True:
-        song = pool[rng.next(len(pool))]
-        end = start + song["duration"]
-        if elapsed < end:
-            break
-        start = end
-
-    slot_start = day_start + start
+def _song_json(song: dict) -> dict:
     return {
-        "song": song,
-        "slot_start": slot_start,
-        "slot_end": min(slot_start + song["duration"], day_start + DAY_SECONDS),
+        "id": song["id"],
+        "title": song["title"],
+        "artist": song["artist"],
+        "country": song["country_name"],
+        "cc": song["cc"].lower(),
+        "year_id": song["year_id"],
+        "year": song["special_name"] or str(song["year_id"]),
+        "url": song["video_link"],
+        "duration": song["duration"],
+        "mime": song["mime"],
+        "poster": song["poster_link"],
+        "vtt": song["vtt_link"],
     }
 
 
 def _now_playing() -> dict | None:
     now = time.time()
-    slot = _song_at(now)
+    schedule = _schedule()
+    slot = schedule.slot_at(now)
     if slot is None:
         return None
-    song = slot["song"]
-    year_label = song["special_name"] or str(song["year_id"])
     return {
         "server_time": now,
         "slot_start": slot["slot_start"],
         "slot_end": slot["slot_end"],
         "offset": now - slot["slot_start"],
-        "pool_size": len(_get_pool()),
-        "song": {
-            "id": song["id"],
-            "title": song["title"],
-            "artist": song["artist"],
-            "country": song["country_name"],
-            "cc": song["cc"].lower(),
-            "year_id": song["year_id"],
-            "year": year_label,
-            "url": song["video_link"],
-            "duration": song["duration"],
-            "mime": song["mime"],
-            "poster": song["poster_link"],
-            "vtt": song["vtt_link"],
-        },
+        "pool_size": len(schedule.pool),
+        "song": _song_json(slot["song"]),
     }
 
 
@@ -177,6 +305,45 @@ def now_playing():
     return jsonify(data)
 
 
+@bp.get("/schedule")
+def schedule():
+    """The timetable for ``[from, to)`` (UNIX seconds; defaults to the
+    next hour) as compact ``[slot_start, song_id]`` pairs, with each
+    song's metadata listed once. A slot ends where the next one starts;
+    the last one ends at ``until``.
+
+    The body depends only on the window and the pool, so clients that
+    ask for the same (e.g. hour-aligned) window revalidate with the
+    strong ETag and get a 304 until the pool changes.
+    """
+    try:
+        start = float(request.args.get("from", time.time()))
+        end = float(request.args.get("to", start + SCHEDULE_DEFAULT_WINDOW))
+    except ValueError:
+        return jsonify({"error": "from and to must be UNIX timestamps"}), 400
+    if not (math.isfinite(start) and math.isfinite(end)) or end <= start:
+        return jsonify({"error": "to must be later than from"}), 400
+    if end - start > SCHEDULE_MAX_WINDOW:
+        return jsonify({"error": "The window may span at most one day"}), 400
+
+    slots = _schedule().slots_between(start, end)
+    if slots is None:
+        return jsonify({"error": "No songs available yet"}), 404
+
+    response = jsonify(
+        {
+            "from": start,
+            "to": end,
+            "until": slots[-1]["slot_end"],
+            "slots": [[slot["slot_start"], slot["song"]["id"]] for slot in slots],
+            "songs": {slot["song"]["id"]: _song_json(slot["song"]) for slot in slots},
+        }
+    )
+    response.cache_control.no_cache = True
+    response.add_etag()
+    return response.make_conditional(request)
+
+
 @bp.post("/now-playing")
 def radio_now_playing():
     user_id = _scrobble_user()
@@ -186,7 +353,7 @@ def radio_now_playing():
     if slot is None:
         return "", 204
     song = slot["song"]
-    scrobble.send_to_all(
+    scrobble.enqueue(
         user_id, artist=song["artist"], track=song["title"], duration=song["duration"]
     )
     return "", 204
@@ -203,8 +370,8 @@ def radio_scrobble():
     song = slot["song"]
     # Use the server's slot_start as the timestamp: two of a user's own
     # tabs scrobbling the same play then submit identical (artist, track,
-    # timestamp), which the services dedup.
-    scrobble.send_to_all(
+    # timestamp), which the queue stores only once.
+    scrobble.enqueue(
         user_id,
         artist=song["artist"],
         track=song["title"],
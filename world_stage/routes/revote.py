@@ -13,6 +13,7 @@ from ..utils import (
     get_user_songs,
     render_template,
     require_user,
+    write_ballot,
 )
 from ..utils.types import VoteData
 
@@ -133,24 +134,17 @@ def _save_revote(
 ) -> str:
     db = get_db()
     cursor = db.cursor()
-    cursor.execute(
-        """
-        INSERT INTO vote_set (voter_id, show_id, country_id, nickname, result_mode)
-        VALUES (%s, %s, %s, %s, 'revote')
-        ON CONFLICT (voter_id, show_id, result_mode) DO UPDATE
-        SET country_id = EXCLUDED.country_id, nickname = EXCLUDED.nickname
-        RETURNING id, (xmax = 0) AS inserted
-        """,
-        (voter_id, show_id, country_id or "XX", nickname),
-    )
-    row = fetchone(cursor)
-    cursor.execute("DELETE FROM vote WHERE vote_set_id = %s", (row["id"],))
-    cursor.executemany(
-        "INSERT INTO vote (vote_set_id, song_id, score) VALUES (%s, %s, %s)",
-        [(row["id"], song_id, score) for score, song_id in votes.items()],
+    _, inserted = write_ballot(
+        cursor,
+        voter_id=voter_id,
+        show_id=show_id,
+        votes=votes,
+        country_id=country_id or "XX",
+        nickname=nickname,
+        result_mode="revote",
     )
     db.commit()
-    return "added" if row["inserted"] else "updated"
+    return "added" if inserted else "updated"
 
 
 @bp.get("/")
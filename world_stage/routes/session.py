@@ -7,7 +7,7 @@ import uuid
 from flask import Blueprint, make_response, request
 
 from ..db import get_db
-from ..utils import render_template
+from ..utils import forget_session, render_template
 
 bp = Blueprint("session", __name__, url_prefix="/")
 
@@ -256,6 +256,7 @@ def logout_post():
     )
 
     db.commit()
+    forget_session(session)
 
     resp = make_response(render_template("session/logout_success.html", state="logged_out"))
     resp.delete_cookie("session")
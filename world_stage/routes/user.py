@@ -171,7 +171,7 @@ def _aggregate_entries(rows) -> list[dict]:
             }
             groups[key] = g
 
-        voted = row["vote_set_id"] is not None
+        voted = row["voted"]
         score = row["score"]
         if voted:
             g["max_possible"] += row["show_max"] or 0
@@ -199,22 +199,12 @@ def _fetch_entries(cursor, voter_id: int, where_sql: str, where_val, *, revote=F
     oldest year first.
 
     Driven off ``song_show`` (every show the entry actually competed in) and
-    left-joined to the voter's votes, so the per-show columns can distinguish a
-    show the entry sat out from one it competed in but earned no points. Only
-    fully-revealed ('full') shows are counted, so partial-result shows can't
-    leak which entries qualified. ``where_sql`` is a trusted constant (never
-    user input); the matching value is always parameterised.
-    """
-    vote_set_join = """
-        LEFT JOIN LATERAL (
-            SELECT id FROM vote_set
-            WHERE show_id = sh.id AND voter_id = %s
-            ORDER BY (result_mode = 'revote') DESC
-            LIMIT 1
-        ) vote_set ON TRUE
-    """ if revote else """
-        LEFT JOIN vote_set ON vote_set.show_id = sh.id AND vote_set.voter_id = %s
-                          AND vote_set.result_mode = 'official'
+    left-joined to the voter's rows in ``voter_vote_summary``, so the per-show
+    columns can distinguish a show the entry sat out from one it competed in
+    but earned no points. The summary only holds fully-revealed ('full')
+    shows, so partial-result shows can't leak which entries qualified.
+    ``where_sql`` is a trusted constant (never user input); the matching value
+    is always parameterised.
     """
     eligible = "AND sh.revote_eligible_at IS NOT NULL" if revote else ""
     cursor.execute(
@@ -223,19 +213,18 @@ def _fetch_entries(cursor, voter_id: int, where_sql: str, where_val, *, revote=F
                year.special_name, year.special_short_name,
                song.id AS song_id, song.title, song.artist, song.entry_number,
                country.id AS cc, country.name AS country,
-               vote_set.id AS vote_set_id, vote.score AS score,
-               (SELECT MAX(point.score) FROM point
-                WHERE point.point_system_id = sh.point_system_id) AS show_max
+               summary.voter_id IS NOT NULL AS voted, summary.score, summary.show_max
         FROM song
         JOIN song_show ON song_show.song_id = song.id
         JOIN show sh ON song_show.show_id = sh.id AND sh.status = 'full'
         JOIN country ON song.country_id = country.id
         LEFT JOIN year ON sh.year_id = year.id
-        {vote_set_join}
-        LEFT JOIN vote ON vote.vote_set_id = vote_set.id AND vote.song_id = song.id
+        LEFT JOIN voter_vote_summary summary
+            ON summary.voter_id = %s AND summary.result_mode = %s
+           AND summary.show_id = sh.id AND summary.song_id = song.id
         WHERE {where_sql} {eligible}
     """,
-        (voter_id, where_val),
+        (voter_id, "revote" if revote else "official", where_val),
     )
     entries = _aggregate_entries(cursor.fetchall())
     entries.sort(key=lambda g: (g["year_id"] or 0, g["country"] or ""))
@@ -373,42 +362,27 @@ def _votes_by_year(cursor, user_id: int, username: str, *, revote=False):
 
 def _medal_table(cursor, user_id: int, username: str, *, revote=False):
     finals_only = request.args.get("finals") == "true"
-    ballot_join = """
-        JOIN LATERAL (
-            SELECT id FROM vote_set
-            WHERE show_id = sh.id AND voter_id = %s
-            ORDER BY (result_mode = 'revote') DESC
-            LIMIT 1
-        ) vs ON TRUE
-    """ if revote else """
-        JOIN vote_set vs ON vs.show_id = sh.id AND vs.voter_id = %s
-                         AND vs.result_mode = 'official'
-    """
     revote_filter = "AND sh.revote_eligible_at IS NOT NULL" if revote else ""
     final_filter = "AND sh.short_name = 'f'" if finals_only else ""
     cursor.execute(
         f"""
         SELECT country.id AS cc, country.name AS country,
-               COUNT(*) FILTER (WHERE point.place = 1) AS first,
-               COUNT(*) FILTER (WHERE point.place = 2) AS second,
-               COUNT(*) FILTER (WHERE point.place = 3) AS third,
-               COUNT(*) FILTER (WHERE point.place = 4) AS fourth,
-               COUNT(*) FILTER (WHERE point.place = 5) AS fifth,
-               COUNT(DISTINCT sh.id) AS votings
-        FROM show sh
-        {ballot_join}
-        JOIN song_show ss ON ss.show_id = sh.id
-        JOIN song ON song.id = ss.song_id
-        JOIN country ON country.id = song.country_id
-        LEFT JOIN vote ON vote.vote_set_id = vs.id AND vote.song_id = song.id
-        LEFT JOIN point ON point.point_system_id = sh.point_system_id
-                       AND point.score = vote.score
-        WHERE sh.status = 'full' {revote_filter} {final_filter}
+               COUNT(*) FILTER (WHERE summary.place = 1) AS first,
+               COUNT(*) FILTER (WHERE summary.place = 2) AS second,
+               COUNT(*) FILTER (WHERE summary.place = 3) AS third,
+               COUNT(*) FILTER (WHERE summary.place = 4) AS fourth,
+               COUNT(*) FILTER (WHERE summary.place = 5) AS fifth,
+               COUNT(DISTINCT summary.show_id) AS votings
+        FROM voter_vote_summary summary
+        JOIN show sh ON sh.id = summary.show_id
+        JOIN country ON country.id = summary.country_id
+        WHERE summary.voter_id = %s AND summary.result_mode = %s
+              {revote_filter} {final_filter}
         GROUP BY country.id, country.name
         ORDER BY first DESC, second DESC, third DESC, fourth DESC, fifth DESC,
                  votings ASC, country.name ASC
         """,
-        (user_id,),
+        (user_id, "revote" if revote else "official"),
     )
     return render_template(
         "user/votes.html",
@@ -504,21 +478,27 @@ def votes(username: str, user: tuple[int, str] | None, permissions: UserPermissi
         for row in cursor.fetchall():
             show_results[(row["show_id"], row["song_id"])] = row["place"]
 
-    for vote in votes:
+    # Every ballot's points in one query, grouped by ballot below.
+    points_by_set: dict[int, list[dict]] = defaultdict(list)
+    if votes:
         cursor.execute(
             """
-            SELECT score AS pts, song.title, song.artist,
+            SELECT vote.vote_set_id, score AS pts, song.title, song.artist,
                    song.country_id AS code, country.name, song.id
             FROM vote
             JOIN song ON vote.song_id = song.id
             JOIN country ON song.country_id = country.id
-            WHERE vote.vote_set_id = %s
+            WHERE vote.vote_set_id = ANY(%s)
             ORDER BY score DESC
         """,
-            (vote["id"],),
+            ([vote["id"] for vote in votes],),
         )
+        for row in cursor.fetchall():
+            points_by_set[row.pop("vote_set_id")].append(row)
+
+    for vote in votes:
         songs = []
-        for val in cursor.fetchall():
+        for val in points_by_set[vote["id"]]:
             # A song is in a not-yet-revealed show when it qualifies into a
             # partial 'f'/'sc' show. Track this independently of blanking so
             # results stay hidden even when the viewer reveals vote details.
@@ -635,20 +615,26 @@ def revotes(username: str, user: tuple[int, str] | None, permissions: UserPermis
             (row["show_id"], row["song_id"]): row for row in cursor.fetchall()
         }
 
-    for vote in votes:
-        vote["has_original_vote"] = vote["show_id"] in original_vote_show_ids
+    points_by_set: dict[int, list[dict]] = defaultdict(list)
+    if votes:
         cursor.execute(
             """
-            SELECT vote.score AS pts, song.title, song.country_id AS code, song.id
+            SELECT vote.vote_set_id, vote.score AS pts, song.title,
+                   song.country_id AS code, song.id
             FROM vote
             JOIN song ON song.id = vote.song_id
-            WHERE vote.vote_set_id = %s
+            WHERE vote.vote_set_id = ANY(%s)
             ORDER BY vote.score DESC
             """,
-            (vote["id"],),
+            ([vote["id"] for vote in votes],),
         )
-        points = []
         for row in cursor.fetchall():
+            points_by_set[row.pop("vote_set_id")].append(row)
+
+    for vote in votes:
+        vote["has_original_vote"] = vote["show_id"] in original_vote_show_ids
+        points = []
+        for row in points_by_set[vote["id"]]:
             result = show_results.get((vote["show_id"], row["id"]))
             entry_status = result["entry_status"] if result else None
             row["result_place"] = result["place"] if result else None
@@ -16,63 +16,12 @@ from ..utils import (
     get_vote_count_for_show,
     render_template,
     require_user,
+    write_ballot,
 )
 
 bp = Blueprint("vote", __name__, url_prefix="/vote")
 
 
-def update_votes(
-    voter_id, nickname, country_id, point_system_id, votes, show_id
-) -> tuple[bool, str]:
-    db = get_db()
-    cursor = db.cursor()
-
-    session_id = request.cookies.get("session")
-    user_data = get_user_id_from_session(session_id)
-    user_id = None
-    if user_data:
-        user_id = user_data[0]
-
-    cursor.execute(
-        """
-        SELECT id, ip_address FROM vote_set
-        WHERE voter_id = %s AND show_id = %s AND result_mode = 'official'
-        """,
-        (voter_id, show_id),
-    )
-    vote_set_data = cursor.fetchone()
-    if not vote_set_data:
-        return False, "Votes not found"
-
-    vote_set_id = vote_set_data["id"]
-    ip_addr = vote_set_data["ip_address"]
-
-    if voter_id != user_id and ip_addr != request.remote_addr:
-        return False, "IP addresses don't match. Log in or use the same device to vote."
-
-    cursor.execute(
-        """
-        UPDATE vote_set SET nickname = %s, country_id = %s, ip_address = %s
-        WHERE id = %s
-    """,
-        (nickname, country_id or "XX", request.remote_addr, vote_set_id),
-    )
-
-    cursor.execute("UPDATE vote SET song_id = NULL WHERE vote_set_id = %s", (vote_set_id,))
-
-    for score, song_id in votes.items():
-        cursor.execute(
-            """
-            UPDATE vote
-            SET song_id = %s
-            WHERE vote_set_id = %s AND score = %s
-        """,
-            (song_id, vote_set_id, score),
-        )
-
-    return True, "updated"
-
-
 def add_votes(username, nickname, country_id, show_id, point_system_id, votes) -> tuple[bool, str]:
     db = get_db()
     cursor = db.cursor()
@@ -89,37 +38,31 @@ def add_votes(username, nickname, country_id, show_id, point_system_id, votes) -
 
     cursor.execute(
         """
-        SELECT id FROM vote_set
+        SELECT ip_address FROM vote_set
         WHERE voter_id = %s AND show_id = %s AND result_mode = 'official'
         """,
         (voter_id, show_id),
     )
     existing_vote_set = cursor.fetchone()
 
-    res = True
-    if not existing_vote_set:
-        cursor.execute(
-            """
-            INSERT INTO vote_set
-                (voter_id, show_id, country_id, nickname, ip_address, created_at, result_mode)
-            VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP, 'official')
-            RETURNING id
-            """,
-            (voter_id, show_id, country_id or "XX", nickname, request.remote_addr),
-        )
-        vote_set_id = fetchone(cursor)["id"]
-        for score, song_id in votes.items():
-            cursor.execute(
-                "INSERT INTO vote (vote_set_id, song_id, score) VALUES (%s, %s, %s)",
-                (vote_set_id, song_id, score),
-            )
-        action = "added"
-    else:
-        res, action = update_votes(voter_id, nickname, country_id, point_system_id, votes, show_id)
-
+    if existing_vote_set:
+        user_data = get_user_id_from_session(request.cookies.get("session"))
+        user_id = user_data[0] if user_data else None
+        if voter_id != user_id and existing_vote_set["ip_address"] != request.remote_addr:
+            return False, "IP addresses don't match. Log in or use the same device to vote."
+
+    write_ballot(
+        cursor,
+        voter_id=voter_id,
+        show_id=show_id,
+        votes=votes,
+        country_id=country_id or "XX",
+        nickname=nickname,
+        ip_address=request.remote_addr,
+    )
     db.commit()
 
-    return res, action
+    return True, "updated" if existing_vote_set else "added"
 
 
 @bp.get("/")
@@ -1,8 +1,12 @@
 import math
 from collections import defaultdict
+from dataclasses import dataclass
 
+from ... import cache
 from ...db import get_db
 from ...utils import (
+    ShowData,
+    Song,
     UserPermissions,
     dt_now,
     get_show_id,
@@ -12,6 +16,13 @@ from ...utils import (
 )
 from .common import bp, get_other_shows, resolve_special
 
+# Odds and prediction points per show. Keys carry the number of
+# prediction sets and their latest change, so a new or edited prediction
+# moves the show to a new key and nothing has to be evicted. The page is
+# busiest just before predictions close, when there are the most
+# predictors.
+PREDICTIONS_REGION = cache.define_region("predictions", ttl=3600, maxsize=128)
+
 
 @bp.get("/special/<short_name>/<show>/predictions")
 @with_permissions
@@ -42,53 +53,10 @@ def special_predictions(short_name: str, show: str, permissions: UserPermissions
     if not songs:
         return render_template("error.html", error="No songs found for this show."), 404
 
-    db = get_db()
-    cursor = db.cursor()
-
-    cursor.execute(
-        """
-        SELECT prediction_set.id, account.username, prediction_set.created_at
-        FROM prediction_set
-        JOIN account ON prediction_set.user_id = account.id
-        WHERE prediction_set.show_id = %s
-        ORDER BY prediction_set.created_at
-    """,
-        (show_data.id,),
-    )
-    pred_sets = cursor.fetchall()
-
-    cursor.execute(
-        """
-        SELECT prediction.set_id, prediction.song_id, prediction.position
-        FROM prediction
-        JOIN prediction_set ON prediction.set_id = prediction_set.id
-        WHERE prediction_set.show_id = %s
-    """,
-        (show_data.id,),
-    )
-
-    pred_by_set: dict[int, dict[int, int]] = defaultdict(dict)
-    for row in cursor.fetchall():
-        pred_by_set[row["set_id"]][row["song_id"]] = row["position"]
-
-    n_predictors = len(pred_sets)
+    predictors, odds, pred_points = _show_predictions(show_data, songs)
+    n_predictors = len(predictors)
     n_qualifiers = (show_data.dtf or 0) + (show_data.sc or 0) + (show_data.special or 0)
-
     is_final = n_qualifiers <= 0
-    if is_final:
-        odds = _compute_winning_odds(songs, pred_by_set, n_predictors)
-    else:
-        odds = _compute_qualification_odds(songs, pred_by_set, n_predictors, n_qualifiers)
-
-    predictors: dict[str, dict] = {}
-    for ps in pred_sets:
-        predictors[ps["username"]] = pred_by_set.get(ps["id"], {})
-
-    pred_points: dict[int, float] = {song.id: 0.0 for song in songs}
-    for set_preds in pred_by_set.values():
-        for sid, pos in set_preds.items():
-            if sid in pred_points:
-                pred_points[sid] += 12 * (0.827 ** (pos - 1))
 
     pred_rank: dict[int, int] = {}
     for rank, song in enumerate(
@@ -96,6 +64,7 @@ def special_predictions(short_name: str, show: str, permissions: UserPermissions
     ):
         pred_rank[song.id] = rank
 
+    cursor = get_db().cursor()
     real_positions: dict[int, int] = {}
     if show_data.status in ("partial", "full"):
         cursor.execute(
@@ -174,9 +143,116 @@ def special_predictions(short_name: str, show: str, permissions: UserPermissions
         real_positions=real_positions,
     )
 
+
+@dataclass
+class PredictionMatrix:
+    """A show's predictions as a predictor x song rank matrix.
+
+    Rows are the prediction sets that have predictions, columns
+    ``song_ids``; a song a predictor left out ranks last (the number of
+    songs). ``firsts`` counts each song's 1st-place picks and ``points``
+    its weighted prediction points, 12 * 0.827^(pos-1) per pick."""
+
+    song_ids: list[int]
+    ranks: list[list[int]]
+    firsts: list[int]
+    points: list[float]
+
+    def rank_sums(self) -> list[int]:
+        if not self.ranks:
+            return [0] * len(self.song_ids)
+        return [sum(column) for column in zip(*self.ranks, strict=True)]
+
+    def distinct_ranks(self) -> set[int]:
+        return {rank for row in self.ranks for rank in set(row)}
+
+
+def _prediction_matrix(song_ids: list[int], pred_by_set: dict) -> PredictionMatrix:
+    n_songs = len(song_ids)
+    column = {song_id: j for j, song_id in enumerate(song_ids)}
+    ranks: list[list[int]] = []
+    firsts = [0] * n_songs
+    points = [0.0] * n_songs
+    weights: dict[int, float] = {}
+    for set_preds in pred_by_set.values():
+        row = [n_songs] * n_songs
+        for sid, pos in set_preds.items():
+            j = column.get(sid)
+            if j is None:
+                continue
+            row[j] = pos
+            if pos == 1:
+                firsts[j] += 1
+            if pos not in weights:
+                weights[pos] = 12 * (0.827 ** (pos - 1))
+            points[j] += weights[pos]
+        ranks.append(row)
+    return PredictionMatrix(song_ids, ranks, firsts, points)
+
+
+def _show_predictions(
+    show_data: ShowData, songs: list[Song]
+) -> tuple[dict[str, dict[int, int]], dict[int, float], dict[int, float]]:
+    """Each predictor's ranking in submission order ({username: {song_id:
+    position}}), the songs' odds and their prediction points.
+
+    Finals (no qualifier cutoff) get a winning-probability distribution;
+    semifinals get an independent per-song qualification probability.
+    Prediction points rank the songs independently of the odds. Odds and
+    points are cached per show under its ``show_prediction_version``,
+    which triggers bump whenever a prediction is written or removed."""
+    cursor = get_db().cursor()
+    cursor.execute(
+        "SELECT version FROM show_prediction_version WHERE show_id = %s",
+        (show_data.id,),
+    )
+    version_row = cursor.fetchone()
+    cursor.execute(
+        """
+        SELECT prediction_set.id, account.username
+        FROM prediction_set
+        JOIN account ON prediction_set.user_id = account.id
+        WHERE prediction_set.show_id = %s
+        ORDER BY prediction_set.created_at
+    """,
+        (show_data.id,),
+    )
+    pred_sets = cursor.fetchall()
+    n_predictors = len(pred_sets)
+    n_qualifiers = (show_data.dtf or 0) + (show_data.sc or 0) + (show_data.special or 0)
+    song_ids = [song.id for song in songs]
+
+    def load() -> tuple[dict[int, dict[int, int]], dict[int, float], dict[int, float]]:
+        cursor.execute(
+            """
+            SELECT prediction.set_id, prediction.song_id, prediction.position
+            FROM prediction
+            JOIN prediction_set ON prediction.set_id = prediction_set.id
+            WHERE prediction_set.show_id = %s
+        """,
+            (show_data.id,),
+        )
+        pred_by_set: dict[int, dict[int, int]] = defaultdict(dict)
+        for row in cursor.fetchall():
+            pred_by_set[row["set_id"]][row["song_id"]] = row["position"]
+
+        matrix = _prediction_matrix(song_ids, pred_by_set)
+        if n_qualifiers <= 0:
+            odds = _compute_winning_odds(matrix, n_predictors)
+        else:
+            odds = _compute_qualification_odds(matrix, n_predictors, n_qualifiers)
+        return pred_by_set, odds, dict(zip(song_ids, matrix.points, strict=True))
+
+    version = (n_predictors, version_row and version_row["version"])
+    key = (show_data.id, n_qualifiers, tuple(song_ids), version)
+    pred_by_set, odds, pred_points = cache.cached(PREDICTIONS_REGION, key, load)
+
+    predictors = {ps["username"]: pred_by_set.get(ps["id"], {}) for ps in pred_sets}
+    return predictors, odds, pred_points
+
+
 def _compute_qualification_odds(
-    songs: list,
-    pred_by_set: dict,
+    matrix: PredictionMatrix,
     n_predictors: int,
     n_qualifiers: int,
 ) -> dict[int, float]:
@@ -199,9 +275,10 @@ def _compute_qualification_odds(
     - Sum of probabilities does NOT need to equal N — they are independent
       per-song qualification probabilities.
     """
-    n_songs = len(songs)
+    song_ids = matrix.song_ids
+    n_songs = len(song_ids)
     if n_predictors == 0 or n_songs == 0 or n_qualifiers <= 0:
-        return {song.id: 0.0 for song in songs}
+        return dict.fromkeys(song_ids, 0.0)
 
     cutoff = n_qualifiers + 0.5
     # Temperature scales with show size so the transition zone covers
@@ -211,17 +288,14 @@ def _compute_qualification_odds(
     prior_rank = (n_songs + 1) / 2.0
     prior_weight = 1.0
 
+    # Ranks are integers, so the column sums are exact and the mean is
+    # the same whatever order the predictors are added in.
+    weight_sum = prior_weight + len(matrix.ranks)
     odds: dict[int, float] = {}
-    for song in songs:
-        rank_sum = prior_rank * prior_weight
-        weight_sum = prior_weight
-        for set_preds in pred_by_set.values():
-            pos = set_preds.get(song.id, n_songs)
-            rank_sum += pos
-            weight_sum += 1.0
-        mean_rank = rank_sum / weight_sum
+    for song_id, rank_sum in zip(song_ids, matrix.rank_sums(), strict=True):
+        mean_rank = (prior_rank * prior_weight + rank_sum) / weight_sum
         # Logistic centred at cutoff: mean_rank << cutoff → ~1, >> cutoff → ~0.
-        odds[song.id] = 1.0 / (1.0 + math.exp((mean_rank - cutoff) / temperature))
+        odds[song_id] = 1.0 / (1.0 + math.exp((mean_rank - cutoff) / temperature))
 
     return odds
 
@@ -315,8 +389,7 @@ def _smooth_low_odds(
 
 
 def _compute_winning_odds(
-    songs: list,
-    pred_by_set: dict,
+    matrix: PredictionMatrix,
     n_predictors: int,
 ) -> dict[int, float]:
     """
@@ -343,39 +416,31 @@ def _compute_winning_odds(
     - ``k`` controls the PL decay; moderate (0.4) so 2nd/3rd finishes
       still earn meaningful weight without flattening the tail to noise.
     """
-    n_songs = len(songs)
+    song_ids = matrix.song_ids
+    n_songs = len(song_ids)
     if n_predictors == 0 or n_songs == 0:
-        return {song.id: 0.0 for song in songs}
+        return dict.fromkeys(song_ids, 0.0)
 
     alpha = 0.7
     k = 0.4
 
-    top1: dict[int, int] = {song.id: 0 for song in songs}
-    pl_acc: dict[int, float] = {song.id: 0.0 for song in songs}
-
-    for set_preds in pred_by_set.values():
-        # Rank-1 tally
-        for song in songs:
-            if set_preds.get(song.id) == 1:
-                top1[song.id] += 1
-
-        # Plackett–Luce per-predictor softmax
-        scores: dict[int, float] = {}
-        for song in songs:
-            rank = set_preds.get(song.id, n_songs)
-            scores[song.id] = math.exp(-k * (rank - 1))
-        total = sum(scores.values())
+    # Plackett–Luce per-predictor softmax. exp() only depends on the
+    # rank, so it is taken once per distinct rank rather than per cell.
+    weights = {rank: math.exp(-k * (rank - 1)) for rank in matrix.distinct_ranks()}
+    pl_acc = [0.0] * n_songs
+    for row in matrix.ranks:
+        scores = [weights[rank] for rank in row]
+        total = sum(scores)
         if total <= 0:
             continue
-        for sid, score in scores.items():
-            pl_acc[sid] += score / total
+        pl_acc = [acc + score / total for acc, score in zip(pl_acc, scores, strict=True)]
 
     raw = {
-        song.id: (
-            alpha * (top1[song.id] / n_predictors)
-            + (1 - alpha) * (pl_acc[song.id] / n_predictors)
+        song_id: (
+            alpha * (firsts / n_predictors)
+            + (1 - alpha) * (pl / n_predictors)
         )
-        for song in songs
+        for song_id, firsts, pl in zip(song_ids, matrix.firsts, pl_acc, strict=True)
     }
 
     # Keep every song's odds above 1/1000 — the bare PL tail otherwise
@@ -455,59 +520,10 @@ def show_predictions(year: int, show: str, permissions: UserPermissions):
     if not songs:
         return render_template("error.html", error="No songs found for this show."), 404
 
-    db = get_db()
-    cursor = db.cursor()
-
-    cursor.execute(
-        """
-        SELECT prediction_set.id, account.username, prediction_set.created_at
-        FROM prediction_set
-        JOIN account ON prediction_set.user_id = account.id
-        WHERE prediction_set.show_id = %s
-        ORDER BY prediction_set.created_at
-    """,
-        (show_data.id,),
-    )
-    pred_sets = cursor.fetchall()
-
-    cursor.execute(
-        """
-        SELECT prediction.set_id, prediction.song_id, prediction.position
-        FROM prediction
-        JOIN prediction_set ON prediction.set_id = prediction_set.id
-        WHERE prediction_set.show_id = %s
-    """,
-        (show_data.id,),
-    )
-
-    pred_by_set: dict[int, dict[int, int]] = defaultdict(dict)
-    for row in cursor.fetchall():
-        pred_by_set[row["set_id"]][row["song_id"]] = row["position"]
-
-    n_predictors = len(pred_sets)
+    predictors, odds, pred_points = _show_predictions(show_data, songs)
+    n_predictors = len(predictors)
     n_qualifiers = (show_data.dtf or 0) + (show_data.sc or 0) + (show_data.special or 0)
-
-    # Finals (no qualifier cutoff) get a winning-probability distribution;
-    # semifinals get an independent per-song qualification probability.
     is_final = n_qualifiers <= 0
-    if is_final:
-        odds = _compute_winning_odds(songs, pred_by_set, n_predictors)
-    else:
-        odds = _compute_qualification_odds(songs, pred_by_set, n_predictors, n_qualifiers)
-
-    # Build predictor dict ordered by submission time: {username: {song_id: position}}
-    predictors: dict[str, dict] = {}
-    for ps in pred_sets:
-        predictors[ps["username"]] = pred_by_set.get(ps["id"], {})
-
-    # Weighted prediction points: each predictor awards 12 * 0.827^(pos-1) points.
-    # Songs are then ranked by total points to produce a predicted finishing order
-    # that is independent of the qualification/winning odds.
-    pred_points: dict[int, float] = {song.id: 0.0 for song in songs}
-    for set_preds in pred_by_set.values():
-        for sid, pos in set_preds.items():
-            if sid in pred_points:
-                pred_points[sid] += 12 * (0.827 ** (pos - 1))
 
     pred_rank: dict[int, int] = {}
     for rank, song in enumerate(
@@ -515,6 +531,7 @@ def show_predictions(year: int, show: str, permissions: UserPermissions):
     ):
         pred_rank[song.id] = rank
 
+    cursor = get_db().cursor()
     real_positions: dict[int, int] = {}
     if show_data.status in ("partial", "full"):
         cursor.execute(
@@ -9,7 +9,9 @@ from ...utils import (
     dt_now,
     get_show_id,
     get_votes_for_songs,
+    render_cached,
     render_template,
+    show_page_version,
     with_permissions,
 )
 from .common import bp, resolve_special
@@ -17,6 +19,7 @@ from .common import bp, resolve_special
 
 @bp.get("/<int:year>/<show>/qualifiers")
 @with_permissions
+@render_cached(show_page_version)
 def qualifiers(year: int, show: str, permissions: UserPermissions):
     _year = year
     show_data = get_show_id(show, _year)
@@ -7,7 +7,9 @@ from ...utils import (
     dt_now,
     get_show_id,
     get_show_songs,
+    render_cached,
     render_template,
+    show_page_version,
     with_permissions,
 )
 from .common import bp, get_other_shows, resolve_special
@@ -236,6 +238,7 @@ def special_detailed_results(short_name: str, show: str, permissions: UserPermis
 
 @bp.get("/<int:year>/<show>")
 @with_permissions
+@render_cached(show_page_version)
 def results(year: int, show: str, permissions: UserPermissions):
     _year = year
     show_data = get_show_id(show, _year)
@@ -368,6 +371,7 @@ def results(year: int, show: str, permissions: UserPermissions):
 
 @bp.get("/<int:year>/<show>/detailed")
 @with_permissions
+@render_cached(show_page_version)
 def detailed_results(year: int, show: str, permissions: UserPermissions):
     _year = year
     show_data = get_show_id(show, _year)
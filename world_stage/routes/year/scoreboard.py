@@ -1,21 +1,186 @@
+import datetime
+import math
 from collections import defaultdict
 
-from ...db import get_db
+from flask import Response, current_app, request
+
+from ... import cache
+from ...db import fetchone, get_db
 from ...utils import (
-    AbstractVoteSequencer,
-    ChronologicalVoteSequencer,
-    RandomVoteSequencer,
-    SuspensefulVoteSequencer,
+    ShowData,
     UserPermissions,
     dt_now,
+    get_official_ballots,
     get_show_id,
     get_show_songs,
+    get_vote_order,
+    render_cached,
     render_template,
+    show_page_version,
     with_permissions,
 )
 from .common import bp, resolve_special
 from .penalty import _show_penalties
 
+# The reveal payload of a fully published show. Every viewer of a live
+# reveal asks for it at once, so it is built once per worker and cleared
+# when ballots, entries or names change (see
+# 20261017180000_notify_scoreboard_cache).
+SCOREBOARD_REGION = cache.define_region("scoreboard", ttl=3600, maxsize=64)
+
+# Seconds between two voters of a live reveal, unless REVEAL_STEP_SECONDS
+# is configured. Long enough for the client to animate one ballot.
+REVEAL_STEP = 15.0
+
+
+def _scoreboard_payload(year: int | None, show: str, show_data: ShowData) -> dict | None:
+    """Ballots, reveal order, voter associations, voters' own songs and
+    penalties for a show, in a fixed number of queries. None when the
+    show has no songs."""
+    songs = get_show_songs(year, show, select_votes=True)
+    if not songs:
+        return None
+
+    results = get_official_ballots(show_data.id)
+    vote_order = get_vote_order(show_data, songs, results)
+    get_db().commit()
+
+    cursor = get_db().cursor()
+    cursor.execute(
+        """
+        SELECT account.username, song.id FROM song
+        JOIN account ON song.submitter_id = account.id
+        JOIN song_show ON song.id = song_show.song_id
+        WHERE song_show.show_id = %s AND account.username = ANY(%s)
+    """,
+        (show_data.id, vote_order),
+    )
+    submitted = defaultdict(list)
+    for row in cursor.fetchall():
+        submitted[row["username"]].append(row["id"])
+    user_songs = {
+        username: submitted[username] for username in vote_order if username in submitted
+    }
+
+    cursor.execute(
+        """
+        SELECT username, nickname, country_id AS code, country.name AS country FROM vote_set
+        JOIN account ON vote_set.voter_id = account.id
+        JOIN country ON vote_set.country_id = country.id
+        WHERE vote_set.show_id = %s AND vote_set.result_mode = 'official'
+    """,
+        (show_data.id,),
+    )
+    vote_set = cursor.fetchall()
+    voter_assoc = {}
+    for row in vote_set:
+        voter_assoc[row["username"]] = row
+
+    return {
+        "songs": songs,
+        "results": results,
+        "points": show_data.points,
+        "vote_order": vote_order,
+        "associations": voter_assoc,
+        "user_songs": user_songs,
+        "penalties": _show_penalties(show_data.id),
+    }
+
+
+def _scores_response(year: int | None, show: str, show_data: ShowData):
+    """The scoreboard payload as JSON, cached once the show is full."""
+
+    def load() -> bytes | None:
+        payload = _scoreboard_payload(year, show, show_data)
+        return None if payload is None else current_app.json.response(payload).get_data()
+
+    if show_data.status == "full":
+        body = cache.cached(SCOREBOARD_REGION, show_data.id, load)
+    else:
+        body = load()
+    if body is None:
+        return {"error": "No songs found for this show."}, 404
+    return Response(body, mimetype="application/json")
+
+
+def _event(event_id: int, event: str, data) -> bytes:
+    return f"id: {event_id}\nevent: {event}\ndata: {current_app.json.dumps(data)}\n\n".encode()
+
+
+def _reveal_timeline(year: int | None, show: str, show_data: ShowData) -> tuple[bytes, ...] | None:
+    """The reveal as server-sent events: the show (entries, points,
+    voters' details), one ``vote`` per voter with the points they award
+    and the running totals after them, then ``end``. None when the show
+    has no songs."""
+    payload = _scoreboard_payload(year, show, show_data)
+    if payload is None:
+        return None
+
+    penalties = payload["penalties"]
+    totals = {song.id: -penalties.get(song.id, 0) for song in payload["songs"]}
+    events = [
+        _event(0, "show", {
+            "songs": payload["songs"],
+            "points": payload["points"],
+            "associations": payload["associations"],
+            "user_songs": payload["user_songs"],
+            "penalties": penalties,
+            "voters": len(payload["vote_order"]),
+        })
+    ]
+    for n, voter in enumerate(payload["vote_order"], start=1):
+        ballot = payload["results"][voter]
+        for pts, song_id in ballot.items():
+            totals[song_id] += pts
+        events.append(_event(n, "vote", {"voter": voter, "points": ballot, "totals": totals}))
+    events.append(_event(len(events), "end", {}))
+    return tuple(events)
+
+
+def _reveal_stream(year: int | None, show: str, show_data: ShowData):
+    """Stream the reveal timeline. Once an admin starts the reveal,
+    event ``n`` is due ``n`` steps after ``show.reveal_started_at``, so
+    every viewer sees the same voter at the same time; before that (or
+    for a replay) the whole timeline is sent at once and the client
+    paces it. A live response carries only the events already due and
+    ends with a ``retry`` of the time left until the next one: the
+    browser reconnects then with its ``Last-Event-ID``, so no worker
+    thread is held by a viewer between two voters. The timeline of a
+    full show is built once per worker and shared by every connection."""
+
+    def load() -> tuple[bytes, ...] | None:
+        return _reveal_timeline(year, show, show_data)
+
+    if show_data.status == "full":
+        timeline = cache.cached(SCOREBOARD_REGION, ("timeline", show_data.id), load)
+    else:
+        timeline = load()
+    if timeline is None:
+        return {"error": "No songs found for this show."}, 404
+
+    cursor = get_db().cursor()
+    cursor.execute("SELECT reveal_started_at FROM show WHERE id = %s", (show_data.id,))
+    started_at: datetime.datetime | None = fetchone(cursor)["reveal_started_at"]
+    last_id = request.headers.get("Last-Event-ID", type=int)
+    first = 0 if last_id is None else last_id + 1
+    events = list(timeline[first:])
+
+    step = datetime.timedelta(seconds=current_app.config.get("REVEAL_STEP_SECONDS", REVEAL_STEP))
+    now = dt_now()
+    if started_at is not None and now < started_at + step * len(timeline):
+        # The show itself gives nothing away, so it is always due.
+        due = max(int((now - started_at) / step) + 1, 1)
+        events = [b"event: live\ndata: true\n\n", *timeline[first:due]]
+        upcoming = max(first, due)
+        if upcoming < len(timeline):
+            wait = (started_at + step * upcoming - now) / datetime.timedelta(milliseconds=1)
+            events.append(f"retry: {math.ceil(wait)}\n\n".encode())
+
+    response = Response(b"".join(events), mimetype="text/event-stream")
+    response.cache_control.no_cache = True
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
 
 @bp.get("/special/<short_name>/<show>/scoreboard")
 @with_permissions
@@ -75,77 +240,38 @@ def special_scores(short_name: str, show: str, permissions: UserPermissions):
     ):
         return {"error": "Voting hasn't closed yet."}, 400
 
-    db = get_db()
-    cursor = db.cursor()
-    songs = get_show_songs(_year, show, select_votes=True)
-    if not songs:
-        return {"error": "No songs found for this show."}, 404
+    return _scores_response(_year, show, show_data)
 
-    cursor.execute(
-        """
-        SELECT song_id, score AS pts, username FROM vote
-        JOIN vote_set ON vote.vote_set_id = vote_set.id
-        JOIN account ON vote_set.voter_id = account.id
-        JOIN song ON vote.song_id = song.id
-        WHERE vote_set.show_id = %s AND vote_set.result_mode = 'official'
-        ORDER BY vote_set.created_at
-    """,
-        (show_data.id,),
-    )
-    results_raw = cursor.fetchall()
-    results: dict[str, dict[int, int]] = defaultdict(dict)
-    for row in results_raw:
-        results[row["username"]][row["pts"]] = row["song_id"]
-
-    sequencer: AbstractVoteSequencer
-    if show_data.id < 60:
-        sequencer = SuspensefulVoteSequencer(results, songs, show_data.points, seed=show_data.id)
-    elif show_data.id < 65:
-        sequencer = RandomVoteSequencer(results, songs, show_data.points, seed=show_data.id)
-    else:
-        sequencer = ChronologicalVoteSequencer(results, songs, show_data.points, seed=show_data.id)
-    vote_order = sequencer.get_order()
-
-    user_songs = defaultdict(list)
-    for voter_username in vote_order:
-        cursor.execute(
-            """
-            SELECT song.id FROM song
-            JOIN account ON song.submitter_id = account.id
-            JOIN song_show ON song.id = song_show.song_id
-            WHERE account.username = %s AND song_show.show_id = %s
-        """,
-            (voter_username, show_data.id),
-        )
-        for song_id in cursor.fetchall():
-            user_songs[voter_username].append(song_id["id"])
 
-    cursor.execute(
-        """
-        SELECT username, nickname, country_id AS code, country.name AS country FROM vote_set
-        JOIN account ON vote_set.voter_id = account.id
-        JOIN country ON vote_set.country_id = country.id
-        WHERE vote_set.show_id = %s AND vote_set.result_mode = 'official'
-    """,
-        (show_data.id,),
-    )
-    vote_set = cursor.fetchall()
-    voter_assoc = {}
-    for row in vote_set:
-        voter_assoc[row["username"]] = row
+@bp.get("/special/<short_name>/<show>/scoreboard/stream")
+@with_permissions
+def special_scores_stream(short_name: str, show: str, permissions: UserPermissions):
+    special_year = resolve_special(short_name)
+    if not special_year:
+        return {"error": "Special not found"}, 404
+
+    _year = special_year["id"]
+    show_data = get_show_id(show, _year)
+
+    if not show_data:
+        return {"error": "Show not found"}, 404
+
+    if show_data.status != "full" and not permissions.can_view_restricted:
+        return {"error": "You aren't allowed to access the scoreboard"}, 400
+
+    if (
+        show_data.voting_closes
+        and show_data.voting_closes > dt_now()
+        and not permissions.can_view_restricted
+    ):
+        return {"error": "Voting hasn't closed yet."}, 400
+
+    return _reveal_stream(_year, show, show_data)
 
-    return {
-        "songs": songs,
-        "results": results,
-        "points": show_data.points,
-        "vote_order": vote_order,
-        "associations": voter_assoc,
-        "user_songs": user_songs,
-        "penalties": _show_penalties(show_data.id),
-    }
 
 @bp.get("/<int:year>/<show>/scoreboard")
 @with_permissions
+@render_cached(show_page_version)
 def scoreboard(year: int, show: str, permissions: UserPermissions):
     _year = year
     show_data = get_show_id(show, _year)
@@ -187,71 +313,26 @@ def scores(year: int, show: str, permissions: UserPermissions):
     ):
         return {"error": "Voting hasn't closed yet."}, 400
 
-    db = get_db()
-    cursor = db.cursor()
-    songs = get_show_songs(_year, show, select_votes=True)
-    if not songs:
-        return {"error": "No songs found for this show."}, 404
+    return _scores_response(_year, show, show_data)
 
-    cursor.execute(
-        """
-        SELECT song_id, score AS pts, username FROM vote
-        JOIN vote_set ON vote.vote_set_id = vote_set.id
-        JOIN account ON vote_set.voter_id = account.id
-        JOIN song ON vote.song_id = song.id
-        WHERE vote_set.show_id = %s AND vote_set.result_mode = 'official'
-        ORDER BY vote_set.created_at
-    """,
-        (show_data.id,),
-    )
-    results_raw = cursor.fetchall()
-    results: dict[str, dict[int, int]] = defaultdict(dict)
-    for row in results_raw:
-        results[row["username"]][row["pts"]] = row["song_id"]
-
-    sequencer: AbstractVoteSequencer
-    if show_data.id < 60:
-        sequencer = SuspensefulVoteSequencer(results, songs, show_data.points, seed=show_data.id)
-    elif show_data.id < 65:
-        sequencer = RandomVoteSequencer(results, songs, show_data.points, seed=show_data.id)
-    else:
-        sequencer = ChronologicalVoteSequencer(results, songs, show_data.points, seed=show_data.id)
-    vote_order = sequencer.get_order()
-
-    user_songs = defaultdict(list)
-    for voter_username in vote_order:
-        cursor.execute(
-            """
-            SELECT song.id FROM song
-            JOIN account ON song.submitter_id = account.id
-            JOIN song_show ON song.id = song_show.song_id
-            WHERE account.username = %s AND song_show.show_id = %s
-        """,
-            (voter_username, show_data.id),
-        )
-        for song_id in cursor.fetchall():
-            user_songs[voter_username].append(song_id["id"])
 
-    cursor.execute(
-        """
-        SELECT username, nickname, country_id AS code, country.name AS country FROM vote_set
-        JOIN account ON vote_set.voter_id = account.id
-        JOIN country ON vote_set.country_id = country.id
-        WHERE vote_set.show_id = %s AND vote_set.result_mode = 'official'
-    """,
-        (show_data.id,),
-    )
-    vote_set = cursor.fetchall()
-    voter_assoc = {}
-    for row in vote_set:
-        voter_assoc[row["username"]] = row
+@bp.get("/<int:year>/<show>/scoreboard/stream")
+@with_permissions
+def scores_stream(year: int, show: str, permissions: UserPermissions):
+    _year = year
+    show_data = get_show_id(show, _year)
 
-    return {
-        "songs": songs,
-        "results": results,
-        "points": show_data.points,
-        "vote_order": vote_order,
-        "associations": voter_assoc,
-        "user_songs": user_songs,
-        "penalties": _show_penalties(show_data.id),
-    }
+    if not show_data:
+        return {"error": "Show not found"}, 404
+
+    if show_data.status != "full" and not permissions.can_view_restricted:
+        return {"error": "You aren't allowed to access the scoreboard"}, 400
+
+    if (
+        show_data.voting_closes
+        and show_data.voting_closes > dt_now()
+        and not permissions.can_view_restricted
+    ):
+        return {"error": "Voting hasn't closed yet."}, 400
+
+    return _reveal_stream(_year, show, show_data)
@@ -7,24 +7,31 @@ MD5 of its sorted parameters. The two services differ only in their
 endpoint URLs and which config keys hold their credentials, so they
 share one code path here.
 
-All network calls are best-effort: they run inside the request that
-triggers them, so any failure is logged and swallowed rather than raised
+Radio submissions never touch the network inside a request: they are
+written to the ``scrobble_queue`` table and sent by the long-running
+``scrobble-worker`` command (supervised in production by
+``scripts/systemd/worldstage-scrobble-worker.service``), which retries
+failures with exponential backoff. The interactive calls (the auth flow) still run in-request and
+are best-effort: any failure is logged and swallowed rather than raised
 into the response. A service whose API key/secret isn't configured is
 never offered to users and never contacted.
 """
 
+import datetime
 import hashlib
+import http.client
 import json
 import logging
 import os
-import urllib.error
+import threading
 import urllib.parse
-import urllib.request
 from concurrent.futures import ThreadPoolExecutor
 
 import click
+import psycopg
 from flask import Flask, current_app
 from flask.cli import with_appcontext
+from psycopg_pool import ConnectionPool
 
 from .db import get_db
 
@@ -48,9 +55,26 @@ SERVICES = {
     },
 }
 
-# Kept short: these calls block the request that triggers them.
+# Kept short: the auth flow calls block the request that triggers them.
 HTTP_TIMEOUT = 6.0
 
+# The most plays one track.scrobble call may carry.
+SCROBBLE_BATCH = 50
+
+# Queue draining: how many rows one pass claims, how long a claimed row
+# stays invisible to other workers, and how retries back off. A failed
+# submission is retried after RETRY_BASE, 2x, 4x, ... seconds and given
+# up after MAX_ATTEMPTS; a now-playing update older than NOW_PLAYING_TTL
+# is dropped instead, since the song has moved on.
+QUEUE_BATCH = 100
+QUEUE_LEASE = 60
+RETRY_BASE = 30
+MAX_ATTEMPTS = 8
+NOW_PLAYING_TTL = 300
+# The worker re-checks the queue this often even without a NOTIFY, to
+# pick up retries that have come due.
+WORKER_POLL_INTERVAL = 15.0
+
 ALBUM = "World Stage Radio"
 
 
@@ -102,6 +126,56 @@ def _sign(params: dict[str, str], secret: str) -> str:
     return hashlib.md5(raw.encode("utf-8")).hexdigest()
 
 
+# Keep-alive connections, one per service host in each thread. Queue
+# draining reuses the same worker threads, so consecutive submissions
+# skip the TCP and TLS handshakes.
+_connections = threading.local()
+
+
+def _connection(url: urllib.parse.SplitResult) -> http.client.HTTPConnection:
+    pool = _connections.__dict__.setdefault("by_host", {})
+    key = (url.scheme, url.netloc)
+    conn = pool.get(key)
+    if conn is None:
+        cls = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+        conn = pool[key] = cls(url.netloc, timeout=HTTP_TIMEOUT)
+    return conn
+
+
+def _request(root: str, query: str, *, post: bool) -> tuple[int, bytes]:
+    """Send one request over this thread's connection to ``root``'s host.
+
+    A reused keep-alive connection the server has since closed fails
+    before any response; that is retried once on a fresh connection.
+    Nothing else is: after a timeout the POST may already have been
+    applied, and sending it again would scrobble twice."""
+    url = urllib.parse.urlsplit(root)
+    path = url.path or "/"
+    for attempt in range(2):
+        conn = _connection(url)
+        reused = conn.sock is not None
+        try:
+            if post:
+                conn.request(
+                    "POST",
+                    path,
+                    body=query.encode("utf-8"),
+                    headers={"Content-Type": "application/x-www-form-urlencoded"},
+                )
+            else:
+                conn.request("GET", f"{path}?{query}")
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            conn.close()
+            if attempt or not reused:
+                raise
+        except (http.client.HTTPException, OSError):
+            conn.close()
+            raise
+    raise AssertionError("unreachable")
+
+
 def _call(service: str, method: str, params: dict, *, post: bool) -> dict | None:
     """Make one signed API call. Returns the parsed JSON, or None on any
     failure (unconfigured, network error, API error, bad JSON)."""
@@ -118,15 +192,9 @@ def _call(service: str, method: str, params: dict, *, post: bool) -> dict | None
 
     root = SERVICES[service]["ws_root"]
     try:
-        if post:
-            req = urllib.request.Request(
-                root, data=urllib.parse.urlencode(p).encode("utf-8"), method="POST"
-            )
-        else:
-            req = urllib.request.Request(root + "?" + urllib.parse.urlencode(p), method="GET")
-        with urllib.request.urlopen(req, timeout=HTTP_TIMEOUT) as resp:
-            out = json.loads(resp.read().decode("utf-8"))
-    except (urllib.error.URLError, OSError, TimeoutError, ValueError) as e:
+        status, body = _request(root, urllib.parse.urlencode(p), post=post)
+        out = json.loads(body.decode("utf-8"))
+    except (http.client.HTTPException, OSError, TimeoutError, ValueError) as e:
         log.warning("scrobble %s %s failed: %s", service, method, e)
         return None
     if isinstance(out, dict) and "error" in out:
@@ -138,6 +206,9 @@ def _call(service: str, method: str, params: dict, *, post: bool) -> dict | None
             out.get("message"),
         )
         return None
+    if status >= 400:
+        log.warning("scrobble %s %s failed: HTTP %d", service, method, status)
+        return None
     return out
 
 
@@ -186,6 +257,25 @@ def scrobble(service, session_key, artist, track, timestamp, album=None, duratio
     return out is not None
 
 
+def scrobble_many(service, session_key, plays: list[dict]) -> bool:
+    """Submit up to ``SCROBBLE_BATCH`` plays in one ``track.scrobble``
+    call, using the protocol's indexed parameters (``artist[0]``,
+    ``track[0]``, ``timestamp[0]``, ...). Each play has ``artist``,
+    ``track`` and ``timestamp``, and optionally ``album`` and
+    ``duration``."""
+    if not 0 < len(plays) <= SCROBBLE_BATCH:
+        raise ValueError(f"A batch holds 1 to {SCROBBLE_BATCH} plays")
+    params: dict = {"sk": session_key}
+    for i, play in enumerate(plays):
+        params[f"artist[{i}]"] = play["artist"]
+        params[f"track[{i}]"] = play["track"]
+        params[f"timestamp[{i}]"] = int(play["timestamp"])
+        params[f"album[{i}]"] = play.get("album")
+        duration = play.get("duration")
+        params[f"duration[{i}]"] = int(duration) if duration else None
+    return _call(service, "track.scrobble", params, post=True) is not None
+
+
 # ── Per-user linked accounts ─────────────────────────────────────────
 
 
@@ -235,47 +325,217 @@ def upsert_account(user_id: int, service: str, session_key: str, remote_username
     db.commit()
 
 
-def _mark_scrobbled(account_id: int):
+# ── Outbound queue ───────────────────────────────────────────────────
+
+
+def enqueue(user_id, *, artist, track, timestamp=None, duration=None, album=ALBUM):
+    """Queue a now-playing update (timestamp=None) or a scrobble
+    (timestamp set) for every enabled, configured account of the user.
+
+    Only writes to the database; the scrobble worker is woken with a
+    NOTIFY and does the sending.
+    """
+    services = configured_services()
+    if not services:
+        return
+    db = get_db()
+    cursor = db.cursor()
+    duration = int(duration) if duration else None
+    if timestamp is None:
+        cursor.execute(
+            """
+            INSERT INTO scrobble_queue (account_id, kind, artist, track, album, duration)
+            SELECT id, 'now_playing', %s, %s, %s, %s
+            FROM scrobble_account
+            WHERE user_id = %s AND enabled AND service = ANY(%s)
+            ON CONFLICT (account_id) WHERE kind = 'now_playing' DO UPDATE
+                SET artist = EXCLUDED.artist,
+                    track = EXCLUDED.track,
+                    album = EXCLUDED.album,
+                    duration = EXCLUDED.duration,
+                    attempts = 0,
+                    queued_at = CURRENT_TIMESTAMP,
+                    next_attempt_at = CURRENT_TIMESTAMP
+            """,
+            (artist, track, album, duration, user_id, services),
+        )
+    else:
+        cursor.execute(
+            """
+            INSERT INTO scrobble_queue
+                (account_id, kind, artist, track, album, duration, played_at)
+            SELECT id, 'scrobble', %s, %s, %s, %s, %s
+            FROM scrobble_account
+            WHERE user_id = %s AND enabled AND service = ANY(%s)
+            ON CONFLICT (account_id, played_at, artist, track)
+                WHERE kind = 'scrobble' DO NOTHING
+            """,
+            (artist, track, album, duration, int(timestamp), user_id, services),
+        )
+    if cursor.rowcount:
+        cursor.execute("NOTIFY scrobble_queue")
+    db.commit()
+
+
+def _claim(limit: int) -> list[dict]:
+    """Lease up to ``limit`` due rows. The lease is committed right away so
+    no row lock is held while the services are contacted — a concurrent
+    now-playing update for the same account never waits on the worker."""
     db = get_db()
     cursor = db.cursor()
     cursor.execute(
-        "UPDATE scrobble_account SET last_scrobbled_at = CURRENT_TIMESTAMP WHERE id = %s",
-        (account_id,),
+        """
+        UPDATE scrobble_queue q
+        SET attempts = q.attempts + 1,
+            next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+        FROM scrobble_account a
+        WHERE a.id = q.account_id
+          AND q.id IN (
+              SELECT id FROM scrobble_queue
+              WHERE next_attempt_at <= CURRENT_TIMESTAMP
+              ORDER BY id
+              LIMIT %s
+              FOR UPDATE SKIP LOCKED
+          )
+        RETURNING q.id, q.kind, q.artist, q.track, q.album, q.duration, q.played_at,
+            q.attempts, q.queued_at, a.id AS account_id, a.service, a.session_key,
+            a.enabled
+        """,
+        (QUEUE_LEASE, limit),
     )
+    rows = cursor.fetchall()
     db.commit()
+    return rows
 
 
-def send_to_all(user_id, *, artist, track, timestamp=None, duration=None, album=ALBUM):
-    """Dispatch a now-playing update (timestamp=None) or a scrobble
-    (timestamp set) to every enabled, configured account for the user.
+def _batches(rows: list[dict]) -> list[list[dict]]:
+    """Group rows into calls: one per now-playing update, and each
+    account's scrobbles together, up to ``SCROBBLE_BATCH`` per call."""
+    batches = []
+    plays: dict[int, list[dict]] = {}
+    for row in rows:
+        if row["kind"] == "now_playing":
+            batches.append([row])
+        else:
+            plays.setdefault(row["account_id"], []).append(row)
+    for account_plays in plays.values():
+        account_plays.sort(key=lambda r: r["played_at"])
+        batches.extend(
+            account_plays[i : i + SCROBBLE_BATCH]
+            for i in range(0, len(account_plays), SCROBBLE_BATCH)
+        )
+    return batches
+
+
+def _send(batch: list[dict]) -> bool:
+    first = batch[0]
+    if first["kind"] == "now_playing":
+        return now_playing(
+            first["service"], first["session_key"], first["artist"], first["track"],
+            first["duration"],
+        )
+    return scrobble_many(
+        first["service"],
+        first["session_key"],
+        [
+            {
+                "artist": row["artist"],
+                "track": row["track"],
+                "timestamp": row["played_at"],
+                "album": row["album"],
+                "duration": row["duration"],
+            }
+            for row in batch
+        ],
+    )
 
-    Best-effort: services are contacted in parallel so total latency is
-    bounded by the slowest single call rather than their sum.
+
+def drain(executor: ThreadPoolExecutor | None = None, limit: int = QUEUE_BATCH) -> int:
+    """Send one batch of due queue rows. Returns how many were claimed.
+
+    Each account's scrobbles go out in multi-track calls. Calls run on
+    ``executor`` when given (the worker's long-lived pool),
+    otherwise one after another in this thread. Outcomes are written
+    back in a single transaction: sent rows are deleted and their
+    accounts' ``last_scrobbled_at`` bumped in one statement; failures
+    are rescheduled with backoff or dropped. A row replaced by a newer
+    now-playing update while it was leased (``queued_at`` moved) is left
+    alone, so the newer update still goes out.
     """
-    accounts = get_enabled_accounts(user_id)
-    if not accounts:
-        return
+    rows = _claim(limit)
+    if not rows:
+        return 0
 
-    # Worker threads need their own application context — current_app
-    # (read by _creds) is bound to the request thread, not the pool's.
     app = current_app._get_current_object()
 
-    def one(account):
+    def one(batch):
+        # Worker threads need their own application context — current_app
+        # (read by _creds) is bound to the draining thread, not the pool's.
         with app.app_context():
-            if timestamp is None:
-                ok = now_playing(
-                    account["service"], account["session_key"], artist, track, duration
+            return _send(batch)
+
+    batches = _batches([r for r in rows if r["enabled"] and is_configured(r["service"])])
+    results = executor.map(one, batches) if executor else map(_send, batches)
+    outcome = {
+        row["id"]: ok for batch, ok in zip(batches, results, strict=True) for row in batch
+    }
+
+    done, retry, scrobbled = [], [], set()
+    for row in rows:
+        key = (row["id"], row["queued_at"])
+        ok = outcome.get(row["id"])
+        if ok:
+            done.append(key)
+            if row["kind"] == "scrobble":
+                scrobbled.add(row["account_id"])
+        elif ok is None or row["attempts"] >= MAX_ATTEMPTS:
+            # Account disabled or service unconfigured since queueing, or
+            # out of retries.
+            done.append(key)
+            if ok is not None:
+                log.warning(
+                    "scrobble %s %s dropped after %d attempts",
+                    row["service"], row["kind"], row["attempts"],
                 )
-            else:
-                ok = scrobble(
-                    account["service"], account["session_key"], artist, track, timestamp, album, duration
-                )
-        return account["id"] if (ok and timestamp is not None) else None
+        elif row["kind"] == "now_playing" and _age(row) > NOW_PLAYING_TTL:
+            done.append(key)
+        else:
+            retry.append((*key, RETRY_BASE * 2 ** (row["attempts"] - 1)))
 
-    with ThreadPoolExecutor(max_workers=len(accounts)) as pool:
-        scrobbled = [r for r in pool.map(one, accounts) if r is not None]
-    for account_id in scrobbled:
-        _mark_scrobbled(account_id)
+    db = get_db()
+    cursor = db.cursor()
+    if done:
+        cursor.execute(
+            """
+            DELETE FROM scrobble_queue q
+            USING unnest(%s::bigint[], %s::timestamptz[]) AS done(id, queued_at)
+            WHERE q.id = done.id AND q.queued_at = done.queued_at
+            """,
+            ([i for i, _ in done], [t for _, t in done]),
+        )
+    if retry:
+        cursor.execute(
+            """
+            UPDATE scrobble_queue q
+            SET next_attempt_at = CURRENT_TIMESTAMP + make_interval(secs => retry.delay)
+            FROM unnest(%s::bigint[], %s::timestamptz[], %s::integer[])
+                AS retry(id, queued_at, delay)
+            WHERE q.id = retry.id AND q.queued_at = retry.queued_at
+            """,
+            ([r[0] for r in retry], [r[1] for r in retry], [r[2] for r in retry]),
+        )
+    if scrobbled:
+        cursor.execute(
+            "UPDATE scrobble_account SET last_scrobbled_at = CURRENT_TIMESTAMP "
+            "WHERE id = ANY(%s)",
+            (sorted(scrobbled),),
+        )
+    db.commit()
+    return len(rows)
+
+
+def _age(row: dict) -> float:
+    return (datetime.datetime.now(datetime.UTC) - row["queued_at"]).total_seconds()
 
 
 # ── CLI ──────────────────────────────────────────────────────────────
@@ -290,5 +550,31 @@ def scrobble_doctor_command():
         click.echo(f"{svc['name']} ({service}): {state}")
 
 
+@click.command("scrobble-worker")
+@click.option("--workers", default=4, show_default=True, help="Concurrent submissions.")
+@click.option("--once", is_flag=True, help="Drain what is due now, then exit.")
+@with_appcontext
+def scrobble_worker_command(workers: int, once: bool):
+    """Send queued now-playing updates and scrobbles."""
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        if once:
+            total = 0
+            while sent := drain(executor):
+                total += sent
+            click.echo(f"Processed {total} queued submissions.")
+            return
+
+        pool: ConnectionPool = current_app.config["DB_POOL"]
+        with psycopg.connect(pool.conninfo, autocommit=True) as listener:
+            listener.execute("LISTEN scrobble_queue")
+            click.echo("Waiting for scrobbles...")
+            while True:
+                while drain(executor):
+                    pass
+                for _ in listener.notifies(timeout=WORKER_POLL_INTERVAL, stop_after=1):
+                    pass
+
+
 def init_app(app: Flask):
     app.cli.add_command(scrobble_doctor_command)
+    app.cli.add_command(scrobble_worker_command)
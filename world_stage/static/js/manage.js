@@ -45,6 +45,28 @@ async function closeVoting(showId) {
     setError(data.error);
 }
 
+async function startReveal(showId) {
+    const url = window.location.href + `/${showId}`;
+    const body = { 'action': 'start_reveal' };
+    const data = await fetchHelper(url, body);
+    if (data.error) {
+        setError(data.error);
+    } else {
+        location.reload();
+    }
+}
+
+async function stopReveal(showId) {
+    const url = window.location.href + `/${showId}`;
+    const body = { 'action': 'stop_reveal' };
+    const data = await fetchHelper(url, body);
+    if (data.error) {
+        setError(data.error);
+    } else {
+        location.reload();
+    }
+}
+
 async function closePredictions(showId) {
     const url = window.location.href + `/${showId}`;
     const body = { 'action': 'close_predictions' };
@@ -66,6 +66,45 @@
         return data;
     }
 
+    // The schedule is deterministic, so upcoming slots come from one
+    // /radio/schedule fetch and each track change is resolved locally.
+    // The window is hour-aligned: every listener asks for the same URL,
+    // which the server answers with a 304 until its pool changes.
+    let timetable = null;
+    const SCHEDULE_WINDOW = 7200;
+
+    async function fetchSchedule(t) {
+        const from = Math.floor(t / 3600) * 3600;
+        const res = await fetch(
+            '/radio/schedule?from=' + from + '&to=' + (from + SCHEDULE_WINDOW));
+        if (!res.ok) throw new Error('radio schedule fetch failed: ' + res.status);
+        timetable = await res.json();
+    }
+
+    function slotAt(t) {
+        if (!timetable) return null;
+        const slots = timetable.slots;
+        for (let i = slots.length - 1; i >= 0; i--) {
+            const [start, id] = slots[i];
+            if (start > t) continue;
+            const end = i + 1 < slots.length ? slots[i + 1][0] : timetable.until;
+            if (t >= end) return null;
+            return { slot_start: start, slot_end: end, offset: t - start,
+                     song: timetable.songs[id] };
+        }
+        return null;
+    }
+
+    async function nextSlot() {
+        // Only ask /radio/now (which also refreshes the clock skew) when
+        // the timetable is missing or has run out.
+        const local = slotAt(serverNow());
+        if (local) return local;
+        const data = await fetchNow();
+        fetchSchedule(data.server_time).catch(() => { timetable = null; });
+        return data;
+    }
+
     // Accumulate real playback time from discrete media events, so the
     // measure survives background/throttled tabs (where 'timeupdate' is
     // sparse). Only actual playing time counts; paused and buffering
@@ -265,7 +304,7 @@
         clearTimeout(switchTimer);
         let data;
         try {
-            data = await fetchNow();
+            data = await nextSlot();
         } catch (e) {
             // Transient failure (or no songs yet): retry without
             // losing the beat — the schedule is recomputed on every
@@ -1,4 +1,8 @@
 let voteOrder = []
+// Number of voters in the show; ``voteOrder`` fills up to it as the
+// reveal stream delivers them.
+let voterCount = 0;
+let voterWaiters = [];
 let votes = {}
 let data = []
 let points = []
@@ -33,23 +37,64 @@ function toggleHeader() {
     header.classList.toggle("hidden");
 }
 
-async function loadVotes(year, show) {
-    const res = await fetch(window.location.pathname + '/votes');
-    const json = await res.json();
-    points = json.points;
-    userSongs = json.user_songs;
-    points.sort((a, b) => a - b);
-    maxPoints = points[points.length - 1];
-    voteOrder = json.vote_order;
-    for (const song of json.songs) {
-        data.push(song);
-    }
-    data.sort((a, b) => a.vote_data.ro - b.vote_data.ro);
-    votes = json.results;
-    associations = json.associations;
-    penalties = json.penalties || {};
+/**
+ * Subscribe to the reveal stream. Resolves once the show has arrived;
+ * voters are appended to ``voteOrder`` as the server reveals them (all
+ * at once for a replay, one step apart during a live reveal, which also
+ * unpauses the scoreboard) and ``vote()`` waits for each in turn.
+ */
+function loadVotes(year, show) {
+    return new Promise((resolve, reject) => {
+        const source = new EventSource(window.location.pathname + '/stream');
+        source.addEventListener('live', () => {
+            paused = false;
+        });
+        source.addEventListener('show', e => {
+            // Reconnects resume after the last event, but be safe.
+            if (data.length) return;
+            const json = JSON.parse(e.data);
+            points = json.points;
+            userSongs = json.user_songs;
+            points.sort((a, b) => a - b);
+            maxPoints = points[points.length - 1];
+            voterCount = json.voters;
+            for (const song of json.songs) {
+                data.push(song);
+            }
+            data.sort((a, b) => a.vote_data.ro - b.vote_data.ro);
+            associations = json.associations;
+            penalties = json.penalties || {};
+            resolve();
+        });
+        source.addEventListener('vote', e => {
+            const json = JSON.parse(e.data);
+            voteOrder.push(json.voter);
+            votes[json.voter] = json.points;
+            for (const wake of voterWaiters.splice(0)) {
+                wake();
+            }
+        });
+        source.addEventListener('end', () => source.close());
+        // A live reveal closes the stream after each due voter; the browser
+        // reconnects after the server's ``retry`` for the next one.
+        source.onerror = () => {
+            if (!data.length) {
+                source.close();
+                reject(new Error('Could not load the scoreboard'));
+            }
+        };
+    });
+}
+
+/** Resolves once the server has revealed the ``i``-th voter. */
+function waitForVoter(i) {
+    return new Promise(resolve => {
+        const check = () => (i < voteOrder.length ? resolve() : voterWaiters.push(check));
+        check();
+    });
 }
 
+
 function makeRow(country) {
     function makePointDisplay(padding, className) {
         const el = document.createElement("div");
@@ -624,7 +669,6 @@ async function vote() {
     const fromJury = document.querySelector("#from");
 
     let juryCount = 0;
-    const voterCount = voteOrder.length;
     const pointsImmediate = points.slice(0, points.length - 3);
     const pointsDelayed = points.slice(points.length - 3);
 
@@ -634,7 +678,11 @@ async function vote() {
     await applyPenaltyStage();
     if (stale()) return;
 
-    for (const from of voteOrder) {
+    for (let i = 0; i < voterCount; i++) {
+        await waitForVoter(i);
+        if (stale()) return;
+
+        const from = voteOrder[i];
         juryCount++;
         const vts = votes[from];
         const entries = userSongs[from] || [];
@@ -847,7 +895,7 @@ async function onLoad(year, show, special = false) {
     }, true);
     setColumnLimit();
 
-    document.querySelector("#total-juries").innerHTML = voteOrder.length;
+    document.querySelector("#total-juries").innerHTML = voterCount;
 
     document.querySelector("#reset").onclick = async () => {
         await reset();
@@ -1,4 +1,6 @@
 from .auth import (
+    forget_api_token,
+    forget_session,
     generate_api_token,
     get_api_auth,
     get_session_auth,
@@ -8,6 +10,7 @@ from .auth import (
     get_user_role_from_session,
     hash_api_token,
 )
+from .ballots import write_ballot
 from .decorators import (
     require_api_auth,
     require_permissions,
@@ -37,6 +40,7 @@ from .markdown import (
     make_bbcode_plugin,
     make_entity_plugin,
 )
+from .render_cache import render_cached, show_page_version, song_page_version
 from .responses import (
     ErrorID,
     create_cookie,
@@ -94,6 +98,7 @@ from .types import (
     VoteData,
     Year,
 )
+from .vote_order import get_official_ballots, get_vote_order, store_vote_order
 
 __all__ = (
     "LCG",
@@ -116,6 +121,8 @@ __all__ = (
     "draw_running_order",
     "err",
     "footnote_plugin",
+    "forget_api_token",
+    "forget_session",
     "format_seconds",
     "format_timedelta",
     "generate_api_token",
@@ -127,6 +134,7 @@ __all__ = (
     "get_language",
     "get_languages_for_songs",
     "get_markdown_parser",
+    "get_official_ballots",
     "get_points_for_system",
     "get_session_auth",
     "get_show_id",
@@ -149,6 +157,7 @@ __all__ = (
     "get_user_role_from_session",
     "get_user_songs",
     "get_vote_count_for_show",
+    "get_vote_order",
     "get_votes_for_song",
     "get_votes_for_songs",
     "get_year_countries",
@@ -164,16 +173,21 @@ __all__ = (
     "parse_cookie",
     "parse_seconds",
     "parse_timedelta",
+    "render_cached",
     "render_template",
     "require_api_auth",
     "require_permissions",
     "require_user",
     "resolve_country_code",
     "resp",
+    "show_page_version",
+    "song_page_version",
     "spread_running_order",
+    "store_vote_order",
     "url_bool",
     "with_auth",
     "with_permissions",
     "with_user",
+    "write_ballot",
     "write_m3u",
 )
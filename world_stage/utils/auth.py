@@ -1,12 +1,24 @@
+import datetime
 import hashlib
 import secrets
+import threading
+import time
 from typing import LiteralString
 
-from flask import request
+from flask import current_app, g, request
 
+from .. import cache
 from ..db import get_db
 from .types import UserPermissions
 
+# Sessions resolve to (user, permissions, expires_at). Logout, account and
+# role changes notify the region; the short TTL bounds anything missed.
+SESSION_REGION = cache.define_region("session", ttl=60, maxsize=10000)
+# Token hashes resolve to (user_id, username, permissions); revocation and
+# account changes notify the region.
+API_TOKEN_REGION = cache.define_region("api_token", ttl=300, maxsize=4096)
+API_TOKEN_TOUCH_INTERVAL = 60.0
+
 _PERMISSION_SELECT: LiteralString = """
     SELECT account_role.name, account_role.can_edit, account_role.can_view_restricted"""
 
@@ -22,42 +34,11 @@ def _permissions_from_row(row) -> UserPermissions:
 
 
 def get_user_id_from_session(session_id: str | None) -> tuple[int, str] | None:
-    if not session_id:
-        return None
-    db = get_db()
-    cursor = db.cursor()
-
-    cursor.execute(
-        """
-        SELECT account.id, account.username FROM session
-        JOIN account ON session.user_id = account.id
-        WHERE session.session_id = %s AND session.expires_at > CURRENT_TIMESTAMP
-    """,
-        (session_id,),
-    )
-    row = cursor.fetchone()
-    if row:
-        return (row["id"], row["username"])
-    return None
+    return get_session_auth(session_id)[0]
 
 
 def get_user_role_from_session(session_id: str | None) -> UserPermissions:
-    if not session_id:
-        return UserPermissions()
-    db = get_db()
-    cursor = db.cursor()
-
-    cursor.execute(
-        _PERMISSION_SELECT
-        + """
-        FROM session
-        JOIN account ON session.user_id = account.id
-        JOIN account_role ON account.role = account_role.name
-        WHERE session.session_id = %s AND session.expires_at > CURRENT_TIMESTAMP
-    """,
-        (session_id,),
-    )
-    return _permissions_from_row(cursor.fetchone())
+    return get_session_auth(session_id)[1]
 
 
 def get_user_permissions(user_id: int | None) -> UserPermissions:
@@ -79,16 +60,31 @@ def get_user_permissions(user_id: int | None) -> UserPermissions:
 
 
 def get_session_auth(session_id: str | None) -> tuple[tuple[int, str] | None, UserPermissions]:
-    """Resolve a session cookie to ((user_id, username) | None, permissions)
-    in a single query. Anonymous or expired sessions yield (None, defaults)."""
+    """Resolve a session cookie to ((user_id, username) | None, permissions).
+    Anonymous or expired sessions yield (None, defaults).
+
+    Resolved at most once per request, and served from the per-worker
+    session cache when possible."""
     if not session_id:
         return None, UserPermissions()
+    memo = g.setdefault("session_auth", {})
+    if session_id not in memo:
+        user, permissions, expires_at = cache.cached(
+            SESSION_REGION, session_id, lambda: _load_session(session_id)
+        )
+        if expires_at is not None and expires_at <= datetime.datetime.now(datetime.UTC):
+            user, permissions = None, UserPermissions()
+        memo[session_id] = (user, permissions)
+    return memo[session_id]
+
+
+def _load_session(session_id: str):
     db = get_db()
     cursor = db.cursor()
 
     cursor.execute(
         """
-        SELECT account.id, account.username,
+        SELECT account.id, account.username, session.expires_at,
                account_role.name, account_role.can_edit, account_role.can_view_restricted
         FROM session
         JOIN account ON session.user_id = account.id
@@ -99,8 +95,15 @@ def get_session_auth(session_id: str | None) -> tuple[tuple[int, str] | None, Us
     )
     row = cursor.fetchone()
     if not row:
-        return None, UserPermissions()
-    return (row["id"], row["username"]), _permissions_from_row(row)
+        return None, UserPermissions(), None
+    return (row["id"], row["username"]), _permissions_from_row(row), row["expires_at"]
+
+
+def forget_session(session_id: str) -> None:
+    """Evict a session right away in this worker (e.g. on logout); other
+    workers are told by the session table's trigger."""
+    g.pop("session_auth", None)
+    cache.forget(SESSION_REGION, session_id)
 
 
 # ── API token helpers ──────────────────────────────────────────────
@@ -117,29 +120,75 @@ def hash_api_token(token: str) -> bytes:
 
 def get_user_from_api_token(token: str) -> tuple[int, str] | None:
     """Look up a user by API token. Returns (user_id, username) or None."""
+    identity = _api_token_identity(token)
+    return identity[:2] if identity else None
+
+
+def _api_token_identity(token: str) -> tuple[int, str, UserPermissions] | None:
+    """(user_id, username, permissions) for a token, from the per-worker
+    token cache when possible, and note the use for last_used_at."""
     token_hash = hash_api_token(token)
+    identity = cache.cached(API_TOKEN_REGION, token_hash, lambda: _load_api_token(token_hash))
+    if identity:
+        _touch_api_token(token_hash)
+    return identity
+
+
+def _load_api_token(token_hash: bytes) -> tuple[int, str, UserPermissions] | None:
     db = get_db()
     cursor = db.cursor()
     cursor.execute(
         """
-        SELECT account.id, account.username FROM api_token
+        SELECT account.id, account.username,
+               account_role.name, account_role.can_edit, account_role.can_view_restricted
+        FROM api_token
         JOIN account ON api_token.user_id = account.id
+        JOIN account_role ON account.role = account_role.name
         WHERE api_token.token_hash = %s AND account.approved
     """,
         (token_hash,),
     )
     row = cursor.fetchone()
-    if row:
-        cursor.execute(
-            """
-            UPDATE api_token SET last_used_at = CURRENT_TIMESTAMP
-            WHERE token_hash = %s
-        """,
-            (token_hash,),
-        )
-        db.commit()
-        return (row["id"], row["username"])
-    return None
+    if not row:
+        return None
+    return row["id"], row["username"], _permissions_from_row(row)
+
+
+def _touch_api_token(token_hash: bytes) -> None:
+    """Record a token use. last_used_at is only written when this worker
+    hasn't written it for the token within API_TOKEN_TOUCH_INTERVAL, so a
+    busy client costs one write a minute instead of one per request."""
+    touched = current_app.extensions.setdefault(
+        "api_token_touched", {"at": {}, "lock": threading.Lock()}
+    )
+    now = time.monotonic()
+    with touched["lock"]:
+        last = touched["at"].get(token_hash)
+        if last is not None and now - last < API_TOKEN_TOUCH_INTERVAL:
+            return
+        # Drop the tokens whose interval has passed, so the map only
+        # holds those used within the last API_TOKEN_TOUCH_INTERVAL.
+        touched["at"] = {
+            other: at
+            for other, at in touched["at"].items()
+            if now - at < API_TOKEN_TOUCH_INTERVAL
+        }
+        touched["at"][token_hash] = now
+    db = get_db()
+    db.execute(
+        """
+        UPDATE api_token SET last_used_at = CURRENT_TIMESTAMP
+        WHERE token_hash = %s
+    """,
+        (token_hash,),
+    )
+    db.commit()
+
+
+def forget_api_token(token_hash: bytes) -> None:
+    """Evict a revoked token right away in this worker; other workers are
+    told by the api_token table's trigger."""
+    cache.forget(API_TOKEN_REGION, token_hash)
 
 
 def get_api_auth() -> tuple[int, str, UserPermissions] | None:
@@ -147,20 +196,11 @@ def get_api_auth() -> tuple[int, str, UserPermissions] | None:
     Returns (user_id, username, permissions) or None."""
     auth = request.headers.get("Authorization", "")
     if auth.startswith("Bearer "):
-        token = auth[7:]
-        result = get_user_from_api_token(token)
-        if result:
-            user_id, username = result
-            perms = get_user_permissions(user_id)
-            return (user_id, username, perms)
-        return None
+        return _api_token_identity(auth[7:])
 
     # Fall back to session cookie
-    session_id = request.cookies.get("session")
-    if session_id:
-        result = get_user_id_from_session(session_id)
-        if result:
-            user_id, username = result
-            perms = get_user_permissions(user_id)
-            return (user_id, username, perms)
+    user, perms = get_session_auth(request.cookies.get("session"))
+    if user:
+        user_id, username = user
+        return (user_id, username, perms)
     return None
@@ -0,0 +1,56 @@
+from ..db import fetchone
+
+
+def write_ballot(
+    cursor,
+    *,
+    voter_id: int,
+    show_id: int,
+    votes: dict[int, int],
+    country_id: str | None = None,
+    nickname: str | None = None,
+    ip_address: str | None = None,
+    result_mode: str = "official",
+) -> tuple[int, bool]:
+    """Create or replace a voter's ballot ({score: song_id}) for a show.
+
+    Two statements whatever the ballot size: an upsert of the vote_set,
+    then one statement that deletes songs no longer voted for and
+    upserts the rest. Votes whose score didn't change are left alone, so
+    the vote triggers only see rows that actually changed.
+
+    Returns (vote_set_id, inserted). The caller commits."""
+    cursor.execute(
+        """
+        INSERT INTO vote_set (voter_id, show_id, country_id, nickname, ip_address, result_mode)
+        VALUES (%s, %s, %s, %s, %s, %s)
+        ON CONFLICT (voter_id, show_id, result_mode) DO UPDATE
+        SET country_id = EXCLUDED.country_id,
+            nickname = EXCLUDED.nickname,
+            ip_address = COALESCE(EXCLUDED.ip_address, vote_set.ip_address)
+        RETURNING id, (xmax = 0) AS inserted
+        """,
+        (voter_id, show_id, country_id, nickname, ip_address, result_mode),
+    )
+    row = fetchone(cursor)
+    vote_set_id = row["id"]
+
+    song_ids = list(votes.values())
+    scores = list(votes.keys())
+    cursor.execute(
+        """
+        WITH removed AS (
+            DELETE FROM vote
+            WHERE vote_set_id = %(vote_set_id)s
+              AND (song_id IS NULL OR song_id <> ALL(%(song_ids)s::bigint[]))
+        )
+        INSERT INTO vote (vote_set_id, song_id, score)
+        SELECT %(vote_set_id)s, ballot.song_id, ballot.score
+        FROM unnest(%(song_ids)s::bigint[], %(scores)s::integer[]) AS ballot(song_id, score)
+        ON CONFLICT (vote_set_id, song_id) DO UPDATE
+        SET score = EXCLUDED.score
+        WHERE vote.score IS DISTINCT FROM EXCLUDED.score
+        """,
+        {"vote_set_id": vote_set_id, "song_ids": song_ids, "scores": scores},
+    )
+    return vote_set_id, row["inserted"]
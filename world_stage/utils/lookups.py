@@ -1,8 +1,33 @@
+from flask import g
+
+from .. import cache
 from ..db import fetchone, get_db
 from .types import Country, ShowData
 
+SHOW_REGION = cache.define_region("show", ttl=600, maxsize=1024)
+POINT_SYSTEM_REGION = cache.define_region("point_system", ttl=3600, maxsize=64)
+# Reference tables only change through admin edits, which notify; the TTL
+# is just a backstop.
+COUNTRY_REGION = cache.define_region("country", ttl=86400, maxsize=2048)
+YEAR_REGION = cache.define_region("year", ttl=86400, maxsize=16)
+LANGUAGE_REGION = cache.define_region("language", ttl=86400, maxsize=1024)
+GENRE_REGION = cache.define_region("genre", ttl=86400, maxsize=4)
+
 
 def get_show_id(show: str, year: int | None = None) -> ShowData | None:
+    """Look up a show by "year-short" (or short name plus year).
+
+    Memoised for the request and cached per worker (invalidated by the
+    show, point and year triggers), so handlers and helpers can call it
+    freely. The returned ShowData is shared; don't mutate it."""
+    memo = g.setdefault("show_memo", {})
+    key = (show, year)
+    if key not in memo:
+        memo[key] = cache.cached(SHOW_REGION, key, lambda: _load_show(show, year))
+    return memo[key]
+
+
+def _load_show(show: str, year: int | None) -> ShowData | None:
     db = get_db()
     cursor = db.cursor()
 
@@ -73,6 +98,16 @@ def get_show_id(show: str, year: int | None = None) -> ShowData | None:
 
 
 def get_points_for_system(point_system_id: int) -> list[int]:
+    return list(
+        cache.cached(
+            POINT_SYSTEM_REGION,
+            point_system_id,
+            lambda: tuple(_load_points(point_system_id)),
+        )
+    )
+
+
+def _load_points(point_system_id: int) -> list[int]:
     db = get_db()
     cursor = db.cursor()
 
@@ -92,6 +127,16 @@ def get_points_for_system(point_system_id: int) -> list[int]:
 
 
 def get_countries(only_participating: bool = False) -> list[Country]:
+    return list(
+        cache.cached(
+            COUNTRY_REGION,
+            ("list", only_participating),
+            lambda: tuple(_load_countries(only_participating)),
+        )
+    )
+
+
+def _load_countries(only_participating: bool) -> list[Country]:
     if only_participating:
         query = """
             SELECT id, name, is_participating, cc3 FROM country
@@ -128,6 +173,10 @@ def get_year_placements(year: int) -> dict[int, int]:
 
 
 def get_years() -> list[int]:
+    return list(cache.cached(YEAR_REGION, "all", lambda: tuple(_load_years())))
+
+
+def _load_years() -> list[int]:
     db = get_db()
     cursor = db.cursor()
     cursor.execute("""
@@ -138,6 +187,10 @@ def get_years() -> list[int]:
 
 def get_closed_years() -> list[int]:
     """Return closed positive year ids in ascending order, for range pickers."""
+    return list(cache.cached(YEAR_REGION, "closed", lambda: tuple(_load_closed_years())))
+
+
+def _load_closed_years() -> list[int]:
     db = get_db()
     cursor = db.cursor()
     cursor.execute("""
@@ -154,6 +207,15 @@ def get_years_grouped() -> dict:
     - closed: status <> 'open', ascending
     - specials: negative IDs with their special_name / special_short_name
     """
+    grouped = cache.cached(YEAR_REGION, "grouped", _load_years_grouped)
+    return {
+        "open": list(grouped["open"]),
+        "closed": list(grouped["closed"]),
+        "specials": [dict(special) for special in grouped["specials"]],
+    }
+
+
+def _load_years_grouped() -> dict:
     db = get_db()
     cursor = db.cursor()
     cursor.execute("""
@@ -242,6 +304,10 @@ def get_vote_count_for_show(show_id: int) -> int:
 
 def resolve_country_code(code: str) -> str | None:
     """Resolve a country code (cc2 or cc3) to the canonical cc2 id. Returns None if not found."""
+    return cache.cached(COUNTRY_REGION, ("code", code), lambda: _load_country_code(code))
+
+
+def _load_country_code(code: str) -> str | None:
     db = get_db()
     cursor = db.cursor()
     cursor.execute(
@@ -256,6 +322,12 @@ def resolve_country_code(code: str) -> str | None:
 
 
 def get_country_name(country_id: str) -> str:
+    return cache.cached(
+        COUNTRY_REGION, ("name", country_id), lambda: _load_country_name(country_id)
+    )
+
+
+def _load_country_name(country_id: str) -> str:
     db = get_db()
     cursor = db.cursor()
 
@@ -0,0 +1,189 @@
+"""Rendered archive pages, cached per worker and optionally on disk.
+
+Once a year is closed and its shows are fully published, their pages
+only change when an entry is edited or a result is corrected. A view
+decorated with ``@render_cached(version)`` first looks up the page's
+data version (one query); while the page is cacheable the rendered
+body is served from the worker's ``render`` region, then from
+``RENDER_CACHE_DIR`` when that is set, before the view runs at all.
+
+Keys combine the endpoint, its arguments, the viewer's permission
+class and the data version, so nothing is ever evicted on write: the
+next request just misses. The version is the newest ``song_audit_log``
+row and the newest result row for the year, plus the year's
+``render_cache_version``, which triggers bump for the edits the audit
+log doesn't record (languages, names, running orders).
+
+Cached responses carry a strong ETag, so revisits get a 304.
+"""
+
+import functools
+import hashlib
+import logging
+import os
+import tempfile
+from collections.abc import Callable, Hashable
+from typing import Any
+
+from flask import Response, current_app, request
+
+from .. import cache
+from ..db import get_db
+from .lookups import get_show_id
+
+log = logging.getLogger(__name__)
+
+RENDER_REGION = cache.define_region("render", ttl=86400, maxsize=1024)
+
+type Version = Callable[..., str | None]
+
+
+def _year_version(year: int) -> str | None:
+    """The data version of a closed year's pages, or None while it is open."""
+    cursor = get_db().cursor()
+    cursor.execute(
+        """
+        SELECT year.status,
+            (SELECT MAX(id) FROM song_audit_log WHERE song_year_id = year.id) AS audit_id,
+            (SELECT MAX(calculated_at) FROM country_show_results
+             WHERE year_id = year.id) AS calculated_at,
+            (SELECT version FROM render_cache_version
+             WHERE year_id = year.id) AS version
+        FROM year
+        WHERE year.id = %s
+        """,
+        (year,),
+    )
+    row = cursor.fetchone()
+    if row is None or row["status"] != "closed":
+        return None
+    return f"{row['audit_id']}/{row['calculated_at']}/{row['version']}"
+
+
+def show_page_version(*, year: int, show: str, **_) -> str | None:
+    """Version of a show's pages; cacheable once the show is fully
+    published and its year closed."""
+    show_data = get_show_id(show, year)
+    if show_data is None or show_data.status != "full":
+        return None
+    version = _year_version(year)
+    return version and f"{show_data.id}/{version}"
+
+
+def song_page_version(
+    *, code: str, year: int, user: tuple[int, str] | None = None, **_
+) -> str | None:
+    """Version of an entry's page in a closed year. Its submitter sees
+    edit links, so their views aren't cached."""
+    if user is not None:
+        cursor = get_db().cursor()
+        cursor.execute(
+            """
+            SELECT 1 FROM song
+            JOIN country ON country.id = song.country_id
+            WHERE (song.country_id = %(cc)s OR country.cc3 = %(cc)s)
+              AND song.year_id = %(year)s AND song.submitter_id = %(user_id)s
+            """,
+            {"cc": code.upper(), "year": year, "user_id": user[0]},
+        )
+        if cursor.fetchone() is not None:
+            return None
+    return _year_version(year)
+
+
+def _permission_class(kwargs: dict[str, Any]) -> str:
+    permissions = kwargs.get("permissions")
+    if permissions is None:
+        return "public"
+    if permissions.can_view_restricted:
+        return "restricted"
+    if permissions.can_edit:
+        return "editor"
+    return "public"
+
+
+def _disk_path(directory: str, key: Hashable) -> str:
+    return os.path.join(directory, hashlib.sha256(repr(key).encode()).hexdigest())
+
+
+def _read_disk(path: str, version: str) -> bytes | None:
+    try:
+        with open(path, "rb") as f:
+            stored, _, body = f.read().partition(b"\n")
+    except OSError:
+        return None
+    return body if stored.decode() == version else None
+
+
+def _write_disk(path: str, version: str, body: bytes) -> None:
+    """Replace the page's file atomically; one file per page, whatever
+    its version, so the directory doesn't grow with edits."""
+    directory = os.path.dirname(path)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as f:
+            f.write(version.encode() + b"\n" + body)
+        os.replace(f.name, path)
+    except OSError as e:
+        log.warning("could not store rendered page %s: %s", path, e)
+
+
+def _entry(body: bytes) -> tuple[str, bytes]:
+    return hashlib.sha256(body).hexdigest(), body
+
+
+def _respond(entry: tuple[str, bytes]) -> Response:
+    etag, body = entry
+    response = Response(body, content_type="text/html")
+    response.cache_control.no_cache = True
+    response.set_etag(etag)
+    return response.make_conditional(request)
+
+
+def render_cached(version: Version) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Serve a view's HTML from the render cache while ``version(**kwargs)``
+    returns a version, rendering it on a miss. Only 200 HTML responses
+    are stored. Apply below the auth decorator, so the viewer's
+    permissions are among the view's arguments."""
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not request.accept_mimetypes.accept_html:
+                return fn(*args, **kwargs)
+            current = version(**kwargs)
+            if current is None:
+                return fn(*args, **kwargs)
+
+            page_args = tuple(
+                sorted((k, v) for k, v in kwargs.items() if k not in ("permissions", "user"))
+            )
+            page = (request.endpoint, page_args, _permission_class(kwargs))
+            directory = current_app.config.get("RENDER_CACHE_DIR")
+            rendered = None
+
+            def load() -> tuple[str, bytes] | None:
+                nonlocal rendered
+                path = directory and _disk_path(directory, page)
+                if path and (body := _read_disk(path, current)) is not None:
+                    return _entry(body)
+                rendered = fn(*args, **kwargs)
+                if (
+                    not isinstance(rendered, Response)
+                    or rendered.status_code != 200
+                    or rendered.mimetype != "text/html"
+                ):
+                    return None
+                body = rendered.get_data()
+                if path:
+                    _write_disk(path, current, body)
+                return _entry(body)
+
+            entry = cache.cached(RENDER_REGION, (*page, current), load)
+            if entry is None:
+                return rendered if rendered is not None else fn(*args, **kwargs)
+            return _respond(entry)
+
+        return wrapper
+
+    return decorator
@@ -6,6 +6,7 @@ if TYPE_CHECKING:
     from .songs import Song
 
 type Bucket = deque[tuple[str, dict[int, int]]]
+type Voter = tuple[int, dict[int, int]]  # (position in bucket, points per song)
 
 
 class LCG:
@@ -116,62 +117,75 @@ class AbstractVoteSequencer(ABC):
 
         return low, medium, high, early_voters
 
-    def _suspense_metric(self, temp_scores: dict[int, int], vote: dict[int, int]) -> int:
-        sorted_scores = sorted(temp_scores.values(), reverse=True)
-        gap = sorted_scores[0] - sorted_scores[1] if len(sorted_scores) > 1 else 0
-        winner_points = sum(pts for pts, item in vote.items() if item == self.known_winner)
-        return (winner_points * self.winner_weight) + gap
-
     @abstractmethod
     def get_order(self) -> list[str]:
         pass
 
 
 class SuspensefulVoteSequencer(AbstractVoteSequencer):
+    """Reveal voters so the race stays close for as long as possible.
+
+    The low, medium and high buckets (by points given to the eventual
+    winner) take turns; each turn reveals the voter in the bucket whose
+    ballot leaves the smallest lead at the top, plus a penalty for the
+    points it gives the winner. Ties go to the voter listed first.
+
+    Candidates are scored from their ballot's per-song deltas against
+    the running totals: after a ballot the top two are among the songs
+    it touches and the two best songs it doesn't, and those are within
+    ballot size + 2 places of the front of the ranking. Each bucket is
+    grouped by penalty, and a turn stops once the remaining penalties
+    alone exceed the best score found, since the lead is never negative.
+    """
+
     def get_order(self) -> list[str]:
         low, medium, high, early_voters = self._classify_votes()
-        current_scores: dict[int, int] = {song_id: 0 for song_id in self.song_ids}
+        scores: dict[int, int] = {song_id: 0 for song_id in self.song_ids}
+        # Song ids by running total, highest first.
+        ranking = list(scores)
         final_order: list[str] = []
         lcg = LCG(self.seed)
 
-        buckets: list[Bucket] = [low, medium, high]
+        buckets = [self._penalty_groups(bucket) for bucket in (low, medium, high)]
+        remaining = [len(bucket) for bucket in (low, medium, high)]
+        widest = max((len(vote) for vote in self.vote_dict.values()), default=0)
         bucket_idx = 0
-        remaining_voters = set(self.vote_dict.keys()) - set(final_order)
-
-        while any(buckets):
-            tried = 0
-            while tried < len(buckets):
-                bucket = buckets[bucket_idx % len(buckets)]
-                bucket_idx += 1
-                tried += 1
-
-                if not bucket:
-                    continue
-
-                best_user: str = ""
-                best_vote: dict[int, int] = {}
-                best_score: float = float("inf")
-
-                for user, vote in bucket:
-                    if user not in remaining_voters:
-                        continue
-                    temp_scores = current_scores.copy()
-                    for pts, item in vote.items():
-                        temp_scores[item] += pts
-                    score = self._suspense_metric(temp_scores, vote)
-                    if score < best_score:
-                        best_user, best_vote = user, vote
-                        best_score = score
-
-                for pts, item in best_vote.items():
-                    current_scores[item] += pts
-                final_order.append(best_user)
-                remaining_voters.remove(best_user)
-
-                # Remove from bucket
-                bucket = deque((u, v) for u, v in bucket if u != best_user)
-                buckets[(bucket_idx - 1) % len(buckets)] = bucket
-                break
+
+        while any(remaining):
+            turn = bucket_idx % len(buckets)
+            bucket_idx += 1
+            if not remaining[turn]:
+                continue
+
+            # Every ballot's two best untouched songs are in here.
+            head = [(item, scores[item]) for item in ranking[: widest + 2]]
+            best: tuple[float, int] = (float("inf"), 0)
+            best_user, best_group = "", {}
+            for penalty, group in buckets[turn]:
+                if penalty > best[0]:
+                    break
+                for user, (position, delta) in group.items():
+                    score = penalty
+                    if len(scores) > 1:
+                        top: list[float] = [scores[item] + pts for item, pts in delta.items()]
+                        untouched = (value for item, value in head if item not in delta)
+                        top.append(next(untouched, float("-inf")))
+                        top.append(next(untouched, float("-inf")))
+                        top.sort()
+                        score += top[-1] - top[-2]
+                    if (score, position) < best:
+                        best, best_user, best_group = (score, position), user, group
+                        if score == penalty:
+                            # A tie at the top; nobody after this voter can beat it.
+                            break
+                if best[0] == penalty:
+                    break
+
+            for item, pts in best_group.pop(best_user)[1].items():
+                scores[item] += pts
+            ranking.sort(key=scores.__getitem__, reverse=True)
+            remaining[turn] -= 1
+            final_order.append(best_user)
 
         for v in early_voters:
             num = lcg.next(self.first_half)
@@ -179,6 +193,19 @@ class SuspensefulVoteSequencer(AbstractVoteSequencer):
 
         return final_order
 
+    def _penalty_groups(self, bucket: Bucket) -> list[tuple[int, dict[str, Voter]]]:
+        """A bucket's voters grouped by their penalty for points given to
+        the winner, lowest first; each voter keeps its position in the
+        bucket for tie-breaks and its ballot as points per song."""
+        groups: dict[int, dict[str, Voter]] = {}
+        for position, (user, vote) in enumerate(bucket):
+            delta: dict[int, int] = {}
+            for pts, item in vote.items():
+                delta[item] = delta.get(item, 0) + pts
+            penalty = delta.get(self.known_winner, 0) * self.winner_weight
+            groups.setdefault(penalty, {})[user] = (position, delta)
+        return sorted(groups.items())
+
 
 class RandomVoteSequencer(AbstractVoteSequencer):
     def get_order(self) -> list[str]:
@@ -1,9 +1,10 @@
 from dataclasses import dataclass, field
-from functools import lru_cache, total_ordering
+from functools import total_ordering
 from typing import Any, LiteralString, Self
 
+from .. import cache
 from ..db import get_db
-from .lookups import get_show_id
+from .lookups import LANGUAGE_REGION, get_show_id
 from .timefmt import format_seconds
 from .types import Country, Language, VoteData, Year
 
@@ -230,8 +231,11 @@ def get_votes_for_songs(
     return result
 
 
-@lru_cache(maxsize=512)
 def get_language(lang_id: int) -> Language | None:
+    return cache.cached(LANGUAGE_REGION, lang_id, lambda: _load_language(lang_id))
+
+
+def _load_language(lang_id: int) -> Language | None:
     db = get_db()
     cursor = db.cursor()
 
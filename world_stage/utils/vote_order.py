@@ -0,0 +1,106 @@
+"""Reveal order of a show's ballots.
+
+The order only depends on the official ballots, the show id (the seed)
+and the sequencer the show uses, so it is computed once and kept in
+``show_vote_order``: when voting closes or the show is set to full, or
+else on the first scoreboard load after that. The show result refresh
+deletes the row whenever the official results are rebuilt, so a changed
+ballot or running order is sequenced again on the next load.
+"""
+
+from collections import defaultdict
+
+from ..db import get_db
+from .lookups import get_show_id
+from .sequencers import (
+    AbstractVoteSequencer,
+    ChronologicalVoteSequencer,
+    RandomVoteSequencer,
+    SuspensefulVoteSequencer,
+)
+from .songs import Song, get_show_songs
+from .timefmt import dt_now
+from .types import ShowData
+
+
+def get_official_ballots(show_id: int) -> dict[str, dict[int, int]]:
+    """Every official ballot of a show as {username: {score: song_id}},
+    in the order they were cast."""
+    cursor = get_db().cursor()
+    cursor.execute(
+        """
+        SELECT song_id, score AS pts, username FROM vote
+        JOIN vote_set ON vote.vote_set_id = vote_set.id
+        JOIN account ON vote_set.voter_id = account.id
+        JOIN song ON vote.song_id = song.id
+        WHERE vote_set.show_id = %s AND vote_set.result_mode = 'official'
+        ORDER BY vote_set.created_at
+    """,
+        (show_id,),
+    )
+    ballots: dict[str, dict[int, int]] = defaultdict(dict)
+    for row in cursor.fetchall():
+        ballots[row["username"]][row["pts"]] = row["song_id"]
+    return ballots
+
+
+def _sequencer(
+    show_data: ShowData, songs: list[Song], ballots: dict[str, dict[int, int]]
+) -> AbstractVoteSequencer:
+    if show_data.id < 60:
+        return SuspensefulVoteSequencer(ballots, songs, show_data.points, seed=show_data.id)
+    if show_data.id < 65:
+        return RandomVoteSequencer(ballots, songs, show_data.points, seed=show_data.id)
+    return ChronologicalVoteSequencer(ballots, songs, show_data.points, seed=show_data.id)
+
+
+def _is_final(show_data: ShowData) -> bool:
+    closed = show_data.voting_closes is not None and show_data.voting_closes < dt_now()
+    return closed or show_data.status == "full"
+
+
+def _store(show_id: int, vote_order: list[str]) -> None:
+    get_db().cursor().execute(
+        """
+        INSERT INTO show_vote_order (show_id, vote_order) VALUES (%s, %s)
+        ON CONFLICT (show_id) DO UPDATE
+        SET vote_order = EXCLUDED.vote_order, computed_at = CURRENT_TIMESTAMP
+        """,
+        (show_id, vote_order),
+    )
+
+
+def get_vote_order(
+    show_data: ShowData, songs: list[Song], ballots: dict[str, dict[int, int]]
+) -> list[str]:
+    """The reveal order of ``ballots``. Read from ``show_vote_order`` when
+    the stored order covers exactly these voters; otherwise sequenced,
+    and stored once voting has closed or the show is full. The caller
+    commits."""
+    cursor = get_db().cursor()
+    cursor.execute(
+        "SELECT vote_order FROM show_vote_order WHERE show_id = %s", (show_data.id,)
+    )
+    row = cursor.fetchone()
+    # A renamed voter, or a ballot whose refresh hasn't run yet, leaves
+    # the stored order behind the ballots.
+    if row is not None and sorted(row["vote_order"]) == sorted(ballots):
+        return row["vote_order"]
+
+    vote_order = _sequencer(show_data, songs, ballots).get_order()
+    if _is_final(show_data):
+        _store(show_data.id, vote_order)
+    return vote_order
+
+
+def store_vote_order(year: int | None, show: str) -> None:
+    """Sequence a show's official ballots and store the order, for when
+    voting closes or the show is published. The caller commits."""
+    show_data = get_show_id(show, year)
+    if show_data is None:
+        return
+    songs = get_show_songs(year, show)
+    if not songs:
+        return
+    ballots = get_official_ballots(show_data.id)
+    _store(show_data.id, _sequencer(show_data, songs, ballots).get_order())